@@ -1,3 +1,4 @@
+from typing import Any, Dict, Optional
 from pydantic import HttpUrl
 from pydantic_settings import BaseSettings
 
@@ -5,20 +6,124 @@ class Settings(BaseSettings):
     secret_key: str = "test_secret_key"  # For testing only
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
-    
+    access_token_max_expire_minutes: int = 24 * 60  # longest lifetime create_access_token will issue
+    token_cache_size: int = 10000
+    token_cache_ttl_seconds: int = 300
+    password_hash_rounds: int = 12
+    password_hash_workers: int = 4
+    password_hash_queue_size: int = 32
+
     # Database
     database_url: str = "sqlite:///./test.db"
+    # Serve the contacts, facilities and calls routers from an AsyncEngine
+    database_async: bool = False
+    async_database_url: Optional[str] = None  # Derived from database_url when unset
+
+    # Pagination for list endpoints
+    default_page_size: int = 50
+    max_page_size: int = 200
+    export_batch_size: int = 1000  # rows per server-side cursor fetch when streaming /export
+    export_gzip_level: int = 6
+    max_batch_calls: int = 1000  # calls created by one /api/calls/batch request, after recurrence
+    max_availability_days: int = 31  # widest window /api/calls/availability will search
+    require_approved_contacts: bool = True  # non-staff may only call their approved contacts
+
+    # Caching
+    redis_url: Optional[str] = None  # Shared cache backend across workers; process-local when unset
+    facility_cache_ttl_seconds: int = 300
+    # Cache-Control sent with ETag'd responses; clients revalidate with If-None-Match
+    facility_settings_cache_control: str = "private, max-age=60"
+    call_list_cache_control: str = "private, no-cache"
+    contact_graph_cache_ttl_seconds: int = 300
+    contact_graph_cache_size: int = 10000  # users whose approved-contact sets are kept per worker
     
+    # Registration drafts live in the shared cache (or process memory) until completed or expired
+    registration_session_ttl_seconds: int = 24 * 3600
+
+    # Outgoing email: queued in the email_outbox table, delivered in batches by the sender
+    email_outbox_enabled: bool = False  # run the sender in the API process; or run `python -m app.core.outbox` separately
+    email_outbox_interval_seconds: float = 5.0
+    email_outbox_batch_size: int = 100  # messages sent over one SMTP connection
+    email_max_attempts: int = 8  # then the message is marked failed
+    email_retry_base_seconds: float = 30.0  # backoff doubles per attempt, with jitter
+    email_retry_max_seconds: float = 3600.0
+    email_from: str = "no-reply@localhost"
+    email_verification_url: str = "http://localhost:3000/registration"  # link in verification mail
+    smtp_host: str = "localhost"
+    smtp_port: int = 25
+    smtp_username: Optional[str] = None
+    smtp_password: Optional[str] = None
+    smtp_starttls: bool = False
+    smtp_timeout_seconds: float = 10.0
+
+    # Uploaded files (identity documents)
+    blob_store: str = "local"  # key in app.core.blobs.BLOB_STORES
+    blob_store_path: str = "./uploads"  # root directory of the local store
+    identity_upload_max_bytes: int = 10 * 1024 * 1024
+
     # Twilio
     twilio_account_sid: str = "test_account_sid"
     twilio_api_key_sid: str = "test_api_key_sid"
     twilio_api_key_secret: str = "test_api_key_secret"
 
+    # Video providers
+    video_provider: str = "livekit"  # default for facilities without their own choice
+    # Extra named instances as JSON, e.g. {"livekit-east": {"type": "livekit", "url": ..., "api_key": ..., "api_secret": ...}}
+    video_providers: Dict[str, Dict[str, Any]] = {}
+    video_provider_timeout_seconds: float = 10.0
+    video_provider_max_connections: int = 20  # pooled HTTP connections per provider instance
+
+    # Background scheduler
+    scheduler_enabled: bool = False  # run in the API process; or run `python -m app.core.scheduler` separately
+    scheduler_interval_seconds: float = 30.0
+    scheduler_batch_size: int = 500  # calls per bulk UPDATE
+    call_expiry_grace_minutes: int = 15  # how long past its end a call is left before it is expired
+
+    # Media server webhooks
+    webhook_queue_size: int = 10000  # events waiting to be applied; beyond this webhooks get 503 and are retried
+    webhook_batch_size: int = 500
+    webhook_batch_interval_seconds: float = 0.5  # how long a batch waits to fill before it is applied
+    webhook_apply_attempts: int = 5  # tries per batch, backing off, before its events are applied one by one
+    webhook_retry_base_seconds: float = 0.5
+
+    # Metrics
+    metrics_enabled: bool = True  # serve /metrics in Prometheus text format
+    # Bearer token for the scraper; staff access tokens are accepted too
+    metrics_token: Optional[str] = None
+    # Directory shared by every worker on the host; each writes snapshots there so
+    # /metrics from any worker covers all of them. Unset for a single worker.
+    metrics_multiproc_dir: Optional[str] = None
+    metrics_flush_interval_seconds: float = 5.0
+
+    # Query profiler (development/CI): per-request SQL capture and N+1 warnings
+    query_profiler_enabled: bool = False
+    query_profiler_repeat_threshold: int = 5  # same statement shape this often in one request is flagged
+    query_profiler_trace_file: Optional[str] = None  # append folded stacks here for flame graphs
+
+    # Rate limiting: path -> comma-separated "scope=requests/seconds" token buckets,
+    # scope being ip, user or facility (callers without a token count by IP)
+    rate_limit_enabled: bool = True
+    rate_limits: Dict[str, str] = {
+        "/api/auth/token": "ip=10/60",
+        "/api/registration/start": "ip=5/60",
+        "/api/registration/verify-identity": "ip=10/60",  # unauthenticated uploads
+        "/api/calls/token": "user=30/60,facility=1200/60",
+    }
+
+    # Event stream
+    event_backplane: Optional[str] = None  # "redis" (uses redis_url) or "postgres" to fan out across workers
+    events_queue_size: int = 100  # undelivered events per stream before the client is told to resync
+    events_heartbeat_seconds: float = 15.0  # idle streams get a comment line this often to keep proxies from closing them
+
     # LiveKit
-    video_provider: str = "livekit"
     livekit_url: HttpUrl
     livekit_api_key: str
     livekit_api_secret: str
 
+    # Room tokens
+    room_token_cache_size: int = 10000
+    room_token_refresh_margin_seconds: int = 300  # cached tokens are reissued this long before expiry
+    room_token_premint_minutes: int = 10  # mint tokens for calls starting this soon
+
 
 settings = Settings()
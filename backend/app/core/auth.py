@@ -1,20 +1,133 @@
+import hashlib
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from uuid import UUID, uuid4
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from app.core.deps import get_db
+from app.config import settings
+from app.core.cache import ExpiringMap, TTLCache
 
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/token")
 
-def get_current_user(token: str = Depends(oauth2_scheme)):
+@dataclass(frozen=True)
+class AuthenticatedUser:
+    """Caller identity taken from the access token claims, no DB round trip."""
+    id: UUID
+    role: str
+    status: Optional[str]
+    facility_id: Optional[UUID]
+    token_id: str
+    issued_at: float
+    expires_at: float
+
+# Decoded claims keyed by sha256(token); entries never outlive the token itself
+_claims_cache = TTLCache(
+    maxsize=settings.token_cache_size,
+    ttl=settings.token_cache_ttl_seconds,
+    timer=time.time
+)
+# Revoked token ids, kept until the token would have expired anyway. Never
+# capacity-evicted: a dropped revocation would make its token valid again.
+_revoked_tokens = ExpiringMap(timer=time.time)
+# user id -> revocation timestamp; tokens issued before it are rejected
+_revoked_users = ExpiringMap(timer=time.time)
+
+def _token_key(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def create_access_token(user, expires_delta: Optional[timedelta] = None) -> str:
+    """Issue a signed access token carrying the claims get_current_user needs.
+
+    ``expires_delta`` may not exceed ``access_token_max_expire_minutes``:
+    user revocations are only kept that long.
+    """
+    lifetime = expires_delta or timedelta(minutes=settings.access_token_expire_minutes)
+    if lifetime > timedelta(minutes=settings.access_token_max_expire_minutes):
+        raise ValueError("Token lifetime exceeds access_token_max_expire_minutes")
+    now = datetime.now(timezone.utc)
+    expire = now + lifetime
+    to_encode = {
+        "sub": str(user.id),
+        "role": user.role,
+        "status": user.status,
+        "facility_id": str(user.facility_id) if user.facility_id else None,
+        "jti": uuid4().hex,
+        "iat": now,
+        "exp": expire,
+        "type": "access"
+    }
+    return jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
+
+def _is_revoked(user: AuthenticatedUser) -> bool:
+    if user.token_id in _revoked_tokens:
+        return True
+    revoked_at = _revoked_users.get(user.id)
+    # Both in whole seconds, as iat is encoded: a token from the second of
+    # the revocation itself is accepted, so logging straight back in works
+    return revoked_at is not None and user.issued_at < revoked_at
+
+def decode_access_token(token: str) -> AuthenticatedUser:
+    """Validate an access token, serving repeat tokens from the claims cache.
+
+    Raises ``JWTError`` for invalid, expired or revoked tokens.
+    """
+    key = _token_key(token)
+    user = _claims_cache.get(key)
+    if user is None:
+        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+        if payload.get("type") != "access" or not payload.get("sub"):
+            raise JWTError("Not an access token")
+        try:
+            user = AuthenticatedUser(
+                id=UUID(payload["sub"]),
+                role=payload.get("role"),
+                status=payload.get("status"),
+                facility_id=UUID(payload["facility_id"]) if payload.get("facility_id") else None,
+                token_id=payload.get("jti", ""),
+                issued_at=float(payload.get("iat", 0)),
+                expires_at=float(payload["exp"])
+            )
+        except (KeyError, ValueError) as exc:
+            raise JWTError("Malformed token claims") from exc
+        _claims_cache.set(key, user, ttl=user.expires_at - time.time())
+    elif user.expires_at <= time.time():
+        _claims_cache.pop(key)
+        raise JWTError("Signature has expired")
+    if _is_revoked(user):
+        _claims_cache.pop(key)
+        raise JWTError("Token has been revoked")
+    return user
+
+def revoke_token(token: str) -> None:
+    """Revoke a single access token, e.g. on logout."""
+    key = _token_key(token)
+    user = _claims_cache.pop(key)
+    if user is None:
+        try:
+            payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+        except JWTError:
+            return
+        jti, expires_at = payload.get("jti"), float(payload.get("exp", 0))
+    else:
+        jti, expires_at = user.token_id, user.expires_at
+    if jti:
+        _revoked_tokens.set(jti, True, ttl=expires_at - time.time())
+
+def revoke_user_tokens(user_id: UUID) -> None:
+    """Revoke every token issued to a user so far (role/status changes, lockouts)."""
+    longest = max(settings.access_token_expire_minutes, settings.access_token_max_expire_minutes)
+    _revoked_users.set(user_id, int(time.time()), ttl=longest * 60)
+
+def get_current_user(token: str = Depends(oauth2_scheme)) -> AuthenticatedUser:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        # For testing, accept any token
-        if token == "test_token":
-            return {"id": "test_user"}
-        raise JWTError
+        return decode_access_token(token)
     except JWTError:
         raise credentials_exception
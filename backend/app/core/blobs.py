@@ -0,0 +1,98 @@
+import os
+import uuid
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import BinaryIO
+from app.config import settings
+
+class BlobWriter(ABC):
+    """One blob being written; nothing is visible under its key until ``commit``."""
+
+    @abstractmethod
+    def write(self, data: bytes) -> None:
+        ...
+
+    @abstractmethod
+    def commit(self) -> None:
+        ...
+
+    @abstractmethod
+    def abort(self) -> None:
+        """Discard everything written so far."""
+
+class BlobStore(ABC):
+    """Storage for uploaded files, addressed by opaque keys the app generates.
+
+    Methods block (disk or network); call them from a worker thread in async code.
+    """
+
+    @abstractmethod
+    def writer(self, key: str) -> BlobWriter:
+        ...
+
+    @abstractmethod
+    def open(self, key: str) -> BinaryIO:
+        ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+class _LocalWriter(BlobWriter):
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.partial = path.with_name(f".{path.name}.{uuid.uuid4().hex}.part")
+        # Owner-only: uploads are identity documents
+        self._file = os.fdopen(os.open(self.partial, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), "wb")
+
+    def write(self, data: bytes) -> None:
+        self._file.write(data)
+
+    def commit(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        os.replace(self.partial, self.path)
+
+    def abort(self) -> None:
+        self._file.close()
+        self.partial.unlink(missing_ok=True)
+
+class LocalBlobStore(BlobStore):
+    """Blobs as files under ``root``; written to a temporary name, then renamed into place."""
+
+    def __init__(self, root: str):
+        self.root = Path(root).resolve()
+
+    def _path(self, key: str) -> Path:
+        path = (self.root / key).resolve()
+        if self.root not in path.parents:
+            raise ValueError(f"Invalid blob key: {key!r}")
+        return path
+
+    def writer(self, key: str) -> BlobWriter:
+        return _LocalWriter(self._path(key))
+
+    def open(self, key: str) -> BinaryIO:
+        return open(self._path(key), "rb")
+
+    def delete(self, key: str) -> None:
+        self._path(key).unlink(missing_ok=True)
+
+BLOB_STORES = {
+    "local": lambda: LocalBlobStore(settings.blob_store_path),
+}
+
+_blob_store = None
+
+def get_blob_store() -> BlobStore:
+    global _blob_store
+    if _blob_store is None:
+        _blob_store = BLOB_STORES[settings.blob_store]()
+    return _blob_store
+
+def set_blob_store(store) -> None:
+    """Swap the blob store, e.g. for a LocalBlobStore in a temporary directory in tests."""
+    global _blob_store
+    _blob_store = store
@@ -0,0 +1,301 @@
+import heapq
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+from app.config import settings
+
+_MISSING = object()
+
+class TTLCache:
+    """Thread-safe LRU mapping whose entries also expire after a TTL.
+
+    Each entry carries its own deadline so callers can cap it to the lifetime
+    of the cached value (e.g. a token's ``exp``). Expired entries are dropped
+    lazily on access; the least recently used entry is evicted once
+    ``maxsize`` is reached.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0, timer: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._timer = timer
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                return default
+            value, expires_at = entry
+            if expires_at <= self._timer():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, self._timer() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.pop(key, _MISSING)
+        return default if entry is _MISSING else entry[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+class ExpiringMap:
+    """Thread-safe mapping whose entries leave only by expiring; there is no capacity eviction.
+
+    For state that must hold until its deadline, such as revocations. Expired
+    entries are pruned on each write in deadline order, so the size is bounded
+    by what is still live.
+    """
+
+    def __init__(self, timer: Callable[[], float] = time.monotonic):
+        self._timer = timer
+        self._data: dict = {}
+        self._deadlines: list = []  # heap of (expires_at, key)
+        self._lock = threading.Lock()
+
+    def _prune(self, now: float) -> None:
+        while self._deadlines and self._deadlines[0][0] <= now:
+            expires_at, key = heapq.heappop(self._deadlines)
+            entry = self._data.get(key)
+            # Skip heap entries superseded by a later set of the same key
+            if entry is not None and entry[1] == expires_at:
+                del self._data[key]
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[1] <= self._timer():
+                return default
+            return entry[0]
+
+    def set(self, key: Hashable, value: Any, ttl: float) -> None:
+        with self._lock:
+            now = self._timer()
+            self._prune(now)
+            if ttl <= 0:
+                return
+            expires_at = now + ttl
+            previous = self._data.get(key)
+            if previous is not None and previous[1] > expires_at:
+                # Never shorten an existing deadline
+                expires_at = previous[1]
+            self._data[key] = (value, expires_at)
+            heapq.heappush(self._deadlines, (expires_at, key))
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._prune(self._timer())
+            return len(self._data)
+
+class InMemoryBackend:
+    """Process-local implementation of the shared cache backend interface.
+
+    Mirrors the subset of the Redis API used by the app (bytes values, TTL in
+    seconds, atomic ``incr``) so it can stand in for Redis in tests.
+    """
+
+    def __init__(self, timer: Callable[[], float] = time.monotonic):
+        self._timer = timer
+        self._data: dict = {}
+        self._lock = threading.Lock()
+
+    def _live(self, key: str):
+        entry = self._data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= self._timer():
+            del self._data[key]
+            return None
+        return entry
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._live(key)
+        return None if entry is None else entry[0]
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        with self._lock:
+            self._data[key] = (value, None if ttl is None else self._timer() + ttl)
+
+    def add(self, key: str, value: bytes, ttl: Optional[float] = None) -> bool:
+        """Set ``key`` only if it is absent; True if it was set."""
+        with self._lock:
+            if self._live(key) is not None:
+                return False
+            self._data[key] = (value, None if ttl is None else self._timer() + ttl)
+        return True
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def compare_and_set(self, key: str, expected: bytes, value: bytes, ttl: Optional[float] = None) -> bool:
+        """Set ``key`` only if it currently holds ``expected``; True if it was set."""
+        with self._lock:
+            entry = self._live(key)
+            if entry is None or entry[0] != expected:
+                return False
+            self._data[key] = (value, None if ttl is None else self._timer() + ttl)
+        return True
+
+    def compare_and_delete(self, key: str, expected: bytes) -> bool:
+        """Delete ``key`` only if it currently holds ``expected``; True if it was deleted."""
+        with self._lock:
+            entry = self._live(key)
+            if entry is None or entry[0] != expected:
+                return False
+            del self._data[key]
+        return True
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            entry = self._live(key)
+            value = int(entry[0]) + 1 if entry else 1
+            self._data[key] = (str(value).encode(), entry[1] if entry else None)
+        return value
+
+    def take_tokens(self, key: str, rate: float, capacity: float, cost: float = 1.0) -> Tuple[bool, float]:
+        """Token bucket: take ``cost`` tokens if available; returns ``(allowed, tokens left)``.
+
+        A negative ``cost`` puts tokens back, up to ``capacity``.
+        """
+        with self._lock:
+            now = self._timer()
+            entry = self._live(key)
+            if entry is None:
+                tokens = capacity
+            else:
+                tokens, updated = entry[0]
+                tokens = min(capacity, tokens + (now - updated) * rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens = min(capacity, tokens - cost)
+            # Buckets are held as (tokens, updated) rather than bytes: this runs on
+            # every rate-limited request. They lapse once they would be full again.
+            self._data[key] = ((tokens, now), now + (capacity - tokens) / rate + 1)
+        return allowed, tokens
+
+# Token bucket update done server-side so concurrent workers can't both spend
+# the last token. Uses the server clock; tokens come back as a string since
+# Lua numbers are truncated to integers in replies.
+TAKE_TOKENS_SCRIPT = """
+local rate, capacity, cost = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1])
+if tokens == nil then
+    tokens = capacity
+else
+    tokens = math.min(capacity, tokens + (now - tonumber(state[2])) * rate)
+end
+local allowed = 0
+if tokens >= cost then
+    tokens = math.min(capacity, tokens - cost)
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate * 1000) + 1000)
+return {allowed, tostring(tokens)}
+"""
+
+# Check-and-write in one step, so no other client can write in between
+COMPARE_AND_SET_SCRIPT = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+if tonumber(ARGV[3]) > 0 then
+    redis.call('SET', KEYS[1], ARGV[2], 'PX', ARGV[3])
+else
+    redis.call('SET', KEYS[1], ARGV[2])
+end
+return 1
+"""
+
+COMPARE_AND_DELETE_SCRIPT = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+redis.call('DEL', KEYS[1])
+return 1
+"""
+
+class RedisBackend:
+    """Shared cache backend over any redis-py compatible client."""
+
+    def __init__(self, client, prefix: str = "openconnect:"):
+        self.client = client
+        self.prefix = prefix
+        self._take_tokens = None
+        self._compare_and_set = None
+        self._compare_and_delete = None
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(self.prefix + key)
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        self.client.set(self.prefix + key, value, px=None if ttl is None else int(ttl * 1000))
+
+    def add(self, key: str, value: bytes, ttl: Optional[float] = None) -> bool:
+        return bool(self.client.set(self.prefix + key, value, nx=True, px=None if ttl is None else int(ttl * 1000)))
+
+    def delete(self, key: str) -> None:
+        self.client.delete(self.prefix + key)
+
+    def compare_and_set(self, key: str, expected: bytes, value: bytes, ttl: Optional[float] = None) -> bool:
+        if self._compare_and_set is None:
+            self._compare_and_set = self.client.register_script(COMPARE_AND_SET_SCRIPT)
+        px = 0 if ttl is None else max(1, int(ttl * 1000))
+        return bool(self._compare_and_set(keys=[self.prefix + key], args=[expected, value, px]))
+
+    def compare_and_delete(self, key: str, expected: bytes) -> bool:
+        if self._compare_and_delete is None:
+            self._compare_and_delete = self.client.register_script(COMPARE_AND_DELETE_SCRIPT)
+        return bool(self._compare_and_delete(keys=[self.prefix + key], args=[expected]))
+
+    def incr(self, key: str) -> int:
+        return self.client.incr(self.prefix + key)
+
+    def take_tokens(self, key: str, rate: float, capacity: float, cost: float = 1.0) -> Tuple[bool, float]:
+        if self._take_tokens is None:
+            self._take_tokens = self.client.register_script(TAKE_TOKENS_SCRIPT)
+        allowed, tokens = self._take_tokens(keys=[self.prefix + key], args=[rate, capacity, cost])
+        return bool(allowed), float(tokens)
+
+_shared_backend = None
+
+def get_shared_backend():
+    """Return the configured cross-worker backend, or None for process-local caching."""
+    global _shared_backend
+    if _shared_backend is None and settings.redis_url:
+        import redis  # optional dependency, only needed when redis_url is set
+
+        _shared_backend = RedisBackend(redis.Redis.from_url(settings.redis_url))
+    return _shared_backend
+
+def set_shared_backend(backend) -> None:
+    """Swap the shared backend, e.g. for an InMemoryBackend in tests."""
+    global _shared_backend
+    _shared_backend = backend
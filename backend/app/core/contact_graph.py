@@ -0,0 +1,123 @@
+import threading
+from typing import Dict, FrozenSet, Iterable, Set, Tuple
+from uuid import UUID
+from sqlalchemy import Select, select, union_all
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.core.cache import TTLCache, get_shared_backend
+from app.core.metrics import Counter
+from app.models.contacts import Contact
+
+contact_graph_lookups = Counter("contact_graph_lookups_total", "Approved-contact set lookups", ["result"])
+
+def approved_contacts_query(user_ids: Iterable[UUID]) -> Select:
+    """(user_id, contact) pairs for every approved contact of ``user_ids``.
+
+    Contacts are symmetric once approved, so both directions are read, each
+    on its own (…_id, status) index.
+    """
+    user_ids = list(user_ids)
+    outgoing = select(Contact.requestor_id.label("user_id"), Contact.contact_id.label("other_id")).where(
+        Contact.requestor_id.in_(user_ids), Contact.status == "approved"
+    )
+    incoming = select(Contact.contact_id.label("user_id"), Contact.requestor_id.label("other_id")).where(
+        Contact.contact_id.in_(user_ids), Contact.status == "approved"
+    )
+    return union_all(outgoing, incoming)
+
+def group_contacts(user_ids: Iterable[UUID], rows) -> Dict[UUID, FrozenSet[UUID]]:
+    grouped: Dict[UUID, Set[UUID]] = {user_id: set() for user_id in user_ids}
+    for user_id, other_id in rows:
+        grouped[user_id].add(other_id)
+    return {user_id: frozenset(others) for user_id, others in grouped.items()}
+
+class ContactGraph:
+    """Per-user sets of approved contacts, cached for call authorization.
+
+    Versioned like FacilitySettingsCache: ``invalidate`` bumps a user's
+    version (in the shared backend when configured, so every worker sees it)
+    and sets loaded before an invalidation are never stored. Lookups take
+    many users at once so a call with N participants costs at most one query.
+    """
+
+    def __init__(self, ttl: float, maxsize: int = 10000):
+        self.ttl = ttl
+        self._local = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._versions: Dict[UUID, int] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _version_key(user_id: UUID) -> str:
+        return f"contacts:{user_id}:version"
+
+    @staticmethod
+    def _set_key(user_id: UUID, version: int) -> str:
+        return f"contacts:{user_id}:{version}"
+
+    def version(self, user_id: UUID) -> int:
+        shared = get_shared_backend()
+        if shared is not None:
+            raw = shared.get(self._version_key(user_id))
+            return int(raw) if raw else 0
+        return self._versions.get(user_id, 0)
+
+    def lookup(self, user_ids: Iterable[UUID]) -> Tuple[Dict[UUID, FrozenSet[UUID]], Dict[UUID, int]]:
+        """Return ``(cached sets, versions of the users that missed)``."""
+        shared = get_shared_backend()
+        found: Dict[UUID, FrozenSet[UUID]] = {}
+        missed: Dict[UUID, int] = {}
+        for user_id in set(user_ids):
+            version = self.version(user_id)
+            entry = self._local.get(user_id)
+            if entry is not None and entry[0] == version:
+                found[user_id] = entry[1]
+                continue
+            raw = shared.get(self._set_key(user_id, version)) if shared is not None else None
+            if raw is not None:
+                contacts = frozenset(UUID(hex) for hex in raw.decode().split(",") if hex)
+                self._local.set(user_id, (version, contacts))
+                found[user_id] = contacts
+            else:
+                missed[user_id] = version
+        contact_graph_lookups.inc(len(found), result="hit")
+        contact_graph_lookups.inc(len(missed), result="miss")
+        return found, missed
+
+    def store(self, versions: Dict[UUID, int], contacts: Dict[UUID, FrozenSet[UUID]]) -> None:
+        """Cache sets loaded at ``versions``, skipping users invalidated since."""
+        shared = get_shared_backend()
+        for user_id, version in versions.items():
+            if self.version(user_id) != version:
+                continue
+            self._local.set(user_id, (version, contacts[user_id]))
+            if shared is not None:
+                raw = ",".join(sorted(other.hex for other in contacts[user_id])).encode()
+                shared.set(self._set_key(user_id, version), raw, ttl=self.ttl)
+
+    def approved_contacts(self, db: Session, user_ids: Iterable[UUID]) -> Dict[UUID, FrozenSet[UUID]]:
+        """Approved-contact sets for ``user_ids``, loading every miss with one query."""
+        found, missed = self.lookup(user_ids)
+        if missed:
+            loaded = group_contacts(missed, db.execute(approved_contacts_query(missed)))
+            self.store(missed, loaded)
+            found.update(loaded)
+        return found
+
+    def invalidate(self, *user_ids: UUID) -> None:
+        shared = get_shared_backend()
+        for user_id in set(user_ids):
+            self._local.pop(user_id)
+            if shared is not None:
+                shared.incr(self._version_key(user_id))
+                continue
+            with self._lock:
+                self._versions[user_id] = self._versions.get(user_id, 0) + 1
+
+    def clear(self) -> None:
+        self._local.clear()
+
+def unapproved_participants(contacts: FrozenSet[UUID], user_id: UUID, participant_ids: Iterable[UUID]) -> Set[UUID]:
+    """Participants (other than ``user_id`` itself) outside its approved contacts."""
+    return {other for other in participant_ids if other != user_id and other not in contacts}
+
+contact_graph = ContactGraph(ttl=settings.contact_graph_cache_ttl_seconds, maxsize=settings.contact_graph_cache_size)
@@ -1,6 +1,11 @@
-from typing import Generator
+from typing import TYPE_CHECKING, AsyncGenerator, Generator
+from fastapi import Depends, HTTPException
 from sqlalchemy.orm import Session
-from app.database import SessionLocal
+from app.database import AsyncSessionLocal, SessionLocal
+from app.core.auth import AuthenticatedUser, get_current_user
+
+if TYPE_CHECKING:  # sqlalchemy.ext.asyncio needs greenlet, only required in async mode
+    from sqlalchemy.ext.asyncio import AsyncSession
 
 def get_db() -> Generator[Session, None, None]:
     db = SessionLocal()
@@ -8,3 +13,16 @@ def get_db() -> Generator[Session, None, None]:
         yield db
     finally:
         db.close()
+
+async def get_async_db() -> AsyncGenerator["AsyncSession", None]:
+    if AsyncSessionLocal is None:
+        raise RuntimeError("Async database access requires settings.database_async")
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def get_current_active_user(
+    current_user: AuthenticatedUser = Depends(get_current_user)
+) -> AuthenticatedUser:
+    if current_user.status == "rejected":
+        raise HTTPException(status_code=400, detail="Inactive user")
+    return current_user
@@ -1,7 +1,10 @@
 from typing import Optional
 from datetime import datetime, timedelta, timezone
+from urllib.parse import urlencode
 from jose import jwt
+from sqlalchemy.orm import Session
 from app.config import settings
+from app.core.outbox import queue_email
 
 def generate_verification_token(email: str, expires_delta: Optional[timedelta] = None) -> str:
     """Generate email verification token."""
@@ -27,3 +30,18 @@ def verify_token(email: str, token: str) -> bool:
         )
     except jwt.JWTError:
         return False
+
+def queue_verification_email(db: Session, email: str, registration_id: str) -> None:
+    """Queue the verification link for ``email`` in the outbox; the caller commits.
+
+    A link still waiting to be sent is replaced by this one, so the mail
+    points at the latest registration rather than an earlier draft.
+    """
+    token = generate_verification_token(email)
+    link = f"{settings.email_verification_url}?{urlencode({'registration_id': registration_id, 'email': email, 'token': token})}"
+    body = (
+        "Confirm your email address to continue your registration:\n\n"
+        f"{link}\n\n"
+        "The link expires in 24 hours. If you did not start a registration, ignore this email.\n"
+    )
+    queue_email(db, email, "email_verification", "Verify your email address", body)
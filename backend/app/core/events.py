@@ -0,0 +1,267 @@
+import asyncio
+import itertools
+import json
+import logging
+import queue
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Iterable, Optional, Set
+from uuid import UUID
+from app.config import settings
+from app.core.metrics import Counter, Gauge
+from app.core.serialization import json_default
+
+logger = logging.getLogger(__name__)
+
+events_published = Counter("events_published_total", "Events published to user streams", ["type"])
+event_subscribers = Gauge("event_stream_subscribers", "Open event streams in this process")
+event_overflows = Counter("event_stream_overflows_total", "Streams told to resync because they fell behind")
+backplane_dropped = Counter("event_backplane_dropped_total", "Events not forwarded to other workers because the send queue was full")
+
+_ids = itertools.count(1)
+
+class Event:
+    __slots__ = ("id", "type", "data")
+
+    def __init__(self, type: str, data: Dict[str, Any], id: Optional[int] = None):
+        self.id = id if id is not None else next(_ids)
+        self.type = type
+        self.data = data
+
+    def sse(self) -> str:
+        return f"id: {self.id}\nevent: {self.type}\ndata: {json.dumps(self.data, default=json_default)}\n\n"
+
+# Queued in place of further events once a subscriber falls behind
+RESYNC = Event("resync", {}, id=0)
+
+class Subscription:
+    """One open stream: a bounded queue owned by the stream's event loop.
+
+    When the client cannot keep up and the queue fills, pending events are
+    discarded for a single ``resync`` event: the client reloads state over
+    REST and reconnects, rather than the bus buffering without bound.
+    """
+
+    def __init__(self, user_id: UUID, loop: asyncio.AbstractEventLoop, maxsize: int):
+        self.user_id = user_id
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.overflowed = False
+
+    def offer(self, event: Event) -> None:
+        # Runs on self.loop
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            event_overflows.inc()
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+
+class EventBus:
+    """Per-user fan-out of events to open streams.
+
+    ``publish`` is thread-safe (sync routes run in worker threads): events are
+    handed to each subscriber's loop with ``call_soon_threadsafe``. With a
+    backplane configured events are also forwarded to the other workers,
+    tagged with this bus's origin so they are not delivered twice here.
+    """
+
+    def __init__(self, queue_size: int = settings.events_queue_size):
+        self.queue_size = queue_size
+        self.origin = uuid.uuid4().hex
+        self.backplane = None
+        self._subscriptions: Dict[UUID, Set[Subscription]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id: UUID) -> Subscription:
+        """Open a subscription; call from the event loop that will consume it."""
+        subscription = Subscription(user_id, asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._subscriptions.setdefault(user_id, set()).add(subscription)
+        event_subscribers.inc()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id)
+            if not subscriptions or subscription not in subscriptions:
+                return
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscriptions[subscription.user_id]
+        event_subscribers.dec()
+
+    def deliver(self, user_ids: Iterable[UUID], event: Event) -> None:
+        """Hand an event to this process's subscribers only."""
+        with self._lock:
+            targets = [s for user_id in set(user_ids) for s in self._subscriptions.get(user_id, ())]
+        for subscription in targets:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, event)
+            except RuntimeError:
+                # Loop already closed; the stream is gone
+                self.unsubscribe(subscription)
+
+    def publish(self, user_ids: Iterable[UUID], type: str, data: Dict[str, Any]) -> None:
+        user_ids = [UUID(str(user_id)) for user_id in user_ids]
+        event = Event(type, data)
+        events_published.inc(type=type)
+        self.deliver(user_ids, event)
+        if self.backplane is not None:
+            self.backplane.send(self.encode(user_ids, event))
+
+    def encode(self, user_ids: Iterable[UUID], event: Event) -> bytes:
+        return json.dumps({
+            "origin": self.origin,
+            "users": [str(user_id) for user_id in user_ids],
+            "type": event.type,
+            "data": event.data,
+        }, default=json_default).encode()
+
+    def receive(self, message: bytes) -> None:
+        """Deliver an event forwarded by another worker."""
+        try:
+            payload = json.loads(message)
+            if payload["origin"] == self.origin:
+                return
+            self.deliver([UUID(user_id) for user_id in payload["users"]], Event(payload["type"], payload["data"]))
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Ignoring malformed backplane message")
+
+class _Backplane(ABC):
+    """Forwards events between workers. Sending and listening each run on a
+    daemon thread so publishers never block on the network."""
+
+    def __init__(self, bus: EventBus, channel: str):
+        self.bus = bus
+        self.channel = channel
+        self._outbox: "queue.Queue[Optional[bytes]]" = queue.Queue(maxsize=settings.events_queue_size * 10)
+        self._stopping = threading.Event()
+        self._threads = []
+
+    def send(self, message: bytes) -> None:
+        try:
+            self._outbox.put_nowait(message)
+        except queue.Full:
+            backplane_dropped.inc()
+
+    def start(self) -> None:
+        for target in (self._send_loop, self._listen_loop):
+            thread = threading.Thread(target=self._guard(target), daemon=True, name=f"events-{target.__name__}")
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self) -> None:
+        self._stopping.set()
+        self._outbox.put(None)
+
+    def _guard(self, target: Callable[[], None]) -> Callable[[], None]:
+        def run():
+            while not self._stopping.is_set():
+                try:
+                    target()
+                except Exception:
+                    logger.exception("Event backplane %s failed; retrying", target.__name__)
+                    self._stopping.wait(1.0)
+        return run
+
+    def _send_loop(self) -> None:
+        while True:
+            message = self._outbox.get()
+            if message is None:
+                return
+            self._send(message)
+
+    @abstractmethod
+    def _send(self, message: bytes) -> None:
+        """Publish one message to the other workers."""
+
+    @abstractmethod
+    def _listen_loop(self) -> None:
+        """Deliver messages from other workers until stopped; restarted if it raises."""
+
+class RedisBackplane(_Backplane):
+    """Redis (or compatible) PUBLISH/SUBSCRIBE."""
+
+    def __init__(self, bus: EventBus, client, channel: str = "openconnect:events"):
+        super().__init__(bus, channel)
+        self.client = client
+
+    def _send(self, message: bytes) -> None:
+        self.client.publish(self.channel, message)
+
+    def _listen_loop(self) -> None:
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self.channel)
+        try:
+            while not self._stopping.is_set():
+                message = pubsub.get_message(timeout=1.0)
+                if message and message["type"] == "message":
+                    self.bus.receive(message["data"])
+        finally:
+            pubsub.close()
+
+class PostgresBackplane(_Backplane):
+    """Postgres LISTEN/NOTIFY over psycopg2 connections from ``engine``.
+
+    NOTIFY payloads are limited to 8000 bytes, which event payloads (ids and
+    a few fields) stay well under.
+    """
+
+    def __init__(self, bus: EventBus, engine, channel: str = "openconnect_events"):
+        super().__init__(bus, channel)
+        self.engine = engine
+
+    def _send(self, message: bytes) -> None:
+        from sqlalchemy import text
+
+        with self.engine.connect() as conn:
+            conn.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": self.channel, "payload": message.decode()})
+            conn.commit()
+
+    def _listen_loop(self) -> None:
+        import select
+
+        conn = self.engine.raw_connection()
+        try:
+            dbapi_conn = conn.driver_connection
+            dbapi_conn.autocommit = True
+            with dbapi_conn.cursor() as cursor:
+                cursor.execute(f'LISTEN "{self.channel}"')
+            while not self._stopping.is_set():
+                if select.select([dbapi_conn], [], [], 1.0)[0]:
+                    dbapi_conn.poll()
+                    while dbapi_conn.notifies:
+                        self.bus.receive(dbapi_conn.notifies.pop(0).payload.encode())
+        finally:
+            conn.close()
+
+def start_backplane(bus: EventBus) -> Optional[_Backplane]:
+    """Connect ``bus`` to the backplane named by ``settings.event_backplane``."""
+    if settings.event_backplane == "redis":
+        import redis  # optional dependency, only needed for the redis backplane
+
+        backplane = RedisBackplane(bus, redis.Redis.from_url(settings.redis_url))
+    elif settings.event_backplane == "postgres":
+        from app.database import engine
+
+        backplane = PostgresBackplane(bus, engine)
+    elif settings.event_backplane:
+        raise ValueError(f"Unknown event backplane: {settings.event_backplane}")
+    else:
+        return None
+    backplane.start()
+    bus.backplane = backplane
+    return backplane
+
+def stop_backplane(bus: EventBus) -> None:
+    if bus.backplane is not None:
+        bus.backplane.stop()
+        bus.backplane = None
+
+event_bus = EventBus()
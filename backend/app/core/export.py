@@ -0,0 +1,93 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import Any, Callable, Iterable, Iterator, Literal, Sequence, Tuple
+from uuid import UUID
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+ExportFormat = Literal["ndjson", "csv"]
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+# (header, value of a row) pairs describing one exported record
+Columns = Sequence[Tuple[str, Callable[[Any], Any]]]
+
+def stream_rows(bind: Engine, stmt: Select, batch_size: int) -> Iterator[Sequence[Any]]:
+    """Run ``stmt`` on a server-side cursor and yield ``batch_size`` rows at a time.
+
+    Opens its own session: the request's one is closed before a streaming
+    body is sent. Only one batch is held in memory at once.
+    """
+    with Session(bind=bind) as session:
+        result = session.execute(stmt.execution_options(yield_per=batch_size))
+        yield from result.partitions()
+
+def _json_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+def _csv_value(value: Any) -> Any:
+    if isinstance(value, (list, tuple)):
+        return ";".join(str(item) for item in value)
+    return "" if value is None else _json_value(value)
+
+def ndjson_chunks(batches: Iterable[Sequence[Any]], columns: Columns) -> Iterator[bytes]:
+    for batch in batches:
+        records = ({name: _json_value(value(row)) for name, value in columns} for row in batch)
+        if orjson is not None:
+            yield b"".join(orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE) for record in records)
+        else:  # pragma: no cover
+            yield "".join(json.dumps(record, separators=(",", ":")) + "\n" for record in records).encode()
+
+def csv_chunks(batches: Iterable[Sequence[Any]], columns: Columns) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def drain() -> bytes:
+        chunk = buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+        return chunk
+
+    # Header first, so the client has bytes before the query returns
+    writer.writerow([name for name, _ in columns])
+    yield drain()
+    for batch in batches:
+        writer.writerows([_csv_value(value(row)) for _, value in columns] for row in batch)
+        yield drain()
+
+def gzip_chunks(chunks: Iterable[bytes], level: int) -> Iterator[bytes]:
+    """Gzip a stream, flushing after every chunk so compression doesn't hold rows back."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+def export_response(
+    batches: Iterable[Sequence[Any]],
+    columns: Columns,
+    format: ExportFormat,
+    filename: str,
+    gzip: bool = False,
+    gzip_level: int = 6
+) -> StreamingResponse:
+    """Stream ``batches`` of rows as NDJSON or CSV, optionally gzip-encoded."""
+    chunks = ndjson_chunks(batches, columns) if format == "ndjson" else csv_chunks(batches, columns)
+    headers = {"Content-Disposition": f'attachment; filename="{filename}.{format}"'}
+    if gzip:
+        chunks = gzip_chunks(chunks, gzip_level)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(chunks, media_type=MEDIA_TYPES[format], headers=headers)
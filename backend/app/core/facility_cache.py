@@ -0,0 +1,84 @@
+import threading
+from typing import Optional, Tuple
+from uuid import UUID
+from app.config import settings
+from app.core.cache import TTLCache, get_shared_backend
+from app.core.serialization import ModelSerializer
+from app.schemas.facilities import FacilityRead
+
+class FacilitySettingsCache:
+    """Read-through cache of serialized ``FacilityRead`` payloads.
+
+    Each facility has a version number that ``invalidate`` bumps. Readers
+    capture the version before loading from the DB and ``store`` drops the
+    payload if the version moved in the meantime, so a slow reader can't put
+    pre-update settings back. With a shared backend configured the version
+    lives there, keeping every worker's local copy coherent; payloads are also
+    shared so only one worker has to hit the DB after an update.
+    """
+
+    def __init__(self, ttl: float, maxsize: int = 1024):
+        self.ttl = ttl
+        self._local = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._versions: dict = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _version_key(facility_id: UUID) -> str:
+        return f"facility_settings:{facility_id}:version"
+
+    @staticmethod
+    def _payload_key(facility_id: UUID, version: int) -> str:
+        return f"facility_settings:{facility_id}:{version}"
+
+    def version(self, facility_id: UUID) -> int:
+        shared = get_shared_backend()
+        if shared is not None:
+            raw = shared.get(self._version_key(facility_id))
+            return int(raw) if raw else 0
+        return self._versions.get(facility_id, 0)
+
+    def lookup(self, facility_id: UUID) -> Tuple[int, Optional[bytes]]:
+        """Return ``(version, payload)``; payload is None on a miss."""
+        version = self.version(facility_id)
+        entry = self._local.get(facility_id)
+        if entry is not None and entry[0] == version:
+            return version, entry[1]
+        shared = get_shared_backend()
+        if shared is not None:
+            payload = shared.get(self._payload_key(facility_id, version))
+            if payload is not None:
+                self._local.set(facility_id, (version, payload))
+                return version, payload
+        return version, None
+
+    def store(self, facility_id: UUID, version: int, payload: bytes) -> None:
+        """Cache a payload loaded at ``version``, unless it has been invalidated since."""
+        if self.version(facility_id) != version:
+            return
+        self._local.set(facility_id, (version, payload))
+        shared = get_shared_backend()
+        if shared is not None:
+            shared.set(self._payload_key(facility_id, version), payload, ttl=self.ttl)
+
+    def invalidate(self, facility_id: UUID) -> int:
+        """Drop cached settings for a facility and return its new version."""
+        self._local.pop(facility_id)
+        shared = get_shared_backend()
+        if shared is not None:
+            return shared.incr(self._version_key(facility_id))
+        with self._lock:
+            version = self._versions.get(facility_id, 0) + 1
+            self._versions[facility_id] = version
+        return version
+
+    def clear(self) -> None:
+        self._local.clear()
+
+facility_cache = FacilitySettingsCache(ttl=settings.facility_cache_ttl_seconds)
+
+facility_json = ModelSerializer(FacilityRead)
+
+def serialize_facility(facility) -> bytes:
+    """Validate a Facility row once and render the FacilityRead JSON body."""
+    return facility_json.render(facility)
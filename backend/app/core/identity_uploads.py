@@ -0,0 +1,84 @@
+from datetime import datetime, timezone
+from typing import Optional, Sequence
+from uuid import UUID
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.core.blobs import BlobStore, get_blob_store
+from app.core.metrics import Counter
+from app.models.identity_uploads import IdentityUpload
+from app.schemas.registration import IdentityDetails
+
+identity_uploads_deleted = Counter("identity_uploads_deleted_total", "Unclaimed identity documents removed from the blob store", ["reason"])
+
+def _row(registration_id: str, identity: IdentityDetails, expires_at: datetime, user_id: Optional[UUID] = None) -> IdentityUpload:
+    document = identity.document
+    return IdentityUpload(
+        registration_id=registration_id,
+        user_id=user_id,
+        blob_key=document.key,
+        sha256=document.sha256,
+        size=document.size,
+        content_type=document.content_type,
+        id_type=identity.id_type,
+        id_number=identity.id_number,
+        id_expiry=identity.id_expiry,
+        expires_at=expires_at
+    )
+
+def record_upload(db: Session, registration_id: str, identity: IdentityDetails, expires_at: datetime) -> None:
+    """Track a stored document before the draft refers to it, so it is swept if never claimed."""
+    db.add(_row(registration_id, identity, expires_at))
+    db.commit()
+
+def claim_upload(db: Session, registration_id: str, identity: IdentityDetails, expires_at: datetime, user_id: UUID) -> None:
+    """Attach the draft's document to the new user, in the caller's transaction."""
+    claimed = db.execute(
+        update(IdentityUpload)
+        .where(IdentityUpload.blob_key == identity.document.key, IdentityUpload.user_id.is_(None))
+        .values(user_id=user_id)
+    ).rowcount
+    if not claimed:
+        # Not recorded at upload, e.g. a draft started before uploads were tracked
+        db.add(_row(registration_id, identity, expires_at, user_id))
+
+def _delete(db: Session, store: BlobStore, rows: Sequence, reason: str) -> int:
+    # Blob first: a row left behind by a crash is retried, a blob would be lost track of
+    for row in rows:
+        store.delete(row.blob_key)
+    if rows:
+        db.execute(delete(IdentityUpload).where(IdentityUpload.id.in_([row.id for row in rows])))
+        db.commit()
+        identity_uploads_deleted.inc(len(rows), reason=reason)
+    return len(rows)
+
+def discard_uploads(db: Session, registration_id: str, keys: Optional[Sequence[str]] = None, store: Optional[BlobStore] = None) -> int:
+    """Delete a draft's unclaimed documents (only ``keys``, when given), e.g. ones a new upload replaced."""
+    stmt = select(IdentityUpload.id, IdentityUpload.blob_key).where(
+        IdentityUpload.registration_id == registration_id,
+        IdentityUpload.user_id.is_(None)
+    )
+    if keys is not None:
+        stmt = stmt.where(IdentityUpload.blob_key.in_(keys))
+    return _delete(db, store or get_blob_store(), db.execute(stmt).all(), "replaced")
+
+def sweep_identity_uploads(
+    db: Session,
+    now: Optional[datetime] = None,
+    batch_size: int = settings.scheduler_batch_size,
+    store: Optional[BlobStore] = None
+) -> int:
+    """Delete the documents of drafts that expired without completing; returns how many."""
+    now = now or datetime.now(timezone.utc)
+    store = store or get_blob_store()
+    swept = 0
+    while True:
+        rows = db.execute(
+            select(IdentityUpload.id, IdentityUpload.blob_key)
+            .where(IdentityUpload.user_id.is_(None), IdentityUpload.expires_at <= now)
+            .order_by(IdentityUpload.expires_at)
+            .limit(batch_size)
+        ).all()
+        swept += _delete(db, store, rows, "expired")
+        if len(rows) < batch_size:
+            return swept
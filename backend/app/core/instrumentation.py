@@ -0,0 +1,119 @@
+import time
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.core.metrics import REGISTRY, Counter, Gauge, Histogram
+from app.core.profiler import current_profile
+
+http_requests_in_flight = Gauge("http_requests_in_flight", "Requests currently being handled")
+http_request_duration = Histogram(
+    "http_request_duration_seconds",
+    "Request latency by route template",
+    ["method", "route", "status"]
+)
+db_queries = Counter("db_queries_total", "SQL statements executed", ["engine"])
+db_query_duration = Histogram(
+    "db_query_duration_seconds",
+    "Time spent executing SQL statements",
+    ["engine"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0, 5.0)
+)
+db_queries_per_request = Histogram(
+    "db_queries_per_request",
+    "SQL statements executed while handling one request",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100)
+)
+db_time_per_request = Histogram(
+    "db_time_per_request_seconds",
+    "Time spent in SQL while handling one request",
+    ["route"]
+)
+db_pool_size = Gauge("db_pool_size", "Configured pool size", ["pool"])
+db_pool_overflow = Gauge("db_pool_overflow", "Connections open beyond the pool size", ["pool"])
+
+class QueryStats:
+    __slots__ = ("count", "seconds")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+# Set for the duration of a request; sync handlers run in worker threads with
+# a copy of the request's context, so they add to the same object
+current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("current_query_stats", default=None)
+
+def instrument_engine(engine: Engine, label: str) -> None:
+    """Count and time every statement on ``engine`` (pass ``async_engine.sync_engine``)."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def stop_timer(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        elapsed = time.perf_counter() - started
+        db_queries.inc(engine=label)
+        db_query_duration.observe(elapsed, engine=label)
+        stats = current_query_stats.get()
+        if stats is not None:
+            stats.count += 1
+            stats.seconds += elapsed
+        profile = current_profile.get()
+        if profile is not None:
+            profile.record(statement, started, elapsed)
+
+    @event.listens_for(engine, "handle_error")
+    def discard_timer(context):
+        started = context.connection.info.get("query_started") if context.connection is not None else None
+        if started:
+            started.pop()
+
+    def collect_pool() -> None:
+        pool = engine.pool
+        if hasattr(pool, "size") and hasattr(pool, "overflow"):
+            db_pool_size.set(pool.size(), pool=label)
+            db_pool_overflow.set(max(pool.overflow(), 0), pool=label)
+
+    REGISTRY.add_collector(collect_pool)
+
+def _route_label(scope) -> str:
+    route = scope.get("route")
+    # Templates, not raw paths, keep label cardinality bounded
+    return getattr(route, "path", None) or "unmatched"
+
+class MetricsMiddleware:
+    """Per-route latency, in-flight requests and SQL per request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        stats = QueryStats()
+        token = current_query_stats.set(stats)
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            http_requests_in_flight.dec()
+            current_query_stats.reset(token)
+            route = _route_label(scope)
+            http_request_duration.observe(elapsed, method=scope["method"], route=route, status=status)
+            db_queries_per_request.observe(stats.count, route=route)
+            db_time_per_request.observe(stats.seconds, route=route)
@@ -0,0 +1,82 @@
+import os
+import socket
+import uuid
+from typing import Optional
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import DBAPIError
+from app.core.cache import InMemoryBackend, get_shared_backend
+from app.database.config import db_settings
+
+class BackendLock:
+    """Leader lease in the shared cache backend (SET NX with a TTL).
+
+    The holder renews the lease on every ``acquire``; if it dies the lease
+    lapses after ``ttl`` seconds and another worker takes over. Keep ``ttl``
+    several times the renewal interval. Renewal and release check the token
+    and act in one backend operation, so a holder whose lease has lapsed can
+    never extend or delete its successor's.
+    """
+
+    def __init__(self, backend, key: str, ttl: float):
+        self.backend = backend
+        self.key = key
+        self.ttl = ttl
+        self.token = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex}".encode()
+
+    def acquire(self) -> bool:
+        if self.backend.add(self.key, self.token, self.ttl):
+            return True
+        return self.backend.compare_and_set(self.key, self.token, self.token, self.ttl)
+
+    def release(self) -> None:
+        self.backend.compare_and_delete(self.key, self.token)
+
+class AdvisoryLock:
+    """Leader lock held as a Postgres session advisory lock.
+
+    The lock lives as long as the dedicated connection, so a crashed leader
+    releases it immediately. Not usable behind transaction-pooling PgBouncer,
+    which does not keep sessions.
+    """
+
+    def __init__(self, engine: Engine, key: int):
+        self.engine = engine
+        self.key = key
+        self._conn: Optional[Connection] = None
+
+    def acquire(self) -> bool:
+        if self._conn is not None:
+            try:
+                self._conn.execute(text("SELECT 1"))
+                return True
+            except DBAPIError:
+                # Connection dropped, and the lock with it
+                self._conn = None
+        conn = self.engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+        if conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": self.key}).scalar():
+            self._conn = conn
+            return True
+        conn.close()
+        return False
+
+    def release(self) -> None:
+        if self._conn is None:
+            return
+        try:
+            self._conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": self.key})
+        finally:
+            self._conn.close()
+            self._conn = None
+
+def leader_lock(name: str, engine: Engine, ttl: float):
+    """Lock for electing one runner of ``name`` across workers.
+
+    Postgres advisory locks when the database allows it, else a lease in the
+    shared backend; without either, the lock is process-local and every
+    process considers itself leader.
+    """
+    if engine.dialect.name == "postgresql" and not db_settings.pgbouncer:
+        # Stable 63-bit key per lock name
+        return AdvisoryLock(engine, uuid.uuid5(uuid.NAMESPACE_URL, f"openconnect:{name}").int >> 65)
+    return BackendLock(get_shared_backend() or InMemoryBackend(), f"leader:{name}", ttl)
@@ -0,0 +1,296 @@
+import asyncio
+import fcntl
+import json
+import os
+import tempfile
+import threading
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+Sample = Tuple[str, Dict[str, str], float]
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+        REGISTRY.register(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterator[Tuple[str, Dict[str, str], float]]:
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield self.name, dict(zip(self.labelnames, key)), value
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+class Gauge(_Metric):
+    """Value that can go up and down, e.g. queue depth."""
+    type = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+class Histogram(_Metric):
+    """Cumulative bucketed observations, e.g. latencies in seconds."""
+    type = "histogram"
+
+    DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._counts: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+            self._values[key] = self._values.get(key, 0.0) + value
+
+    def count(self, **labels) -> int:
+        return sum(self._counts.get(self._key(labels), ()))
+
+    def samples(self) -> Iterator[Tuple[str, Dict[str, str], float]]:
+        with self._lock:
+            items = [(key, list(counts), self._values.get(key, 0.0)) for key, counts in self._counts.items()]
+        for key, counts, total in items:
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                yield f"{self.name}_bucket", dict(labels, le=le), cumulative
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, cumulative
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> None:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric already registered: {metric.name}")
+            self._metrics[metric.name] = metric
+
+    def get(self, name: str) -> _Metric:
+        return self._metrics[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._metrics
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        """Run ``collector`` before each scrape, e.g. to set gauges read from a pool."""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def collect(self) -> Iterator[_Metric]:
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        for collector in collectors:
+            collector()
+        return iter(metrics)
+
+REGISTRY = Registry()
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if value == int(value) and abs(value) < 1e15 else repr(value)
+
+def render(families: Iterable[Tuple[_Metric, Iterable[Sample]]]) -> str:
+    """Prometheus text exposition format (0.0.4)."""
+    lines = []
+    for metric, samples in families:
+        lines.append(f"# HELP {metric.name} {_escape(metric.documentation)}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        for name, labels, value in samples:
+            if labels:
+                label_text = ",".join(f'{key}="{_escape(str(val))}"' for key, val in labels.items())
+                lines.append(f"{name}{{{label_text}}} {_format_value(value)}")
+            else:
+                lines.append(f"{name} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+def _snapshot_pid(filename: str) -> Optional[int]:
+    """The worker pid in a ``metrics-<pid>.json`` snapshot name; None for anything else."""
+    if not (filename.startswith("metrics-") and filename.endswith(".json")):
+        return None
+    try:
+        return int(filename[len("metrics-"):-len(".json")])
+    except ValueError:
+        return None
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def _read_snapshot(path: str) -> Dict[str, list]:
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+class MultiProcessCollector:
+    """Combine metrics from every worker sharing ``directory``.
+
+    Each worker's metrics live in its own memory, so with several uvicorn or
+    gunicorn workers a scrape would only see whichever one answered. Workers
+    instead ``flush`` a snapshot to ``directory`` every few seconds (and on
+    shutdown) and any of them can serve the combined view: counters and
+    histograms are summed across snapshots, including those of workers that
+    have since exited, while gauges only count live workers, since a stopped
+    worker's final snapshot drops them.
+
+    A starting worker folds the snapshots of workers that have exited into
+    ``metrics-archive.json`` and removes them, so the directory does not grow
+    with every worker ever started and a reused pid cannot overwrite a dead
+    worker's counters.
+    """
+
+    ARCHIVE = "metrics-archive.json"
+
+    def __init__(self, directory: str, registry: Registry = REGISTRY, pid: Optional[int] = None):
+        self.directory = directory
+        self.registry = registry
+        self.pid = pid or os.getpid()
+        os.makedirs(directory, exist_ok=True)
+        self._compact()
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.directory, f"metrics-{self.pid}.json")
+
+    def _lock(self, mode: int):
+        """Held exclusively while compacting and shared while reading snapshots."""
+        file = open(os.path.join(self.directory, ".lock"), "a")
+        fcntl.flock(file, mode)
+        return file
+
+    def _compact(self) -> None:
+        with self._lock(fcntl.LOCK_EX):
+            exited = []
+            for entry in os.scandir(self.directory):
+                pid = _snapshot_pid(entry.name)
+                if pid is not None and (pid == self.pid or not _alive(pid)):
+                    exited.append(entry.path)
+            if not exited:
+                return
+            archive = os.path.join(self.directory, self.ARCHIVE)
+            totals: Dict[str, Dict[Tuple[str, str], list]] = {}
+            for path in [archive] + exited:
+                for metric_name, samples in _read_snapshot(path).items():
+                    # Gauges of exited workers no longer count
+                    if metric_name not in self.registry or self.registry.get(metric_name).type == "gauge":
+                        continue
+                    merged = totals.setdefault(metric_name, {})
+                    for name, labels, value in samples:
+                        key = (name, json.dumps(labels, sort_keys=True))
+                        if key in merged:
+                            merged[key][2] += value
+                        else:
+                            merged[key] = [name, labels, value]
+            self._write(archive, {metric_name: list(merged.values()) for metric_name, merged in totals.items()})
+            for path in exited:
+                os.remove(path)
+
+    def _write(self, path: str, snapshot: Dict[str, list]) -> None:
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=".metrics-")
+        with os.fdopen(fd, "w") as file:
+            json.dump(snapshot, file)
+        os.replace(tmp, path)
+
+    def _snapshot(self, live: bool) -> Dict[str, list]:
+        return {
+            metric.name: [[name, labels, value] for name, labels, value in metric.samples()]
+            for metric in self.registry.collect()
+            if live or metric.type != "gauge"
+        }
+
+    def flush(self, live: bool = True) -> None:
+        """Write this worker's snapshot; ``live=False`` on shutdown drops its gauges."""
+        self._write(self.path, self._snapshot(live))
+
+    async def run(self, interval: float) -> None:
+        """Flush every ``interval`` seconds until cancelled, then mark this worker stopped."""
+        try:
+            while True:
+                await asyncio.to_thread(self.flush)
+                await asyncio.sleep(interval)
+        finally:
+            self.flush(live=False)
+
+    def families(self) -> List[Tuple[_Metric, List[Sample]]]:
+        totals: Dict[str, Dict[Tuple[str, tuple], float]] = {}
+
+        def add(metric_name: str, samples: Iterable[Sample]) -> None:
+            merged = totals.setdefault(metric_name, {})
+            for name, labels, value in samples:
+                key = (name, tuple(sorted(labels.items())))
+                merged[key] = merged.get(key, 0.0) + value
+
+        for metric_name, samples in self._snapshot(live=True).items():
+            add(metric_name, samples)
+        # Shared lock: a compaction half done would count exited workers twice
+        with self._lock(fcntl.LOCK_SH):
+            for entry in os.scandir(self.directory):
+                if not entry.name.startswith("metrics-") or entry.path == self.path:
+                    continue
+                for metric_name, samples in _read_snapshot(entry.path).items():
+                    if metric_name in totals:
+                        add(metric_name, samples)
+
+        return [
+            (self.registry.get(metric_name), [(name, dict(labels), value) for (name, labels), value in merged.items()])
+            for metric_name, merged in totals.items()
+        ]
+
+def generate_latest(registry: Registry = REGISTRY, collector: Optional[MultiProcessCollector] = None) -> str:
+    if collector is not None:
+        return render(collector.families())
+    return render((metric, metric.samples()) for metric in registry.collect())
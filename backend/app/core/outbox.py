@@ -0,0 +1,281 @@
+import argparse
+import asyncio
+import logging
+import random
+import smtplib
+import time
+from datetime import datetime, timedelta, timezone
+from email.message import EmailMessage
+from typing import Callable, Dict, Optional
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.core.leader import leader_lock
+from app.core.metrics import Counter, Gauge, Histogram
+from app.database import SessionLocal, engine
+from app.models.email_outbox import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+emails_sent = Counter("email_outbox_sent_total", "Messages accepted by the SMTP relay", ["kind"])
+email_failures = Counter("email_outbox_failures_total", "Failed delivery attempts", ["outcome"])
+email_backlog = Gauge("email_outbox_backlog", "Pending messages due for delivery, at the start of the last batch")
+email_sender_leader = Gauge("email_outbox_leader", "1 while this process holds the email sender lock")
+email_batch_seconds = Histogram("email_outbox_batch_seconds", "Duration of an email delivery batch")
+
+INSERT_BY_DIALECT = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+def queue_email(db: Session, email: str, kind: str, subject: str, body: str) -> None:
+    """Add a message to the outbox in the caller's transaction; the caller commits.
+
+    When a message of this ``kind`` is still pending for ``email``, it is
+    replaced instead: its subject and body are updated in place, so the
+    recipient gets one message and it is the latest. It is due at once,
+    rather than after the backoff the old content had built up.
+    """
+    values = {"email": email, "kind": kind, "subject": subject, "body": body}
+    now = datetime.now(timezone.utc)
+    replaced = {"subject": subject, "body": body, "next_attempt_at": now, "updated_at": now}
+    insert = INSERT_BY_DIALECT.get(db.get_bind().dialect.name)
+    if insert is None:
+        # Without ON CONFLICT support, check first; the unique index still guards races
+        pending = db.scalar(select(EmailOutbox.id).where(
+            EmailOutbox.email == email, EmailOutbox.kind == kind, EmailOutbox.status == "pending"
+        ))
+        if pending is not None:
+            db.execute(update(EmailOutbox).where(EmailOutbox.id == pending).values(**replaced))
+        else:
+            db.add(EmailOutbox(**values))
+            db.flush()
+        return
+    stmt = insert(EmailOutbox).values(**values).on_conflict_do_update(
+        index_elements=[EmailOutbox.email, EmailOutbox.kind],
+        index_where=EmailOutbox.status == "pending",
+        set_=replaced
+    )
+    # The ORM defaults (id, status, timestamps) are applied by the core insert too
+    db.execute(stmt)
+
+def retry_delay(attempts: int) -> float:
+    """Seconds before attempt ``attempts + 1``: exponential, capped, with jitter."""
+    delay = min(settings.email_retry_max_seconds, settings.email_retry_base_seconds * 2 ** (attempts - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+def _message(row) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = settings.email_from
+    message["To"] = row.email
+    message["Subject"] = row.subject
+    message.set_content(row.body)
+    return message
+
+def _connect() -> smtplib.SMTP:
+    smtp = smtplib.SMTP(settings.smtp_host, settings.smtp_port, timeout=settings.smtp_timeout_seconds)
+    try:
+        if settings.smtp_starttls:
+            smtp.starttls()
+        if settings.smtp_username:
+            smtp.login(settings.smtp_username, settings.smtp_password or "")
+    except BaseException:
+        smtp.close()
+        raise
+    return smtp
+
+def _permanent(exc: Exception) -> bool:
+    """A 5xx reply to this message: retrying will not help."""
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in exc.recipients.values())
+    return isinstance(exc, smtplib.SMTPResponseException) and exc.smtp_code >= 500
+
+def _mark_sent(db: Session, row) -> None:
+    # Unless queue_email replaced the body while this copy was being sent;
+    # then the message stays pending and the new one goes out next batch
+    db.execute(
+        update(EmailOutbox)
+        .where(EmailOutbox.id == row.id, EmailOutbox.subject == row.subject, EmailOutbox.body == row.body)
+        .values(status="sent", sent_at=datetime.now(timezone.utc), attempts=row.attempts + 1)
+    )
+    emails_sent.inc(kind=row.kind)
+
+def _mark_failed(db: Session, row, exc: Exception, now: datetime, permanent: bool = False) -> str:
+    """Back the message off, or give up on it; returns which."""
+    attempts = row.attempts + 1
+    values = {"attempts": attempts, "last_error": f"{type(exc).__name__}: {exc}"[:1000]}
+    if permanent or attempts >= settings.email_max_attempts:
+        outcome = values["status"] = "failed"
+    else:
+        outcome = "retry"
+        values["next_attempt_at"] = now + timedelta(seconds=retry_delay(attempts))
+    db.execute(update(EmailOutbox).where(EmailOutbox.id == row.id).values(**values))
+    email_failures.inc(outcome=outcome)
+    return outcome
+
+def _defer(db: Session, row, exc: Exception, now: datetime) -> str:
+    """Back the message off without spending an attempt: the relay failed, not the message.
+
+    However long the relay is down, mail waits for it rather than running
+    out of ``email_max_attempts``.
+    """
+    db.execute(
+        update(EmailOutbox)
+        .where(EmailOutbox.id == row.id)
+        .values(
+            last_error=f"{type(exc).__name__}: {exc}"[:1000],
+            next_attempt_at=now + timedelta(seconds=retry_delay(max(row.attempts, 1)))
+        )
+    )
+    email_failures.inc(outcome="deferred")
+    return "retry"
+
+def deliver_batch(
+    db: Session,
+    now: Optional[datetime] = None,
+    batch_size: int = settings.email_outbox_batch_size,
+    connect: Callable[[], smtplib.SMTP] = _connect
+) -> Dict[str, int]:
+    """Send up to ``batch_size`` due messages over a single SMTP connection.
+
+    Each message is marked sent as soon as the relay accepts it. A reply
+    rejecting one message backs off just that message (or fails it, for a
+    5xx or after ``email_max_attempts``). Failing to connect, or losing the
+    connection, backs off everything not yet sent without counting an
+    attempt against it. Delivery is at least once: a crash between the
+    relay accepting a message and the commit sends it again.
+    """
+    now = now or datetime.now(timezone.utc)
+    started = time.perf_counter()
+    due = (EmailOutbox.status == "pending", EmailOutbox.next_attempt_at <= now)
+    email_backlog.set(db.scalar(select(func.count()).select_from(EmailOutbox).where(*due)))
+    # Plain rows rather than entities, so the per-message commits below expire nothing
+    rows = db.execute(
+        select(EmailOutbox.id, EmailOutbox.email, EmailOutbox.kind, EmailOutbox.subject, EmailOutbox.body, EmailOutbox.attempts)
+        .where(*due)
+        .order_by(EmailOutbox.next_attempt_at)
+        .limit(batch_size)
+    ).all()
+    result = {"sent": 0, "retry": 0, "failed": 0}
+    if not rows:
+        return result
+
+    try:
+        smtp = connect()
+    except OSError as exc:  # SMTPException included
+        # Relay down or misconfigured: not the messages' fault
+        logger.warning("Could not connect to the SMTP relay: %s", exc)
+        for row in rows:
+            result[_defer(db, row, exc, now)] += 1
+        db.commit()
+        return result
+
+    try:
+        for index, row in enumerate(rows):
+            try:
+                smtp.send_message(_message(row))
+            except smtplib.SMTPServerDisconnected as exc:
+                lost = exc
+            except smtplib.SMTPException as exc:
+                # A reply refusing this message; smtplib has already reset the transaction
+                result[_mark_failed(db, row, exc, now, _permanent(exc))] += 1
+                db.commit()
+                continue
+            except OSError as exc:
+                lost = exc
+            else:
+                _mark_sent(db, row)
+                result["sent"] += 1
+                # Committed per message so a failure later in the batch cannot resend it
+                db.commit()
+                continue
+            # The connection is gone; the rest of the batch waits for the next one
+            for unsent in rows[index:]:
+                result[_defer(db, unsent, lost, now)] += 1
+            db.commit()
+            break
+    finally:
+        try:
+            smtp.quit()
+        except OSError:  # SMTPException included
+            smtp.close()
+    email_batch_seconds.observe(time.perf_counter() - started)
+    return result
+
+class EmailOutboxSender:
+    """Drains the outbox with ``deliver_batch`` every ``interval`` seconds while holding the leader lock.
+
+    Started from the app lifespan when ``email_outbox_enabled`` is set, or as
+    its own process with ``python -m app.core.outbox``. A full batch is
+    followed straight away by the next one.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        lock=None,
+        interval: float = settings.email_outbox_interval_seconds
+    ):
+        self.session_factory = session_factory
+        # The lease has to outlast a batch over a slow relay, not just the interval
+        self.lock = lock or leader_lock("email-outbox", engine, ttl=max(interval * 3, settings.smtp_timeout_seconds * 6))
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def _deliver(self) -> Dict[str, int]:
+        with self.session_factory() as db:
+            return deliver_batch(db)
+
+    async def tick(self) -> Optional[Dict[str, int]]:
+        """Deliver a batch if this process is (or becomes) leader; None otherwise."""
+        leader = await asyncio.to_thread(self.lock.acquire)
+        email_sender_leader.set(1 if leader else 0)
+        if not leader:
+            return None
+        try:
+            return await asyncio.to_thread(self._deliver)
+        except Exception:
+            logger.exception("Email outbox batch failed")
+            return None
+
+    async def run_forever(self) -> None:
+        try:
+            while True:
+                result = await self.tick()
+                if not result or sum(result.values()) < settings.email_outbox_batch_size:
+                    await asyncio.sleep(self.interval)
+        finally:
+            await asyncio.to_thread(self.lock.release)
+            email_sender_leader.set(0)
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self.run_forever())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Deliver queued email from the outbox.")
+    parser.add_argument("--once", action="store_true", help="deliver a single batch and exit")
+    parser.add_argument("--interval", type=float, default=settings.email_outbox_interval_seconds, help="seconds between batches")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    sender = EmailOutboxSender(interval=args.interval)
+    if args.once:
+        result = asyncio.run(sender.tick())
+        sender.lock.release()
+        print(result if result is not None else "Another process holds the email sender lock")
+        return
+    try:
+        asyncio.run(sender.run_forever())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
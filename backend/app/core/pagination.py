@@ -0,0 +1,57 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, Optional, Sequence, Tuple
+from uuid import UUID
+from fastapi import HTTPException, Request, Response
+from sqlalchemy import Select, tuple_
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+def encode_cursor(*values: Any) -> str:
+    raw = json.dumps([_encode_value(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, types: Sequence[Callable[[Any], Any]]) -> Tuple[Any, ...]:
+    """Decode an opaque cursor, converting each value with the matching type."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError("wrong number of cursor values")
+        return tuple(convert(value) for convert, value in zip(types, values))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def parse_datetime(value: str) -> datetime:
+    return datetime.fromisoformat(value)
+
+def keyset_page(stmt: Select, columns: Sequence, cursor: Optional[Tuple[Any, ...]], limit: int) -> Select:
+    """Order ``stmt`` by ``columns`` and fetch one page after ``cursor``.
+
+    One extra row is requested so ``split_page`` can tell whether another page
+    follows without a separate count query.
+    """
+    if cursor is not None:
+        stmt = stmt.where(tuple_(*columns) > tuple_(*cursor))
+    return stmt.order_by(None).order_by(*columns).limit(limit + 1)
+
+def split_page(rows: Sequence, limit: int, key: Callable[[Any], Tuple[Any, ...]]) -> Tuple[Sequence, Optional[str]]:
+    """Trim the look-ahead row and build the cursor for the next page."""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(*key(rows[-1]))
+
+def set_next_cursor(request: Request, response: Response, next_cursor: Optional[str]) -> None:
+    """Advertise the next page via X-Next-Cursor and an RFC 8288 Link header."""
+    if next_cursor is None:
+        return
+    response.headers["X-Next-Cursor"] = next_cursor
+    next_url = request.url.include_query_params(cursor=next_cursor)
+    response.headers["Link"] = f'<{next_url}>; rel="next"'
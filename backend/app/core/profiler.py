@@ -0,0 +1,185 @@
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter as Tally
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_IN_LIST = re.compile(r"\bIN\s*\((?:\s*(?:\?|%\(\w+\)s|\$\d+|:\w+|__\[POSTCOMPILE_\w+\])\s*,?)+\)", re.IGNORECASE)
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_SPACE = re.compile(r"\s+")
+
+def statement_shape(statement: str) -> str:
+    """A statement with literals and IN-lists collapsed, so repeats of one query compare equal."""
+    shape = _IN_LIST.sub("IN (...)", statement)
+    shape = _LITERAL.sub("?", shape)
+    return _SPACE.sub(" ", shape).strip()
+
+def _caller() -> str:
+    """Innermost app frame that issued a statement, as ``module:function:line``.
+
+    ASGI middleware ``__call__`` frames are skipped: a query with nothing but
+    middleware above it came from the framework, typically response
+    serialization touching a lazy relationship.
+    """
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if (
+            filename.startswith(_APP_DIR)
+            and frame.f_code.co_name != "__call__"
+            and not filename.endswith(("instrumentation.py", "profiler.py"))
+        ):
+            module = os.path.relpath(filename, os.path.dirname(_APP_DIR))[:-3].replace(os.sep, ".")
+            return f"{module}:{frame.f_code.co_name}:{frame.f_lineno}"
+        frame = frame.f_back
+    return "framework"
+
+class QueryRecord(NamedTuple):
+    shape: str
+    caller: str
+    started: float  # seconds since the profile began
+    duration: float
+
+class QueryProfile:
+    """Every statement run while handling one request (or inside ``query_budget``)."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.queries: List[QueryRecord] = []
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, started: float, duration: float) -> None:
+        record = QueryRecord(statement_shape(statement), _caller(), started - self._origin, duration)
+        with self._lock:
+            self.queries.append(record)
+
+    @property
+    def count(self) -> int:
+        return len(self.queries)
+
+    @property
+    def seconds(self) -> float:
+        return sum(query.duration for query in self.queries)
+
+    def repeated(self, threshold: int = settings.query_profiler_repeat_threshold) -> Dict[str, int]:
+        """Statement shapes run at least ``threshold`` times: likely N+1 lazy loads."""
+        counts = Tally(query.shape for query in self.queries)
+        return {shape: count for shape, count in counts.most_common() if count >= threshold}
+
+    def collapsed(self) -> str:
+        """Folded-stack lines (``frame;frame value``) for flamegraph.pl or speedscope.
+
+        One stack per request, caller and statement shape, weighted by total
+        microseconds spent in it.
+        """
+        weights: Dict[str, float] = {}
+        for query in self.queries:
+            stack = ";".join((self.name, query.caller, query.shape.replace(";", ",")))
+            weights[stack] = weights.get(stack, 0.0) + query.duration
+        return "".join(f"{stack} {max(int(seconds * 1e6), 1)}\n" for stack, seconds in weights.items())
+
+    def report(self) -> str:
+        lines = [f"{self.name}: {self.count} queries in {self.seconds * 1000:.1f}ms"]
+        for shape, count in self.repeated().items():
+            lines.append(f"  repeated {count}x: {shape}")
+        return "\n".join(lines)
+
+current_profile: ContextVar[Optional[QueryProfile]] = ContextVar("current_profile", default=None)
+
+# Called with each finished request profile, e.g. by query_budget
+_observers: List[Callable[[QueryProfile], None]] = []
+_observers_lock = threading.Lock()
+
+def _publish(profile: QueryProfile) -> None:
+    with _observers_lock:
+        observers = list(_observers)
+    for observer in observers:
+        observer(profile)
+
+class QueryProfilerMiddleware:
+    """Opt-in per-request SQL profiler (``QUERY_PROFILER_ENABLED``).
+
+    Adds ``X-Query-Count``/``X-Query-Time`` response headers, logs a warning
+    when a statement shape repeats ``query_profiler_repeat_threshold`` times
+    (the signature of lazy loads in a loop), and with
+    ``query_profiler_trace_file`` set appends each request's folded stacks
+    there for flame graphs. For development and CI, not production.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._trace_lock = threading.Lock()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile = QueryProfile(f"{scope['method']} {scope['path']}")
+        token = current_profile.set(profile)
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-query-count", str(profile.count).encode()),
+                    (b"x-query-time", f"{profile.seconds * 1000:.2f}ms".encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            current_profile.reset(token)
+            route = scope.get("route")
+            if route is not None:
+                profile.name = f"{scope['method']} {route.path}"
+            self._finish(profile)
+
+    def _finish(self, profile: QueryProfile) -> None:
+        if profile.repeated():
+            logger.warning("Possible N+1 queries\n%s", profile.report())
+        if settings.query_profiler_trace_file and profile.queries:
+            with self._trace_lock, open(settings.query_profiler_trace_file, "a") as trace:
+                trace.write(profile.collapsed())
+        _publish(profile)
+
+class QueryBudgetExceeded(AssertionError):
+    """A request or block ran more queries than its budget allowed."""
+
+@contextmanager
+def query_budget(max_queries: int, allow_repeats: bool = False) -> Iterator[List[QueryProfile]]:
+    """Fail if any request finished inside the block, or the block's own
+    statements, exceed ``max_queries`` or repeat a statement shape.
+
+    Requests are seen through QueryProfilerMiddleware, which must be
+    installed; queries run directly in the block are profiled here.
+    """
+    profiles: List[QueryProfile] = []
+    own = QueryProfile("query_budget")
+    token = current_profile.set(own)
+    with _observers_lock:
+        _observers.append(profiles.append)
+    try:
+        yield profiles
+    finally:
+        current_profile.reset(token)
+        with _observers_lock:
+            _observers.remove(profiles.append)
+    if own.queries:
+        profiles.append(own)
+    for profile in profiles:
+        if profile.count > max_queries:
+            raise QueryBudgetExceeded(f"Query budget of {max_queries} exceeded\n{profile.report()}")
+        if not allow_repeats and profile.repeated():
+            raise QueryBudgetExceeded(f"Repeated queries (possible N+1)\n{profile.report()}")
@@ -0,0 +1,154 @@
+import json
+import math
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+from anyio import to_thread
+from jose import JWTError
+from app.config import settings
+from app.core.auth import AuthenticatedUser, decode_access_token
+from app.core.cache import InMemoryBackend, get_shared_backend
+from app.core.metrics import Counter
+
+rate_limited = Counter("rate_limited_requests_total", "Requests rejected by the rate limiter", ["path", "scope"])
+
+SCOPES = ("ip", "user", "facility")
+
+@dataclass(frozen=True)
+class Limit:
+    scope: str
+    requests: int
+    period: float
+
+    @property
+    def rate(self) -> float:
+        return self.requests / self.period
+
+    @property
+    def policy(self) -> str:
+        return f"{self.requests};w={self.period:g}"
+
+def parse_limits(spec: str) -> Tuple[Limit, ...]:
+    """Parse ``"ip=10/60,user=30/60"`` into limits (requests per period in seconds)."""
+    limits = []
+    for part in spec.split(","):
+        scope, _, quota = part.strip().partition("=")
+        requests, _, period = quota.partition("/")
+        if scope not in SCOPES or not requests or not period:
+            raise ValueError(f"Invalid rate limit: {part!r}")
+        limits.append(Limit(scope, int(requests), float(period)))
+    return tuple(limits)
+
+def _bearer_user(scope) -> Optional[AuthenticatedUser]:
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            kind, _, token = value.decode("latin-1").partition(" ")
+            if kind.lower() != "bearer":
+                return None
+            try:
+                # Served from the claims cache after the first request
+                return decode_access_token(token)
+            except JWTError:
+                return None
+    return None
+
+class RateLimitMiddleware:
+    """Token-bucket rate limiting for the paths in ``settings.rate_limits``.
+
+    Each limit is a bucket of ``requests`` tokens refilled over ``period``
+    seconds, keyed by client IP, user or facility. Unlisted paths pass
+    straight through. Buckets live in the shared backend when one is
+    configured, so limits hold across workers, else in process memory.
+
+    Responses carry ``RateLimit-Limit``/``-Remaining``/``-Reset`` and
+    ``RateLimit-Policy`` for the tightest bucket; rejected requests get 429
+    with ``Retry-After``. The client IP is the ASGI peer address, so run
+    uvicorn with ``--proxy-headers`` behind a load balancer.
+    """
+
+    def __init__(self, app, limits: Optional[Dict[str, str]] = None, backend=None):
+        self.app = app
+        self.rules = {
+            path: parse_limits(spec)
+            for path, spec in (settings.rate_limits if limits is None else limits).items()
+        }
+        self.backend = backend
+        self._local = InMemoryBackend()
+
+    def _identity(self, limit: Limit, scope, user: Optional[AuthenticatedUser]) -> Optional[str]:
+        if limit.scope == "facility":
+            return f"facility:{user.facility_id}" if user and user.facility_id else None
+        if limit.scope == "user" and user is not None:
+            return f"user:{user.id}"
+        client = scope.get("client")
+        return f"ip:{client[0] if client else 'unknown'}"
+
+    def _check(self, backend, path: str, limits: Tuple[Limit, ...], scope, user) -> Tuple[Optional[Limit], Limit, float]:
+        """Take a token from each bucket; returns (limit hit or None, tightest limit, its tokens left).
+
+        All or nothing: when a bucket is empty, the tokens already taken from
+        the others are put back, so rejected requests spend no quota.
+        """
+        tightest, left = None, math.inf
+        taken = []
+        for limit in limits:
+            identity = self._identity(limit, scope, user)
+            if identity is None:
+                continue
+            key = f"ratelimit:{path}:{identity}"
+            allowed, tokens = backend.take_tokens(key, limit.rate, limit.requests)
+            if not allowed:
+                for taken_key, taken_limit in taken:
+                    backend.take_tokens(taken_key, taken_limit.rate, taken_limit.requests, cost=-1)
+                return limit, limit, tokens
+            taken.append((key, limit))
+            if tightest is None or tokens / limit.requests < left / tightest.requests:
+                tightest, left = limit, tokens
+        return None, tightest, left
+
+    async def __call__(self, scope, receive, send):
+        limits = self.rules.get(scope["path"]) if scope["type"] == "http" else None
+        if not limits:
+            await self.app(scope, receive, send)
+            return
+
+        user = _bearer_user(scope)
+        backend = self.backend or get_shared_backend()
+        if backend is None:
+            exceeded, limit, tokens = self._check(self._local, scope["path"], limits, scope, user)
+        else:
+            # Shared buckets are a network round trip; keep it off the event loop
+            exceeded, limit, tokens = await to_thread.run_sync(
+                self._check, backend, scope["path"], limits, scope, user
+            )
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        headers = [
+            (b"ratelimit-limit", str(limit.requests).encode()),
+            (b"ratelimit-remaining", str(int(tokens)).encode()),
+            (b"ratelimit-reset", str(math.ceil((limit.requests - tokens) / limit.rate)).encode()),
+            (b"ratelimit-policy", limit.policy.encode()),
+        ]
+        if exceeded is not None:
+            rate_limited.inc(path=scope["path"], scope=exceeded.scope)
+            body = json.dumps({"detail": "Too many requests"}).encode()
+            retry_after = math.ceil((1 - tokens) / exceeded.rate)
+            await send({
+                "type": "http.response.start",
+                "status": 429,
+                "headers": headers + [
+                    (b"retry-after", str(retry_after).encode()),
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
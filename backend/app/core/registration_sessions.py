@@ -0,0 +1,98 @@
+import secrets
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional, Tuple
+from uuid import UUID
+from app.config import settings
+from app.core.cache import InMemoryBackend, get_shared_backend
+from app.schemas.registration import RegistrationDraft
+
+class RegistrationCompleted(Exception):
+    """The draft has become a user, so its steps can no longer change."""
+
+    def __init__(self, user_id: UUID):
+        super().__init__(f"Registration already completed as user {user_id}")
+        self.user_id = user_id
+
+class RegistrationSessionStore:
+    """Drafts of in-progress registrations, kept until they expire.
+
+    Each draft is one compact JSON value (unset steps are omitted) under an
+    unguessable registration id, stored in the shared backend when one is
+    configured so any worker can serve the next step, else in process
+    memory. Expiry is fixed when the registration starts; every write keeps
+    the remaining TTL. Writes after the first are compare-and-set against
+    the value they were computed from, so concurrent steps cannot undo each
+    other. Nothing touches the database until the final step.
+    """
+
+    def __init__(self, ttl: float, backend=None):
+        self.ttl = ttl
+        self.backend = backend
+        self._local = InMemoryBackend()
+
+    def _backend(self):
+        return self.backend or get_shared_backend() or self._local
+
+    @staticmethod
+    def _key(registration_id: str) -> str:
+        return f"registration:{registration_id}"
+
+    def _write(self, registration_id: str, draft: RegistrationDraft, expected: Optional[bytes] = None) -> bool:
+        """Store ``draft``; with ``expected``, only if that is still the stored value."""
+        ttl = (draft.expires_at - datetime.now(timezone.utc)).total_seconds()
+        if ttl <= 0:
+            return False
+        payload = draft.model_dump_json(exclude_defaults=True).encode()
+        if expected is None:
+            self._backend().set(self._key(registration_id), payload, ttl=ttl)
+            return True
+        return self._backend().compare_and_set(self._key(registration_id), expected, payload, ttl=ttl)
+
+    def create(self, email: str, user_type: str) -> Tuple[str, RegistrationDraft]:
+        registration_id = secrets.token_urlsafe(24)
+        expires_at = datetime.now(timezone.utc).replace(microsecond=0) + timedelta(seconds=self.ttl)
+        draft = RegistrationDraft(email=email, user_type=user_type, expires_at=expires_at)
+        self._write(registration_id, draft)
+        return registration_id, draft
+
+    def get(self, registration_id: str) -> Optional[RegistrationDraft]:
+        payload = self._backend().get(self._key(registration_id))
+        return None if payload is None else RegistrationDraft.model_validate_json(payload)
+
+    def modify(
+        self,
+        registration_id: str,
+        change: Callable[[RegistrationDraft], Dict[str, Any]]
+    ) -> Optional[Tuple[RegistrationDraft, RegistrationDraft]]:
+        """Replace the fields ``change(current draft)`` returns; ``(before, after)``, or None once expired.
+
+        The stored draft is re-read on every try, so fields written meanwhile
+        by another step are kept. A retried step that changes nothing writes
+        nothing. Raises ``RegistrationCompleted`` once ``user_id`` is set.
+        """
+        backend, key = self._backend(), self._key(registration_id)
+        while True:
+            payload = backend.get(key)
+            if payload is None:
+                return None
+            current = RegistrationDraft.model_validate_json(payload)
+            if current.user_id is not None:
+                raise RegistrationCompleted(current.user_id)
+            updated = current.model_copy(update=change(current))
+            if updated == current:
+                return current, updated
+            if self._write(registration_id, updated, expected=payload):
+                return current, updated
+            if current.expires_at <= datetime.now(timezone.utc):
+                return None
+            # Another step wrote first: apply ours to what it left
+
+    def update(self, registration_id: str, **changes: Any) -> Optional[RegistrationDraft]:
+        """Set ``changes`` on the stored draft; see ``modify``."""
+        result = self.modify(registration_id, lambda draft: changes)
+        return None if result is None else result[1]
+
+    def delete(self, registration_id: str) -> None:
+        self._backend().delete(self._key(registration_id))
+
+registration_sessions = RegistrationSessionStore(settings.registration_session_ttl_seconds)
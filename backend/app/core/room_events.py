@@ -0,0 +1,244 @@
+import asyncio
+import logging
+from typing import Callable, Dict, Iterable, List, Optional, Set
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.core.cache import TTLCache
+from app.core.metrics import Counter, Gauge
+from app.database import SessionLocal
+from app.models.video_calls import BOOKED_STATUSES, VideoCall, set_call_status
+
+logger = logging.getLogger(__name__)
+
+room_events_received = Counter("room_events_total", "Media server webhook events accepted", ["event"])
+room_events_queue_depth = Gauge("room_events_queue_depth", "Webhook events waiting to be applied")
+room_events_dropped = Counter("room_events_dropped_total", "Webhook events that could not be applied after retrying")
+
+# LiveKit egress status -> VideoCall.recording_status
+EGRESS_RECORDING_STATUS = {
+    "EGRESS_STARTING": "active",
+    "EGRESS_ACTIVE": "active",
+    "EGRESS_ENDING": "active",
+    "EGRESS_COMPLETE": "completed",
+    "EGRESS_FAILED": "inactive",
+    "EGRESS_ABORTED": "inactive",
+    "EGRESS_LIMIT_REACHED": "completed",
+}
+
+class RoomState:
+    """Net effect of a batch of events on one room."""
+    __slots__ = ("status", "recording_status", "participants")
+
+    def __init__(self):
+        self.status: Optional[str] = None
+        self.recording_status: Optional[str] = None
+        self.participants: Optional[int] = None
+
+def _room_name(event: dict) -> Optional[str]:
+    room = event.get("room") or {}
+    egress = event.get("egressInfo") or event.get("egress_info") or {}
+    return room.get("name") or egress.get("roomName") or egress.get("room_name")
+
+def coalesce_room_events(events: Iterable[dict]) -> Dict[str, RoomState]:
+    """Fold events in arrival order into one target state per room.
+
+    A finished room stays completed even if a late ``room_started`` follows
+    in the same batch; occupancy and recording status keep the last value.
+    """
+    rooms: Dict[str, RoomState] = {}
+    for event in events:
+        name = _room_name(event)
+        if not name:
+            continue
+        state = rooms.setdefault(name, RoomState())
+        kind = event.get("event")
+        room = event.get("room") or {}
+        reported = room.get("numParticipants", room.get("num_participants"))
+        if kind in ("room_started", "participant_joined") and state.status != "completed":
+            state.status = "active"
+        elif kind == "room_finished":
+            state.status = "completed"
+            state.participants = 0
+            continue
+        if kind in ("participant_joined", "participant_left"):
+            if reported is not None:
+                state.participants = int(reported)
+            else:
+                delta = 1 if kind == "participant_joined" else -1
+                state.participants = max((state.participants or 0) + delta, 0)
+        elif kind in ("egress_started", "egress_updated", "egress_ended"):
+            egress = event.get("egressInfo") or event.get("egress_info") or {}
+            default = "completed" if kind == "egress_ended" else "active"
+            state.recording_status = EGRESS_RECORDING_STATUS.get(egress.get("status"), default)
+    return rooms
+
+def _set_status(db: Session, room_names: List[str], status: str, from_statuses: Iterable[str]) -> None:
+    set_call_status(db, select(VideoCall.id).where(VideoCall.room_name.in_(room_names)), status, from_statuses)
+
+def apply_room_events(db: Session, events: Iterable[dict]) -> int:
+    """Apply a batch of webhook events with a handful of bulk UPDATEs; returns rooms touched."""
+    rooms = coalesce_room_events(events)
+    if not rooms:
+        return 0
+
+    completed = [name for name, state in rooms.items() if state.status == "completed"]
+    active = [name for name, state in rooms.items() if state.status == "active"]
+    if completed:
+        _set_status(db, completed, "completed", BOOKED_STATUSES)
+    if active:
+        _set_status(db, active, "active", ("scheduled",))
+
+    by_recording: Dict[str, List[str]] = {}
+    for name, state in rooms.items():
+        if state.recording_status is not None:
+            by_recording.setdefault(state.recording_status, []).append(name)
+    for recording_status, names in by_recording.items():
+        db.execute(
+            update(VideoCall).where(VideoCall.room_name.in_(names)).values(recording_status=recording_status)
+        )
+
+    occupancy = [
+        {"room": name, "count": state.participants}
+        for name, state in rooms.items() if state.participants is not None
+    ]
+    if occupancy:
+        table = VideoCall.__table__
+        db.execute(
+            update(table)
+            .where(table.c.room_name == bindparam("room"))
+            .values(connected_participants=bindparam("count")),
+            occupancy
+        )
+    db.commit()
+    return len(rooms)
+
+class RoomEventWorker:
+    """Queue between the webhook endpoint and the database.
+
+    The endpoint only verifies and enqueues; the worker task drains up to
+    ``batch_size`` events (waiting at most ``batch_interval`` for a batch to
+    fill) and applies them in a worker thread with one transaction per batch.
+    Webhooks are acknowledged on enqueue, so a batch that fails is retried
+    with backoff (holding back later batches, which keeps events in order and
+    lets the queue fill up to answer 503 during an outage). If it still fails,
+    its events are applied one at a time and only those that fail alone are
+    dropped. Redelivered events are dropped by id once applied, or while queued.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        queue_size: int = settings.webhook_queue_size,
+        batch_size: int = settings.webhook_batch_size,
+        batch_interval: float = settings.webhook_batch_interval_seconds,
+        apply_attempts: int = settings.webhook_apply_attempts,
+        retry_base: float = settings.webhook_retry_base_seconds
+    ):
+        self.session_factory = session_factory
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.apply_attempts = apply_attempts
+        self.retry_base = retry_base
+        self.queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        # Ids applied recently, and ids queued or being applied
+        self._seen = TTLCache(maxsize=queue_size, ttl=600)
+        self._queued: Set[str] = set()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = 5.0) -> None:
+        """Apply what is queued (up to ``timeout``), then stop the task."""
+        if self._task is None:
+            return
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Dropping %d unapplied room events on shutdown", self.queue.qsize())
+        self._task.cancel()
+        self._task = None
+
+    def enqueue(self, event: dict) -> bool:
+        """Queue an event; False when the worker is down or the queue is full."""
+        if not self.running:
+            return False
+        event_id = event.get("id")
+        if event_id and (event_id in self._queued or event_id in self._seen):
+            return True
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            return False
+        if event_id:
+            self._queued.add(event_id)
+        room_events_received.inc(event=event.get("event", "unknown"))
+        room_events_queue_depth.set(self.queue.qsize())
+        return True
+
+    async def _next_batch(self) -> List[dict]:
+        batch = [await self.queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.batch_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    def _apply(self, batch: List[dict]) -> None:
+        with self.session_factory() as db:
+            apply_room_events(db, batch)
+
+    def _settle(self, events: List[dict], applied: bool) -> None:
+        for event in events:
+            event_id = event.get("id")
+            if event_id:
+                self._queued.discard(event_id)
+                if applied:
+                    self._seen.set(event_id, True)
+
+    async def _apply_with_retry(self, batch: List[dict]) -> None:
+        for attempt in range(1, self.apply_attempts + 1):
+            try:
+                await asyncio.to_thread(self._apply, batch)
+            except Exception:
+                logger.exception("Failed to apply %d room events (attempt %d)", len(batch), attempt)
+                if attempt < self.apply_attempts:
+                    await asyncio.sleep(self.retry_base * 2 ** (attempt - 1))
+            else:
+                self._settle(batch, applied=True)
+                return
+        # Keep one bad event from taking the rest of its batch down with it
+        for event in batch:
+            try:
+                await asyncio.to_thread(self._apply, [event])
+            except Exception:
+                logger.exception("Dropping room event %s that cannot be applied", event.get("id"))
+                room_events_dropped.inc()
+                self._settle([event], applied=False)
+            else:
+                self._settle([event], applied=True)
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self._apply_with_retry(batch)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+                room_events_queue_depth.set(self.queue.qsize())
+
+room_event_worker = RoomEventWorker()
@@ -0,0 +1,208 @@
+import argparse
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.core.identity_uploads import sweep_identity_uploads
+from app.core.leader import leader_lock
+from app.core.metrics import Counter, Gauge, Histogram
+from app.core.pagination import keyset_page
+from app.core.scheduling import as_utc, upcoming_call_participants
+from app.database import SessionLocal, engine
+from app.models.video_calls import CallParticipant, VideoCall, set_call_status
+from app.providers.base import UnknownProviderError
+from app.providers.registry import registry
+
+logger = logging.getLogger(__name__)
+
+scheduler_transitions = Counter("call_scheduler_transitions_total", "Calls moved by the scheduler", ["status"])
+scheduler_backlog = Gauge("call_scheduler_backlog", "Calls past their end awaiting a transition, at the start of the last sweep")
+scheduler_lag = Gauge("call_scheduler_lag_seconds", "How overdue the most overdue call was at the start of the last sweep")
+scheduler_leader = Gauge("call_scheduler_leader", "1 while this process holds the scheduler lock")
+scheduler_sweep_seconds = Histogram("call_scheduler_sweep_seconds", "Duration of a scheduler sweep")
+
+# (from status, to status): a scheduled call nobody joined is cancelled; an
+# active call past its end is completed unless the media server still
+# reports people in the room
+TRANSITIONS = (("scheduled", "cancelled"), ("active", "completed"))
+
+def _due_calls(from_status: str, cutoff: datetime):
+    stmt = select(VideoCall.id, VideoCall.scheduled_start, VideoCall.scheduled_duration).where(
+        VideoCall.status == from_status,
+        VideoCall.scheduled_start < cutoff
+    )
+    if from_status == "active":
+        stmt = stmt.where(VideoCall.connected_participants == 0)
+    return stmt
+
+def _sweep(db: Session, from_status: str, to_status: str, cutoff: datetime, batch_size: int) -> int:
+    """Walk candidates on the (status, scheduled_start) index in keyset batches.
+
+    Only calls started before ``cutoff`` can have ended before it; whether
+    they actually did depends on their duration and is checked per batch.
+    Each batch is its own bulk UPDATE and transaction.
+    """
+    key = (VideoCall.scheduled_start, VideoCall.id)
+    after = None
+    moved = 0
+    while True:
+        rows = db.execute(keyset_page(_due_calls(from_status, cutoff), key, after, batch_size)).all()
+        batch = rows[:batch_size]
+        due = [
+            call_id for call_id, start, duration in batch
+            if as_utc(start) + timedelta(minutes=duration or 0) <= cutoff
+        ]
+        if due:
+            moved += set_call_status(db, due, to_status, (from_status,))
+            db.commit()
+        if len(rows) <= batch_size:
+            return moved
+        after = (batch[-1].scheduled_start, batch[-1].id)
+
+def measure_backlog(db: Session, cutoff: datetime) -> Dict[str, float]:
+    """Count of calls that ended before ``cutoff`` but still await a transition,
+    and how long the oldest of them has been waiting.
+
+    Ends come from the participants' copied ``scheduled_end`` (for a call
+    without participants, its start stands in). One aggregate per status over
+    the (status, scheduled_start) index.
+    """
+    backlog, oldest = 0, None
+    for from_status, _ in TRANSITIONS:
+        ends = (
+            _due_calls(from_status, cutoff)
+            .with_only_columns(
+                VideoCall.id,
+                func.coalesce(func.max(CallParticipant.scheduled_end), VideoCall.scheduled_start).label("scheduled_end")
+            )
+            .outerjoin(CallParticipant, CallParticipant.call_id == VideoCall.id)
+            .group_by(VideoCall.id, VideoCall.scheduled_start)
+            .subquery()
+        )
+        count, first_end = db.execute(
+            select(func.count(), func.min(ends.c.scheduled_end)).where(ends.c.scheduled_end <= cutoff)
+        ).one()
+        backlog += count
+        if first_end is not None:
+            first_end = as_utc(first_end)
+            oldest = first_end if oldest is None else min(oldest, first_end)
+    lag = (cutoff - oldest).total_seconds() if oldest is not None else 0.0
+    return {"backlog": backlog, "lag_seconds": lag}
+
+def premint_upcoming_tokens(db: Session, now: Optional[datetime] = None) -> int:
+    """Mint room tokens ahead of calls about to start so the join rush hits the cache."""
+    lead = timedelta(minutes=settings.room_token_premint_minutes)
+    upcoming = upcoming_call_participants(db, lead, now)
+    minted = 0
+    for name, participants in upcoming.items():
+        try:
+            provider = registry.get(name)
+        except UnknownProviderError:
+            # Joins answer 503 for these calls; don't let them stop the sweep
+            logger.warning("Skipping token pre-mint for unknown video provider %r", name)
+            continue
+        minted += provider.premint(participants)
+    return minted
+
+def run_sweep(db: Session, now: Optional[datetime] = None, batch_size: int = settings.scheduler_batch_size) -> Dict[str, Any]:
+    """One maintenance pass; returns what it did."""
+    now = as_utc(now or datetime.now(timezone.utc))
+    cutoff = now - timedelta(minutes=settings.call_expiry_grace_minutes)
+    started = time.perf_counter()
+
+    backlog = measure_backlog(db, cutoff)
+    scheduler_backlog.set(backlog["backlog"])
+    scheduler_lag.set(backlog["lag_seconds"])
+
+    result: Dict[str, Any] = dict(backlog)
+    for from_status, to_status in TRANSITIONS:
+        moved = _sweep(db, from_status, to_status, cutoff, batch_size)
+        scheduler_transitions.inc(moved, status=to_status)
+        result[to_status] = moved
+    result["preminted"] = premint_upcoming_tokens(db, now)
+    result["identity_uploads_swept"] = sweep_identity_uploads(db, now, batch_size)
+
+    scheduler_sweep_seconds.observe(time.perf_counter() - started)
+    return result
+
+class CallScheduler:
+    """Runs ``run_sweep`` every ``interval`` seconds while holding the leader lock.
+
+    Started from the app lifespan when ``scheduler_enabled`` is set, or as its
+    own process with ``python -m app.core.scheduler``; either way only the
+    lock holder sweeps.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        lock=None,
+        interval: float = settings.scheduler_interval_seconds
+    ):
+        self.session_factory = session_factory
+        self.lock = lock or leader_lock("call-scheduler", engine, ttl=interval * 3)
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def _sweep(self) -> Dict[str, Any]:
+        with self.session_factory() as db:
+            return run_sweep(db)
+
+    async def tick(self) -> Optional[Dict[str, Any]]:
+        """Sweep if this process is (or becomes) leader; None otherwise."""
+        leader = await asyncio.to_thread(self.lock.acquire)
+        scheduler_leader.set(1 if leader else 0)
+        if not leader:
+            return None
+        try:
+            return await asyncio.to_thread(self._sweep)
+        except Exception:
+            logger.exception("Call scheduler sweep failed")
+            return None
+
+    async def run_forever(self) -> None:
+        try:
+            while True:
+                await self.tick()
+                await asyncio.sleep(self.interval)
+        finally:
+            await asyncio.to_thread(self.lock.release)
+            scheduler_leader.set(0)
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self.run_forever())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Expire finished calls, pre-mint room tokens and sweep abandoned identity uploads.")
+    parser.add_argument("--once", action="store_true", help="run a single sweep and exit")
+    parser.add_argument("--interval", type=float, default=settings.scheduler_interval_seconds, help="seconds between sweeps")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    scheduler = CallScheduler(interval=args.interval)
+    if args.once:
+        result = asyncio.run(scheduler.tick())
+        scheduler.lock.release()
+        print(result if result is not None else "Another process holds the scheduler lock")
+        return
+    try:
+        asyncio.run(scheduler.run_forever())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
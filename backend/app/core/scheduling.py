@@ -0,0 +1,163 @@
+from bisect import bisect_left
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import Select, func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.video_calls import BOOKED_STATUSES, OVERLAP_CONSTRAINT, CallParticipant, VideoCall
+
+class Booking(NamedTuple):
+    user_id: UUID
+    call_id: UUID
+    start: datetime
+    end: datetime
+
+def as_utc(value: datetime) -> datetime:
+    """Aware UTC datetime; naive values (as SQLite returns them) are taken as UTC."""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+class IntervalIndex:
+    """Half-open [start, end) bookings answering overlap queries.
+
+    Bookings are kept sorted by start alongside a running maximum of their
+    ends. A query bisects to the last booking starting before the window
+    closes and walks left only while an earlier booking could still reach
+    into the window.
+    """
+
+    def __init__(self, bookings: Iterable[Booking] = ()):
+        self._items: List[Booking] = sorted(bookings, key=lambda b: (b.start, b.end))
+        self._starts = [b.start for b in self._items]
+        self._max_ends: List[datetime] = []
+        self._reindex(0)
+
+    def _reindex(self, position: int) -> None:
+        del self._max_ends[position:]
+        for booking in self._items[position:]:
+            previous = self._max_ends[-1] if self._max_ends else booking.end
+            self._max_ends.append(max(previous, booking.end))
+
+    def add(self, booking: Booking) -> None:
+        position = bisect_left(self._starts, booking.start)
+        self._items.insert(position, booking)
+        self._starts.insert(position, booking.start)
+        self._reindex(position)
+
+    def overlapping(self, start: datetime, end: datetime) -> List[Booking]:
+        found = []
+        i = bisect_left(self._starts, end) - 1
+        while i >= 0 and self._max_ends[i] > start:
+            if self._items[i].end > start:
+                found.append(self._items[i])
+            i -= 1
+        found.reverse()
+        return found
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+def bookings_query(
+    dialect: str,
+    user_ids: Iterable[UUID],
+    start: datetime,
+    end: datetime,
+    exclude_call_id: Optional[UUID] = None
+) -> Select:
+    """Booked calls of ``user_ids`` overlapping [start, end).
+
+    Postgres answers this from the GiST index behind the exclusion
+    constraint; elsewhere the (user_id, scheduled_end) index bounds the scan
+    to bookings that end after ``start``.
+    """
+    start, end = as_utc(start), as_utc(end)
+    stmt = select(
+        CallParticipant.user_id,
+        CallParticipant.call_id,
+        CallParticipant.scheduled_start,
+        CallParticipant.scheduled_end
+    ).where(
+        CallParticipant.user_id.in_(list(user_ids)),
+        CallParticipant.status.in_(BOOKED_STATUSES)
+    )
+    if dialect == "postgresql":
+        booked = func.tstzrange(CallParticipant.scheduled_start, CallParticipant.scheduled_end)
+        stmt = stmt.where(booked.op("&&")(func.tstzrange(start, end)))
+    else:
+        stmt = stmt.where(CallParticipant.scheduled_end > start, CallParticipant.scheduled_start < end)
+    if exclude_call_id is not None:
+        stmt = stmt.where(CallParticipant.call_id != exclude_call_id)
+    return stmt.order_by(CallParticipant.scheduled_start)
+
+def to_bookings(rows) -> List[Booking]:
+    return [Booking(user_id, call_id, as_utc(start), as_utc(end)) for user_id, call_id, start, end in rows]
+
+def index_by_user(bookings: Iterable[Booking]) -> Dict[UUID, IntervalIndex]:
+    grouped: Dict[UUID, List[Booking]] = {}
+    for booking in bookings:
+        grouped.setdefault(booking.user_id, []).append(booking)
+    return {user_id: IntervalIndex(items) for user_id, items in grouped.items()}
+
+def find_conflicts(
+    db: Session,
+    user_ids: Iterable[UUID],
+    start: datetime,
+    end: datetime,
+    exclude_call_id: Optional[UUID] = None
+) -> List[Booking]:
+    """Existing bookings that would overlap a call for ``user_ids`` over [start, end)."""
+    stmt = bookings_query(db.get_bind().dialect.name, user_ids, start, end, exclude_call_id)
+    return to_bookings(db.execute(stmt))
+
+def free_slots(
+    bookings: Iterable[Booking],
+    start: datetime,
+    end: datetime,
+    min_duration: timedelta = timedelta(0)
+) -> List[Tuple[datetime, datetime]]:
+    """Gaps of at least ``min_duration`` in [start, end) not covered by any booking."""
+    start, end = as_utc(start), as_utc(end)
+    slots = []
+    cursor = start
+    for booking in sorted(bookings, key=lambda b: b.start):
+        if booking.start >= end:
+            break
+        if booking.start > cursor and booking.start - cursor >= min_duration:
+            slots.append((cursor, booking.start))
+        cursor = max(cursor, booking.end)
+    if cursor < end and end - cursor >= min_duration:
+        slots.append((cursor, end))
+    return slots
+
+def call_window(scheduled_start: datetime, scheduled_duration: int) -> Tuple[datetime, datetime]:
+    start = as_utc(scheduled_start)
+    return start, start + timedelta(minutes=scheduled_duration)
+
+def is_overlap_violation(exc: IntegrityError) -> bool:
+    """Whether a commit lost a race against the Postgres exclusion constraint."""
+    return OVERLAP_CONSTRAINT in str(exc.orig)
+
+def upcoming_call_participants(db: Session, lead: timedelta, now: Optional[datetime] = None) -> Dict[Optional[str], List[Tuple[str, str]]]:
+    """(room_name, user_id) for every participant of a scheduled call starting
+    within ``lead``, grouped by the call's video provider."""
+    now = as_utc(now or datetime.now(timezone.utc))
+    rows = db.execute(
+        select(VideoCall.video_provider, VideoCall.room_name, CallParticipant.user_id)
+        .join(VideoCall.participants)
+        .where(
+            VideoCall.status == "scheduled",
+            VideoCall.scheduled_start >= now,
+            VideoCall.scheduled_start < now + lead
+        )
+    )
+    grouped: Dict[Optional[str], List[Tuple[str, str]]] = {}
+    for provider, room_name, user_id in rows:
+        grouped.setdefault(provider, []).append((room_name, str(user_id)))
+    return grouped
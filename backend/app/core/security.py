@@ -1,9 +1,86 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, Tuple, TypeVar
 from passlib.context import CryptContext
+from app.config import settings
+from app.core.metrics import Counter, Gauge, Histogram
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+T = TypeVar("T")
+
+# Hashes below the configured cost are flagged by needs_update and upgraded on login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.password_hash_rounds,
+    bcrypt__min_rounds=settings.password_hash_rounds
+)
+
+# bcrypt is CPU-bound, so it gets its own small pool instead of sharing the
+# request threadpool. Slots cover running plus queued jobs; once they are all
+# taken new logins are shed rather than queued indefinitely.
+_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.password_hash_workers,
+    thread_name_prefix="password-hash"
+)
+_hash_slots = threading.BoundedSemaphore(
+    settings.password_hash_workers + settings.password_hash_queue_size
+)
+
+hash_queue_depth = Gauge(
+    "password_hash_queue_depth",
+    "Password hashing jobs running or waiting in the executor"
+)
+hash_rejected = Counter(
+    "password_hash_rejected_total",
+    "Password hashing jobs shed because the executor queue was full"
+)
+
+password_hash_seconds = Histogram(
+    "password_hash_seconds",
+    "CPU time of bcrypt hash and verify calls",
+    ["operation"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 1.0, 2.5)
+)
+
+def _timed(operation: str, func: Callable[..., T], *args) -> T:
+    started = time.perf_counter()
+    try:
+        return func(*args)
+    finally:
+        password_hash_seconds.observe(time.perf_counter() - started, operation=operation)
+
+class HashingQueueFull(Exception):
+    """Raised when the password hashing executor has no free slots."""
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return _timed("verify", pwd_context.verify, plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return _timed("hash", pwd_context.hash, password)
+
+def _release_slot(_future) -> None:
+    hash_queue_depth.dec()
+    _hash_slots.release()
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password on the hashing executor without blocking the event loop.
+
+    Returns ``(valid, new_hash)``; ``new_hash`` is set when the stored hash uses
+    outdated parameters and should be replaced. Raises ``HashingQueueFull``
+    instead of waiting when the executor is saturated.
+    """
+    if not _hash_slots.acquire(blocking=False):
+        hash_rejected.inc()
+        raise HashingQueueFull()
+    hash_queue_depth.inc()
+    try:
+        future = _hash_executor.submit(_timed, "verify", pwd_context.verify_and_update, plain_password, hashed_password)
+    except BaseException:
+        _release_slot(None)
+        raise
+    # On the executor's future, not an asyncio wrapper: a client disconnecting
+    # cancels the await, but the slot stays taken until bcrypt is done with it
+    future.add_done_callback(_release_slot)
+    return await asyncio.wrap_future(future)
@@ -0,0 +1,67 @@
+from datetime import date, datetime, time
+from typing import Any, Generic, Iterable, List, Optional, Type, TypeVar
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, TypeAdapter
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # optional speedup; Starlette's json.dumps is used without it
+
+M = TypeVar("M", bound=BaseModel)
+
+def json_default(value: Any) -> Any:
+    """``default`` for ``json.dumps``: dates and times in ISO 8601, as the API returns them."""
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    return str(value)
+
+class FastJSONResponse(JSONResponse):
+    """Default response class, rendered with orjson when it is installed.
+
+    FastAPI has already reduced the content to JSON-compatible values by the
+    time it is rendered, so the body is the same either way, only cheaper.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if orjson is None:  # pragma: no cover
+            return super().render(content)
+        return orjson.dumps(content)
+
+class ModelSerializer(Generic[M]):
+    """Validate ORM rows into ``model`` and render JSON bytes in one pass.
+
+    Handlers that return ``json_response(serializer.render(row))`` skip
+    FastAPI's second validation against ``response_model`` and its re-encoding
+    of the result; keep ``response_model`` on the route for the OpenAPI schema.
+    """
+
+    def __init__(self, model: Type[M]):
+        self.model = model
+        self._one = TypeAdapter(model)
+        self._many = TypeAdapter(List[model])
+
+    def validate(self, row: Any, **update: Any) -> M:
+        instance = self._one.validate_python(row, from_attributes=True)
+        for name, value in update.items():
+            setattr(instance, name, value)
+        return instance
+
+    def dump(self, instance: M) -> bytes:
+        return self._one.dump_json(instance)
+
+    def render(self, row: Any, **update: Any) -> bytes:
+        return self.dump(self.validate(row, **update))
+
+    def render_many(self, rows: Iterable[Any]) -> bytes:
+        return self._many.dump_json(self._many.validate_python(list(rows), from_attributes=True))
+
+def json_response(body: bytes, response: Optional[Response] = None) -> Response:
+    """A pre-rendered JSON body, keeping any status and headers a handler set
+    on its injected ``response`` (FastAPI drops those for returned Responses)."""
+    status_code = response.status_code if response is not None and response.status_code else 200
+    rendered = Response(content=body, status_code=status_code, media_type="application/json")
+    if response is not None:
+        rendered.raw_headers.extend(response.raw_headers)
+    return rendered
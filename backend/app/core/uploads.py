@@ -0,0 +1,202 @@
+import hashlib
+import uuid
+from dataclasses import dataclass
+from typing import Collection, Dict, List, Optional, Tuple
+from anyio import CancelScope, to_thread
+from fastapi import HTTPException, Request
+from app.core.blobs import BlobStore, BlobWriter
+
+try:
+    from python_multipart.multipart import MultipartParseError, MultipartParser, parse_options_header
+except ImportError:  # pragma: no cover
+    # python-multipart before 0.0.13 only installs the old module name
+    from multipart.multipart import MultipartParseError, MultipartParser, parse_options_header
+
+# Non-file fields are short strings (document type, number, expiry)
+MAX_FIELD_BYTES = 1024
+MAX_FIELDS = 16
+# Headers, boundaries and fields on top of the file, when checking Content-Length up front
+FORM_OVERHEAD_BYTES = 64 * 1024
+
+FILE_SIGNATURES = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"%PDF-", "application/pdf"),
+)
+SNIFF_BYTES = 8
+
+@dataclass(frozen=True)
+class StoredBlob:
+    key: str
+    sha256: str
+    size: int
+    content_type: str
+
+def sniff_content_type(head: bytes) -> Optional[str]:
+    """Type of a file from its leading bytes; the client's Content-Type is not trusted."""
+    for signature, content_type in FILE_SIGNATURES:
+        if head.startswith(signature):
+            return content_type
+    return None
+
+class _Part:
+    __slots__ = ("header_field", "header_value", "headers", "name", "is_file", "data")
+
+    def __init__(self):
+        self.header_field = b""
+        self.header_value = b""
+        self.headers: Dict[bytes, bytes] = {}
+        self.name = ""
+        self.is_file = False
+        self.data = bytearray()
+
+class _FileSink:
+    """Hashes and writes the file part; the writer is opened once the type is known."""
+
+    def __init__(self, store: BlobStore, key: str, max_bytes: int, allowed_types: Collection[str]):
+        self.store = store
+        self.key = key
+        self.max_bytes = max_bytes
+        self.allowed_types = allowed_types
+        self.hasher = hashlib.sha256()
+        self.size = 0
+        self.content_type: Optional[str] = None
+        self.writer: Optional[BlobWriter] = None
+        self.head = b""
+
+    def _check_type(self, head: bytes) -> None:
+        content_type = sniff_content_type(head)
+        if content_type not in self.allowed_types:
+            raise HTTPException(status_code=415, detail=f"Unsupported file type, expected one of: {', '.join(sorted(self.allowed_types))}")
+        self.content_type = content_type
+
+    def _write(self, data: bytes) -> None:
+        # Runs in a worker thread: hashing and blob IO stay off the event loop
+        if self.writer is None:
+            self.writer = self.store.writer(self.key)
+        self.hasher.update(data)
+        self.writer.write(data)
+
+    async def feed(self, data: bytes, final: bool = False) -> None:
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            raise HTTPException(status_code=413, detail=f"File exceeds {self.max_bytes} bytes")
+        if self.content_type is None:
+            # Hold the first few bytes back until the type can be sniffed
+            self.head += data
+            if len(self.head) < SNIFF_BYTES and not final:
+                return
+            self._check_type(self.head)
+            data, self.head = self.head, b""
+        if data:
+            await to_thread.run_sync(self._write, data)
+
+    async def commit(self) -> StoredBlob:
+        if not self.size:
+            raise HTTPException(status_code=400, detail="Empty file")
+        await self.feed(b"", final=True)
+        await to_thread.run_sync(self.writer.commit)
+        return StoredBlob(self.key, self.hasher.hexdigest(), self.size, self.content_type)
+
+    async def abort(self) -> None:
+        if self.writer is not None:
+            await to_thread.run_sync(self.writer.abort)
+
+async def receive_upload(
+    request: Request,
+    file_field: str,
+    store: BlobStore,
+    max_bytes: int,
+    allowed_types: Collection[str],
+    key_prefix: str = ""
+) -> Tuple[Dict[str, str], StoredBlob]:
+    """Parse a multipart/form-data body as it arrives, streaming ``file_field`` into ``store``.
+
+    Only one network chunk of the body is held at a time: file data is
+    hashed and written to the blob store as it is parsed, never buffered
+    whole. Other fields are returned as strings, capped at MAX_FIELD_BYTES.
+    Files over ``max_bytes`` get 413 (up front when Content-Length already
+    says so), and files whose leading bytes are not one of ``allowed_types``
+    get 415. Nothing is left in the store when the upload fails.
+    """
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or not options.get(b"boundary"):
+        raise HTTPException(status_code=415, detail="Expected multipart/form-data")
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > max_bytes + FORM_OVERHEAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"File exceeds {max_bytes} bytes")
+
+    messages: List[Tuple[str, bytes]] = []
+    callbacks = {
+        "on_part_begin": lambda: messages.append(("part_begin", b"")),
+        "on_header_field": lambda data, start, end: messages.append(("header_field", data[start:end])),
+        "on_header_value": lambda data, start, end: messages.append(("header_value", data[start:end])),
+        "on_header_end": lambda: messages.append(("header_end", b"")),
+        "on_headers_finished": lambda: messages.append(("headers_finished", b"")),
+        "on_part_data": lambda data, start, end: messages.append(("part_data", data[start:end])),
+        "on_part_end": lambda: messages.append(("part_end", b"")),
+    }
+    parser = MultipartParser(options[b"boundary"], callbacks)
+    sink = _FileSink(store, f"{key_prefix}{uuid.uuid4().hex}", max_bytes, allowed_types)
+    fields: Dict[str, str] = {}
+    blob: Optional[StoredBlob] = None
+    part = _Part()
+
+    try:
+        async for chunk in request.stream():
+            try:
+                if chunk:
+                    parser.write(chunk)
+                else:
+                    parser.finalize()
+            except MultipartParseError:
+                raise HTTPException(status_code=400, detail="Malformed multipart body")
+            file_data = []
+            for kind, data in messages:
+                if kind == "part_begin":
+                    part = _Part()
+                elif kind == "header_field":
+                    part.header_field += data
+                elif kind == "header_value":
+                    part.header_value += data
+                elif kind == "header_end":
+                    part.headers[part.header_field.lower()] = part.header_value
+                    part.header_field = part.header_value = b""
+                elif kind == "headers_finished":
+                    _, disposition = parse_options_header(part.headers.get(b"content-disposition", b""))
+                    part.name = disposition.get(b"name", b"").decode("utf-8", "replace")
+                    part.is_file = part.name == file_field
+                    if b"filename" in disposition and not part.is_file:
+                        raise HTTPException(status_code=400, detail=f"Unexpected file field: {part.name}")
+                    if part.is_file and (blob is not None or sink.size):
+                        raise HTTPException(status_code=400, detail=f"Only one {file_field} may be uploaded")
+                    if not part.is_file and len(fields) >= MAX_FIELDS:
+                        raise HTTPException(status_code=400, detail="Too many form fields")
+                elif kind == "part_data" and part.is_file:
+                    file_data.append(data)
+                elif kind == "part_data":
+                    part.data += data
+                    if len(part.data) > MAX_FIELD_BYTES:
+                        raise HTTPException(status_code=400, detail=f"Field {part.name} is too long")
+                elif kind == "part_end" and part.is_file:
+                    await sink.feed(b"".join(file_data))
+                    file_data = []
+                    blob = await sink.commit()
+                elif kind == "part_end":
+                    fields[part.name] = part.data.decode("utf-8", "replace")
+            messages.clear()
+            if file_data:
+                await sink.feed(b"".join(file_data))
+    except BaseException:
+        # Also on client disconnect or cancellation, so no partial blob survives
+        with CancelScope(shield=True):
+            if blob is not None:
+                await to_thread.run_sync(store.delete, blob.key)
+            else:
+                await sink.abort()
+        raise
+
+    if blob is None:
+        await sink.abort()
+        raise HTTPException(status_code=400, detail=f"Missing file field: {file_field}")
+    return fields, blob
@@ -0,0 +1,93 @@
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.orm import declarative_base, sessionmaker
+from app.config import settings
+from app.core.instrumentation import instrument_engine
+from app.database.config import db_settings
+from app.database.pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool
+
+def get_database_url() -> URL:
+    url = make_url(db_settings.url or settings.database_url)
+    # Hosted Postgres providers hand out postgres:// URLs, which SQLAlchemy rejects
+    if url.drivername == "postgres":
+        url = url.set(drivername="postgresql")
+    return url
+
+def engine_options(url: URL, is_async: bool = False) -> dict:
+    """Pool and connection options for the engine serving ``url``."""
+    if url.get_backend_name() == "sqlite":
+        return {}
+    options = {
+        "poolclass": InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        "pool_logging_name": "async" if is_async else "sync",
+        "pool_size": db_settings.pool_size,
+        "max_overflow": db_settings.max_overflow,
+        "pool_timeout": db_settings.pool_timeout,
+        "pool_recycle": db_settings.pool_recycle,
+        "pool_pre_ping": db_settings.pool_pre_ping,
+    }
+    connect_args = {}
+    driver = url.get_driver_name()
+    if db_settings.pgbouncer:
+        # PgBouncer in transaction mode can hand each transaction a different
+        # server connection, so prepared statements must not be cached
+        if driver == "asyncpg":
+            connect_args.update(statement_cache_size=0, prepared_statement_cache_size=0)
+        elif driver == "psycopg":
+            connect_args["prepare_threshold"] = None
+    elif db_settings.statement_timeout_ms:
+        if driver == "asyncpg":
+            connect_args["server_settings"] = {"statement_timeout": str(db_settings.statement_timeout_ms)}
+        else:
+            connect_args["options"] = f"-c statement_timeout={db_settings.statement_timeout_ms}"
+    if connect_args:
+        options["connect_args"] = connect_args
+    return options
+
+def _apply_transaction_statement_timeout(engine) -> None:
+    """Set statement_timeout per transaction where startup parameters can't be used."""
+    if not (db_settings.pgbouncer and db_settings.statement_timeout_ms):
+        return
+    if engine.dialect.name != "postgresql":
+        return
+    statement = f"SET LOCAL statement_timeout = {int(db_settings.statement_timeout_ms)}"
+
+    @event.listens_for(engine, "begin")
+    def set_statement_timeout(conn):
+        conn.exec_driver_sql(statement)
+
+database_url = get_database_url()
+engine = create_engine(database_url, **engine_options(database_url))
+_apply_transaction_statement_timeout(engine)
+instrument_engine(engine, "sync")
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+Base = declarative_base()
+
+# Async drivers used when settings.database_async is on and no explicit
+# async_database_url is configured
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+def get_async_database_url() -> URL:
+    if settings.async_database_url:
+        return make_url(settings.async_database_url)
+    backend = database_url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver known for database backend: {backend}")
+    return database_url.set(drivername=ASYNC_DRIVERS[backend])
+
+# The async engine is only built when enabled so sync deployments don't need
+# aiosqlite/asyncpg installed
+async_engine = None
+AsyncSessionLocal = None
+if settings.database_async:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    async_database_url = get_async_database_url()
+    async_engine = create_async_engine(async_database_url, **engine_options(async_database_url, is_async=True))
+    _apply_transaction_statement_timeout(async_engine.sync_engine)
+    instrument_engine(async_engine.sync_engine, "async")
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
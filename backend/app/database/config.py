@@ -1,7 +1,20 @@
+from typing import Optional
 from pydantic_settings import BaseSettings
 
 class DatabaseSettings(BaseSettings):
-    url: str
+    url: Optional[str] = None  # Falls back to settings.database_url
+
+    # Connection pool (ignored for SQLite)
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout: float = 30.0  # seconds to wait for a connection before failing
+    pool_recycle: int = 1800  # seconds; keep below the server/proxy idle timeout
+    pool_pre_ping: bool = True
+
+    statement_timeout_ms: Optional[int] = None
+    # Transaction-pooling PgBouncer: no server-side prepared statements and
+    # no session-level settings
+    pgbouncer: bool = False
 
     class Config:
         env_prefix = "POSTGRES_"
@@ -0,0 +1,28 @@
+-- Replace the JSON-in-Text participant list on video_calls with an indexed
+-- association table. The legacy participant_ids column is kept and written
+-- alongside call_participants so older readers keep working.
+
+CREATE TABLE IF NOT EXISTS call_participants (
+    call_id UUID NOT NULL REFERENCES video_calls(id) ON DELETE CASCADE,
+    user_id UUID NOT NULL REFERENCES users(id),
+    status call_status,
+    scheduled_start TIMESTAMP WITH TIME ZONE,
+    PRIMARY KEY (call_id, user_id)
+);
+
+-- Resident "my calls" lookup
+CREATE INDEX IF NOT EXISTS ix_call_participants_user_status_start
+    ON call_participants (user_id, status, scheduled_start);
+
+-- Staff listing of every call in a given status
+CREATE INDEX IF NOT EXISTS ix_video_calls_status_start
+    ON video_calls (status, scheduled_start);
+
+-- Backfill from the JSON column; skips ids that no longer resolve to a user
+INSERT INTO call_participants (call_id, user_id, status, scheduled_start)
+SELECT vc.id, u.id, vc.status, vc.scheduled_start
+FROM video_calls vc
+CROSS JOIN LATERAL json_array_elements_text(vc.participant_ids::json) AS p(user_id)
+JOIN users u ON u.id = p.user_id::uuid
+WHERE vc.participant_ids IS NOT NULL
+ON CONFLICT (call_id, user_id) DO NOTHING;
@@ -0,0 +1,31 @@
+-- Reject overlapping bookings for the same participant. Each participant row
+-- carries the call's end time so the booked range can be indexed with GiST;
+-- btree_gist provides the equality operator class for user_id.
+--
+-- Resolve existing overlaps first (e.g. cancel duplicates), otherwise adding
+-- the constraint fails.
+
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+
+ALTER TABLE call_participants
+    ADD COLUMN IF NOT EXISTS scheduled_end TIMESTAMP WITH TIME ZONE;
+
+UPDATE call_participants cp
+SET scheduled_end = vc.scheduled_start + make_interval(mins => vc.scheduled_duration)
+FROM video_calls vc
+WHERE vc.id = cp.call_id AND cp.scheduled_end IS NULL;
+
+-- Range scan used by the non-Postgres fallback and by ad hoc reporting
+CREATE INDEX IF NOT EXISTS ix_call_participants_user_end
+    ON call_participants (user_id, scheduled_end);
+
+-- The constraint's backing index takes its name, so a re-run can also report
+-- the duplicate as a relation
+DO $$ BEGIN
+    ALTER TABLE call_participants
+        ADD CONSTRAINT ex_call_participants_no_overlap
+        EXCLUDE USING gist (user_id WITH =, tstzrange(scheduled_start, scheduled_end) WITH &&)
+        WHERE (status IN ('scheduled', 'active'));
+EXCEPTION
+    WHEN duplicate_object OR duplicate_table THEN NULL;
+END $$;
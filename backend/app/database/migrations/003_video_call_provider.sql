@@ -0,0 +1,5 @@
+-- Record which provider instance (see app/providers/registry.py) hosts each
+-- call, so every participant is sent to the same cluster. NULL means the
+-- deployment default, which is what existing calls were created on.
+
+ALTER TABLE video_calls ADD COLUMN IF NOT EXISTS video_provider VARCHAR;
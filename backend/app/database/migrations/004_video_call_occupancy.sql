@@ -0,0 +1,4 @@
+-- Connected participant count per call, driven by LiveKit webhooks.
+
+ALTER TABLE video_calls
+    ADD COLUMN IF NOT EXISTS connected_participants INTEGER NOT NULL DEFAULT 0;
@@ -0,0 +1,9 @@
+-- Approved-contact lookups walk both directions of the contact graph, and
+-- the pending-requests page filters on (contact_id, status) ordered by
+-- created_at. Neither was indexed.
+
+CREATE INDEX IF NOT EXISTS ix_contacts_contact_status_created
+    ON contacts (contact_id, status, created_at);
+
+CREATE INDEX IF NOT EXISTS ix_contacts_requestor_status
+    ON contacts (requestor_id, status);
@@ -0,0 +1,31 @@
+-- Transactional outbox for verification and other mail, drained in batches
+-- by the email outbox sender (app/core/outbox.py).
+
+DO $$ BEGIN
+    CREATE TYPE email_status AS ENUM ('pending', 'sent', 'failed');
+EXCEPTION
+    WHEN duplicate_object THEN NULL;
+END $$;
+
+CREATE TABLE IF NOT EXISTS email_outbox (
+    id UUID PRIMARY KEY,
+    email VARCHAR NOT NULL,
+    kind VARCHAR NOT NULL,
+    subject VARCHAR NOT NULL,
+    body TEXT NOT NULL,
+    status email_status NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    last_error TEXT,
+    sent_at TIMESTAMP WITH TIME ZONE,
+    created_at TIMESTAMP WITH TIME ZONE,
+    updated_at TIMESTAMP WITH TIME ZONE
+);
+
+-- Due pending messages, oldest first
+CREATE INDEX IF NOT EXISTS ix_email_outbox_status_next_attempt
+    ON email_outbox (status, next_attempt_at);
+
+-- Deduplicates queued mail: one pending message per (email, kind)
+CREATE UNIQUE INDEX IF NOT EXISTS uq_email_outbox_pending
+    ON email_outbox (email, kind) WHERE status = 'pending';
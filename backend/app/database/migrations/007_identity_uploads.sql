@@ -0,0 +1,30 @@
+-- Registration now keeps what the applicant submitted: contact details on
+-- the user, and a row per uploaded identity document so files in the blob
+-- store are either claimed by a user or swept once their draft expires
+-- (app/core/identity_uploads.py).
+
+ALTER TABLE users ADD COLUMN IF NOT EXISTS phone VARCHAR;
+ALTER TABLE users ADD COLUMN IF NOT EXISTS address VARCHAR;
+
+CREATE TABLE IF NOT EXISTS identity_uploads (
+    id UUID PRIMARY KEY,
+    registration_id VARCHAR NOT NULL,
+    user_id UUID REFERENCES users(id),
+    blob_key VARCHAR NOT NULL UNIQUE,
+    sha256 VARCHAR NOT NULL,
+    size INTEGER NOT NULL,
+    content_type VARCHAR NOT NULL,
+    id_type VARCHAR NOT NULL,
+    id_number VARCHAR NOT NULL,
+    id_expiry VARCHAR NOT NULL,
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE,
+    updated_at TIMESTAMP WITH TIME ZONE
+);
+
+CREATE INDEX IF NOT EXISTS ix_identity_uploads_registration_id ON identity_uploads (registration_id);
+CREATE INDEX IF NOT EXISTS ix_identity_uploads_user_id ON identity_uploads (user_id);
+
+-- Unclaimed uploads by draft expiry, for the sweeper
+CREATE INDEX IF NOT EXISTS ix_identity_uploads_unclaimed
+    ON identity_uploads (expires_at) WHERE user_id IS NULL;
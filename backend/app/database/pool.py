@@ -0,0 +1,49 @@
+import time
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from app.core.metrics import Counter, Gauge, Histogram
+
+pool_checkout_wait = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled connection",
+    ["pool"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+)
+pool_exhausted = Counter(
+    "db_pool_exhausted_total",
+    "Checkouts that timed out because every pooled connection was in use",
+    ["pool"]
+)
+pool_checked_out = Gauge(
+    "db_pool_checked_out",
+    "Connections currently checked out of the pool",
+    ["pool"]
+)
+
+class _InstrumentedPoolMixin:
+    """Record checkout wait time and exhaustion for a QueuePool."""
+
+    def _metrics_label(self) -> str:
+        return self.logging_name or "default"
+
+    def _do_get(self):
+        label = self._metrics_label()
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            pool_exhausted.inc(pool=label)
+            raise
+        finally:
+            pool_checkout_wait.observe(time.perf_counter() - start, pool=label)
+            pool_checked_out.set(self.checkedout(), pool=label)
+
+    def _do_return_conn(self, record):
+        super()._do_return_conn(record)
+        pool_checked_out.set(self.checkedout(), pool=self._metrics_label())
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
@@ -1,10 +1,71 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from app.routers import auth, registration, contacts, facilities, calls
+from app.config import settings
+from app.core.events import event_bus, start_backplane, stop_backplane
+from app.core.instrumentation import MetricsMiddleware
+from app.core.outbox import EmailOutboxSender
+from app.core.profiler import QueryProfilerMiddleware
+from app.core.ratelimit import RateLimitMiddleware
+from app.core.serialization import FastJSONResponse
+from app.core.room_events import room_event_worker
+from app.core.scheduler import CallScheduler
+from app.providers.registry import registry
+from app.routers import auth, registration, contacts, facilities, calls, webhooks, events, metrics
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    room_event_worker.start()
+    start_backplane(event_bus)
+    scheduler = CallScheduler() if settings.scheduler_enabled else None
+    if scheduler:
+        scheduler.start()
+    email_sender = EmailOutboxSender() if settings.email_outbox_enabled else None
+    if email_sender:
+        email_sender.start()
+    collector = metrics.get_collector() if settings.metrics_enabled else None
+    flusher = asyncio.create_task(collector.run(settings.metrics_flush_interval_seconds)) if collector else None
+    yield
+    if scheduler:
+        await scheduler.stop()
+    if email_sender:
+        await email_sender.stop()
+    if flusher:
+        flusher.cancel()
+        await asyncio.gather(flusher, return_exceptions=True)
+    await room_event_worker.stop()
+    stop_backplane(event_bus)
+    # Drain pooled provider HTTP connections
+    await registry.aclose()
+
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
+
+if settings.query_profiler_enabled:
+    app.add_middleware(QueryProfilerMiddleware)
+if settings.rate_limit_enabled:
+    app.add_middleware(RateLimitMiddleware)
+if settings.metrics_enabled:
+    # Added last so it is outermost and also times rate-limited requests
+    app.add_middleware(MetricsMiddleware)
+
+if settings.database_async:
+    from app.routers.aio import calls as async_calls
+    from app.routers.aio import contacts as async_contacts
+    from app.routers.aio import facilities as async_facilities
+
+    # Registered ahead of the sync routers so matching paths resolve to the
+    # async handlers; anything without an async version falls through.
+    app.include_router(async_contacts.router, prefix="/api/contacts", tags=["contacts"])
+    app.include_router(async_facilities.router, prefix="/api/facilities", tags=["facilities"])
+    app.include_router(async_calls.router, prefix="/api/calls", tags=["calls"])
 
 app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
 app.include_router(registration.router, prefix="/api/registration", tags=["registration"])
 app.include_router(contacts.router, prefix="/api/contacts", tags=["contacts"])
 app.include_router(facilities.router, prefix="/api/facilities", tags=["facilities"])
 app.include_router(calls.router, prefix="/api/calls", tags=["calls"])
+app.include_router(webhooks.router, prefix="/api/webhooks", tags=["webhooks"])
+app.include_router(events.router, prefix="/api/events", tags=["events"])
+
+if settings.metrics_enabled:
+    app.include_router(metrics.router, tags=["metrics"])
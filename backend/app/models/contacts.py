@@ -1,7 +1,7 @@
 from uuid import uuid4
-from sqlalchemy import Column, String, Enum, ForeignKey
+from sqlalchemy import Column, String, Enum, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy import orm
 from app.database import Base
 from app.models.base import TimestampMixin
 
@@ -13,5 +13,12 @@ class Contact(Base, TimestampMixin):
     relationship = Column(String)
     status = Column(Enum('pending', 'approved', 'rejected', name='contact_status'))
     
-    requestor = relationship("User", foreign_keys=[requestor_id], back_populates="outgoing_contacts")
-    contact = relationship("User", foreign_keys=[contact_id], back_populates="incoming_contacts")
+    requestor = orm.relationship("User", foreign_keys=[requestor_id], back_populates="outgoing_contacts")
+    contact = orm.relationship("User", foreign_keys=[contact_id], back_populates="incoming_contacts")
+
+    __table_args__ = (
+        # Incoming side of the contact graph, and the pending-requests page
+        # (status = 'pending' ordered by created_at, id)
+        Index('ix_contacts_contact_status_created', 'contact_id', 'status', 'created_at'),
+        Index('ix_contacts_requestor_status', 'requestor_id', 'status'),
+    )
@@ -0,0 +1,35 @@
+from datetime import datetime, timezone
+from uuid import uuid4
+from sqlalchemy import Column, String, Enum, DateTime, Integer, Text, Index, text
+from sqlalchemy.dialects.postgresql import UUID
+from app.database import Base
+from app.models.base import TimestampMixin
+
+class EmailOutbox(Base, TimestampMixin):
+    """Outgoing email, written in the transaction that caused it and sent later.
+
+    At most one pending message per (email, kind): queueing another while
+    one is still waiting replaces its subject and body and makes it due
+    straight away. Sent and failed rows are kept as history.
+    """
+    __tablename__ = "email_outbox"
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
+    email = Column(String, nullable=False)
+    kind = Column(String, nullable=False)  # e.g. "email_verification"
+    subject = Column(String, nullable=False)
+    body = Column(Text, nullable=False)
+    status = Column(Enum('pending', 'sent', 'failed', name='email_status'), nullable=False, default='pending')
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+    last_error = Column(Text)
+    sent_at = Column(DateTime(timezone=True))
+
+    __table_args__ = (
+        # The sender's queue: due pending messages, oldest first
+        Index('ix_email_outbox_status_next_attempt', 'status', 'next_attempt_at'),
+        Index(
+            'uq_email_outbox_pending', 'email', 'kind', unique=True,
+            postgresql_where=text("status = 'pending'"),
+            sqlite_where=text("status = 'pending'")
+        ),
+    )
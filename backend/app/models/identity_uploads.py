@@ -0,0 +1,35 @@
+from uuid import uuid4
+from sqlalchemy import Column, String, DateTime, Integer, ForeignKey, Index, text
+from sqlalchemy.dialects.postgresql import UUID
+from app.database import Base
+from app.models.base import TimestampMixin
+
+class IdentityUpload(Base, TimestampMixin):
+    """An identity document in the blob store and the details submitted with it.
+
+    Written when the file is uploaded, so every stored file is tracked.
+    Completing the registration claims the draft's current upload for the new
+    user; unclaimed uploads are deleted, blob and row, once their draft has
+    expired (see app/core/identity_uploads.py).
+    """
+    __tablename__ = "identity_uploads"
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
+    registration_id = Column(String, nullable=False, index=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey('users.id'), index=True)  # NULL until claimed
+    blob_key = Column(String, nullable=False, unique=True)
+    sha256 = Column(String, nullable=False)
+    size = Column(Integer, nullable=False)
+    content_type = Column(String, nullable=False)
+    id_type = Column(String, nullable=False)
+    id_number = Column(String, nullable=False)
+    id_expiry = Column(String, nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)  # the draft's expiry
+
+    __table_args__ = (
+        # The sweeper's queue: unclaimed uploads by draft expiry
+        Index(
+            'ix_identity_uploads_unclaimed', 'expires_at',
+            postgresql_where=text("user_id IS NULL"),
+            sqlite_where=text("user_id IS NULL")
+        ),
+    )
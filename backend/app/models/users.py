@@ -12,6 +12,8 @@ class User(Base, TimestampMixin):
     hashed_password = Column(String)
     role = Column(Enum('resident', 'visitor', 'attorney', 'staff', name='user_role'))
     name = Column(String)
+    phone = Column(String)
+    address = Column(String)
     status = Column(Enum('pending', 'approved', 'rejected', name='user_status'))
     facility_id = Column(UUID(as_uuid=True), ForeignKey('facilities.id'))
     
@@ -1,25 +1,72 @@
-from uuid import uuid4, UUID
+from datetime import timedelta
+from functools import lru_cache
+from uuid import uuid4, UUID as PyUUID
 import json
-from sqlalchemy import Column, String, Enum, ForeignKey, DateTime, Boolean, Integer, Text
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, Enum, ForeignKey, DateTime, Boolean, Integer, Text, Index, DDL, event, func, insert, select, update
+from sqlalchemy.dialects.postgresql import UUID, ExcludeConstraint
 from sqlalchemy.orm import relationship
 from app.database import Base
 from app.models.base import TimestampMixin
 
+call_status = Enum('scheduled', 'active', 'completed', 'cancelled', name='call_status')
+
+# Statuses that occupy a participant's time
+BOOKED_STATUSES = ('scheduled', 'active')
+OVERLAP_CONSTRAINT = 'ex_call_participants_no_overlap'
+
+@lru_cache(maxsize=4096)
+def _decode_participant_ids(raw: str) -> tuple:
+    # Legacy rows may hold non-canonical UUID strings, so normalize once per distinct value
+    return tuple(str(PyUUID(id_str)) for id_str in json.loads(raw))
+
+def scheduled_end_for(scheduled_start, scheduled_duration):
+    if scheduled_start is None or scheduled_duration is None:
+        return None
+    return scheduled_start + timedelta(minutes=scheduled_duration)
+
+class CallParticipant(Base):
+    """Association row linking a user to a call.
+
+    ``status``, ``scheduled_start`` and ``scheduled_end`` are copied from the
+    parent call so the per-user "my calls" lookup and overlap checks can be
+    answered from composite indexes on this table alone.
+    """
+    __tablename__ = "call_participants"
+    call_id = Column(UUID(as_uuid=True), ForeignKey('video_calls.id', ondelete='CASCADE'), primary_key=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey('users.id'), primary_key=True)
+    status = Column(call_status)
+    scheduled_start = Column(DateTime(timezone=True))
+    scheduled_end = Column(DateTime(timezone=True))
+
+    call = relationship("VideoCall", back_populates="participants")
+
+    __table_args__ = (
+        Index('ix_call_participants_user_status_start', 'user_id', 'status', 'scheduled_start'),
+        Index('ix_call_participants_user_end', 'user_id', 'scheduled_end'),
+    )
+
 class VideoCall(Base, TimestampMixin):
     __tablename__ = "video_calls"
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
     creator_id = Column(UUID(as_uuid=True), ForeignKey('users.id'))
     room_name = Column(String, unique=True)
-    status = Column(Enum('scheduled', 'active', 'completed', 'cancelled', name='call_status'))
+    status = Column(call_status)
     scheduled_start = Column(DateTime(timezone=True))
     scheduled_duration = Column(Integer)  # Duration in minutes
     max_participants = Column(Integer)
-    _participant_ids = Column('participant_ids', Text)  # Store as JSON string
-    
+    _participant_ids = Column('participant_ids', Text)  # Store as JSON string, mirrored in call_participants
+    video_provider = Column(String)  # provider registry name, fixed at creation; None is the default
+
     # Core recording fields (no security features)
     recording_enabled = Column(Boolean, default=False)
     recording_status = Column(Enum('inactive', 'active', 'paused', 'completed', name='recording_status'))
+    connected_participants = Column(Integer, default=0, nullable=False)  # as last reported by the media server
+
+    participants = relationship("CallParticipant", back_populates="call", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        Index('ix_video_calls_status_start', 'status', 'scheduled_start'),
+    )
 
     def dict(self):
         """Convert model to dict for response."""
@@ -34,19 +81,126 @@ class VideoCall(Base, TimestampMixin):
             "participant_ids": self.participant_ids,
             "recording_enabled": self.recording_enabled,
             "recording_status": self.recording_status,
+            "connected_participants": self.connected_participants,
             "created_at": self.created_at,
             "updated_at": self.updated_at
         }
 
+    @staticmethod
+    def encode_participant_ids(user_ids) -> str:
+        """Legacy participant_ids column value, for bulk inserts that bypass the setter."""
+        return json.dumps([str(id) for id in user_ids])
+
+    @staticmethod
+    def decode_participant_ids(raw) -> list:
+        """Participant id strings from a legacy participant_ids column value."""
+        return [] if raw is None else list(_decode_participant_ids(raw))
+
     @property
     def participant_ids(self):
-        if self._participant_ids is None:
-            return []
-        return [str(UUID(id_str)) for id_str in json.loads(self._participant_ids)]
-    
+        return self.decode_participant_ids(self._participant_ids)
+
     @participant_ids.setter
     def participant_ids(self, value):
         if value is None:
             self._participant_ids = None
-        else:
-            self._participant_ids = json.dumps([str(id) for id in value])
+            self.participants = []
+            return
+        user_ids = list(dict.fromkeys(PyUUID(str(id)) for id in value))
+        self._participant_ids = self.encode_participant_ids(user_ids)
+        scheduled_end = scheduled_end_for(self.scheduled_start, self.scheduled_duration)
+        self.participants = [
+            CallParticipant(
+                user_id=user_id,
+                status=self.status,
+                scheduled_start=self.scheduled_start,
+                scheduled_end=scheduled_end
+            )
+            for user_id in user_ids
+        ]
+
+# Postgres rejects overlapping bookings for the same participant outright;
+# other databases rely on app.core.scheduling checking before insert.
+CallParticipant.__table__.append_constraint(
+    ExcludeConstraint(
+        (CallParticipant.user_id, '='),
+        (func.tstzrange(CallParticipant.scheduled_start, CallParticipant.scheduled_end), '&&'),
+        name=OVERLAP_CONSTRAINT,
+        using='gist',
+        where=CallParticipant.status.in_(BOOKED_STATUSES)
+    ).ddl_if(dialect='postgresql')
+)
+event.listen(
+    CallParticipant.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS btree_gist").execute_if(dialect='postgresql')
+)
+
+@event.listens_for(VideoCall.status, "set")
+def _sync_participant_status(target, value, oldvalue, initiator):
+    for participant in target.participants:
+        participant.status = value
+
+@event.listens_for(VideoCall.scheduled_start, "set")
+def _sync_participant_start(target, value, oldvalue, initiator):
+    scheduled_end = scheduled_end_for(value, target.scheduled_duration)
+    for participant in target.participants:
+        participant.scheduled_start = value
+        participant.scheduled_end = scheduled_end
+
+@event.listens_for(VideoCall.scheduled_duration, "set")
+def _sync_participant_end(target, value, oldvalue, initiator):
+    scheduled_end = scheduled_end_for(target.scheduled_start, value)
+    for participant in target.participants:
+        participant.scheduled_end = scheduled_end
+
+def set_call_status(db, call_ids, status: str, from_statuses) -> int:
+    """Bulk status change for ``call_ids`` (a list or a select of ids) that
+    are currently in one of ``from_statuses``; returns calls changed.
+
+    call_participants is updated explicitly because bulk UPDATEs bypass the
+    attribute events that normally keep it in sync.
+    """
+    from_statuses = list(from_statuses)
+    db.execute(
+        update(CallParticipant)
+        .where(CallParticipant.call_id.in_(call_ids), CallParticipant.status.in_(from_statuses))
+        .values(status=status)
+    )
+    result = db.execute(
+        update(VideoCall)
+        .where(VideoCall.id.in_(call_ids), VideoCall.status.in_(from_statuses))
+        .values(status=status)
+    )
+    return result.rowcount
+
+def backfill_call_participants(db, batch_size: int = 1000) -> int:
+    """Populate call_participants from the legacy JSON column.
+
+    Postgres deployments should run ``app/database/migrations/001_call_participants.sql``
+    instead; this helper covers SQLite and other dev databases. Calls that already
+    have participant rows are skipped, so it is safe to re-run.
+    """
+    already_linked = select(CallParticipant.call_id).distinct()
+    rows = db.execute(
+        select(VideoCall.id, VideoCall.status, VideoCall.scheduled_start, VideoCall.scheduled_duration, VideoCall._participant_ids)
+        .where(VideoCall._participant_ids.is_not(None), VideoCall.id.not_in(already_linked))
+        .execution_options(yield_per=batch_size)
+    )
+    inserted = 0
+    for partition in rows.partitions():
+        batch = []
+        for call_id, status, scheduled_start, scheduled_duration, raw_ids in partition:
+            for id_str in dict.fromkeys(json.loads(raw_ids)):
+                batch.append({
+                    "call_id": call_id,
+                    "user_id": PyUUID(id_str),
+                    "status": status,
+                    "scheduled_start": scheduled_start,
+                    "scheduled_end": scheduled_end_for(scheduled_start, scheduled_duration),
+                })
+        if batch:
+            db.execute(insert(CallParticipant), batch)
+            inserted += len(batch)
+    db.commit()
+    return inserted
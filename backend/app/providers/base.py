@@ -0,0 +1,91 @@
+from abc import ABC, abstractmethod
+from datetime import timedelta
+from typing import Iterable, List, Optional, Tuple
+import httpx
+from app.config import settings
+
+DEFAULT_TOKEN_TTL = timedelta(hours=2)
+
+class ProviderError(Exception):
+    """A video provider is unknown, misconfigured or failed a request."""
+
+class UnknownProviderError(ProviderError):
+    """No provider is configured under a name, e.g. one removed after calls were placed on it."""
+
+class VideoProvider(ABC):
+    """A video backend calls can be placed on.
+
+    Minting a room token is local signing (and cached), so it is synchronous
+    and safe to call from sync and async routes alike. Room management goes
+    over the network and is async.
+    """
+
+    # URL clients connect to, when it differs per provider instance
+    server_url: Optional[str] = None
+
+    def __init__(self, name: str):
+        self.name = name
+
+    @abstractmethod
+    def mint_token(self, room_name: str, identity: str, *, ttl: timedelta = DEFAULT_TOKEN_TTL) -> str:
+        ...
+
+    def premint(self, participants: Iterable[Tuple[str, str]]) -> int:
+        """Warm the token cache for (room_name, identity) pairs."""
+        count = 0
+        for room_name, identity in participants:
+            self.mint_token(room_name, identity)
+            count += 1
+        return count
+
+    @abstractmethod
+    async def create_room(self, room_name: str, *, max_participants: Optional[int] = None) -> None:
+        ...
+
+    @abstractmethod
+    async def close_room(self, room_name: str) -> None:
+        ...
+
+    @abstractmethod
+    async def list_participants(self, room_name: str) -> List[str]:
+        """Identities currently connected to the room."""
+
+    async def aclose(self) -> None:
+        """Release connections held by the provider."""
+
+class HTTPVideoProvider(VideoProvider):
+    """Provider whose room API is reached over one pooled, keep-alive HTTP client."""
+
+    def __init__(self, name: str, base_url: str, auth: Optional[Tuple[str, str]] = None):
+        super().__init__(name)
+        self.base_url = base_url.rstrip("/")
+        self.auth = auth
+        self._http: Optional[httpx.AsyncClient] = None
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        # Created lazily so it binds to the serving event loop
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                base_url=self.base_url,
+                auth=self.auth,
+                timeout=settings.video_provider_timeout_seconds,
+                limits=httpx.Limits(
+                    max_connections=settings.video_provider_max_connections,
+                    max_keepalive_connections=settings.video_provider_max_connections
+                )
+            )
+        return self._http
+
+    async def request(self, method: str, path: str, **kwargs) -> dict:
+        try:
+            response = await self.http.request(method, path, **kwargs)
+            response.raise_for_status()
+        except httpx.HTTPError as exc:
+            raise ProviderError(f"{self.name}: {method} {path} failed: {exc}") from exc
+        return response.json() if response.content else {}
+
+    async def aclose(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
@@ -0,0 +1,44 @@
+import threading
+from datetime import timedelta
+from typing import Dict, List, Optional, Set
+from app.providers.base import DEFAULT_TOKEN_TTL, ProviderError, VideoProvider
+
+class FakeProvider(VideoProvider):
+    """In-process provider for tests and benchmarks.
+
+    Rooms live in a dict and tokens are unsigned strings; ``connect`` and
+    ``disconnect`` stand in for clients joining the room.
+    """
+
+    def __init__(self, name: str = "fake"):
+        super().__init__(name)
+        self.rooms: Dict[str, Set[str]] = {}
+        self.minted = 0
+        self._lock = threading.Lock()
+
+    def mint_token(self, room_name: str, identity: str, *, ttl: timedelta = DEFAULT_TOKEN_TTL) -> str:
+        with self._lock:
+            self.minted += 1
+        return f"fake_token_{room_name}_{identity}"
+
+    async def create_room(self, room_name: str, *, max_participants: Optional[int] = None) -> None:
+        with self._lock:
+            self.rooms.setdefault(room_name, set())
+
+    async def close_room(self, room_name: str) -> None:
+        with self._lock:
+            self.rooms.pop(room_name, None)
+
+    async def list_participants(self, room_name: str) -> List[str]:
+        with self._lock:
+            if room_name not in self.rooms:
+                raise ProviderError(f"{self.name}: room not found: {room_name}")
+            return sorted(self.rooms[room_name])
+
+    def connect(self, room_name: str, identity: str) -> None:
+        with self._lock:
+            self.rooms.setdefault(room_name, set()).add(identity)
+
+    def disconnect(self, room_name: str, identity: str) -> None:
+        with self._lock:
+            self.rooms.get(room_name, set()).discard(identity)
@@ -1,6 +1,13 @@
-from datetime import timedelta, datetime
-import os
-from typing import Optional
+import base64
+import hashlib
+import hmac
+import json
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+from jose import JWTError, jwt
+from app.config import settings
+from app.providers.base import DEFAULT_TOKEN_TTL, HTTPVideoProvider, ProviderError
+from app.providers.tokens import RoomTokenCache, grant_key
 
 try:
     from livekit import AccessToken, VideoGrant  # type: ignore
@@ -24,25 +31,92 @@ except ImportError:  # pragma: no cover
         def grants(self):
             return {}
 
+ADMIN_TOKEN_TTL = timedelta(minutes=1)
 
-def generate_room_token(room_name: str, user_id: str, *, ttl_hours: int = 2) -> str:
-    """Generate a LiveKit JWT for the given room and user.
+class LiveKitProvider(HTTPVideoProvider):
+    """One LiveKit cluster; credentials are fixed when the registry builds it."""
 
-    If the LIVEKIT_API_KEY or LIVEKIT_API_SECRET environment variables are not
-    configured, a deterministic mock token is returned. This allows the rest of
-    the application to function in local development or CI where LiveKit isn't
-    available.
-    """
-    api_key: Optional[str] = os.getenv("LIVEKIT_API_KEY")
-    api_secret: Optional[str] = os.getenv("LIVEKIT_API_SECRET")
+    def __init__(self, name: str, url: str, api_key: Optional[str], api_secret: Optional[str]):
+        super().__init__(name, url)
+        self.server_url = self.base_url
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.tokens = RoomTokenCache(
+            name,
+            maxsize=settings.room_token_cache_size,
+            margin=timedelta(seconds=settings.room_token_refresh_margin_seconds)
+        )
 
-    # Return a mock token if credentials are missing (e.g., running tests)
-    if not api_key or not api_secret:
-        return f"mock_livekit_token_{room_name}_{user_id}"
+    @property
+    def configured(self) -> bool:
+        return bool(self.api_key and self.api_secret)
 
-    grant = VideoGrant(room_join=True, room=room_name)
-    token = AccessToken(api_key, api_secret, identity=user_id)
-    token.video = grant
-    token.ttl = timedelta(hours=ttl_hours)
-    jwt = token.to_jwt()
-    return jwt
+    def mint_token(self, room_name: str, identity: str, *, ttl: timedelta = DEFAULT_TOKEN_TTL) -> str:
+        """Generate a LiveKit JWT for the given room and user.
+
+        Tokens are cached per (room, user, grant) and reused until shortly
+        before they expire. If the API key or secret is not configured, a
+        deterministic mock token is returned. This allows the rest of the
+        application to function in local development or CI where LiveKit
+        isn't available.
+        """
+        # Return a mock token if credentials are missing (e.g., running tests)
+        if not self.configured:
+            return f"mock_livekit_token_{room_name}_{identity}"
+
+        grant = grant_key({"room_join": True, "room": room_name})
+        return self.tokens.get_or_mint(room_name, identity, grant, ttl, lambda: self._mint(room_name, identity, ttl))
+
+    def _mint(self, room_name: str, identity: str, ttl: timedelta) -> str:
+        token = AccessToken(self.api_key, self.api_secret, identity=identity)
+        token.video = VideoGrant(room_join=True, room=room_name)
+        token.ttl = ttl
+        return token.to_jwt()
+
+    def _admin_token(self, room_name: str) -> str:
+        """Short-lived server token for the RoomService API."""
+        now = datetime.now(timezone.utc)
+        claims = {
+            "iss": self.api_key,
+            "nbf": int(now.timestamp()),
+            "exp": int((now + ADMIN_TOKEN_TTL).timestamp()),
+            "video": {"roomCreate": True, "roomList": True, "roomAdmin": True, "room": room_name}
+        }
+        return jwt.encode(claims, self.api_secret, algorithm="HS256")
+
+    async def _room_service(self, method: str, room_name: str, payload: dict) -> dict:
+        if not self.configured:
+            raise ProviderError(f"{self.name}: LiveKit credentials are not configured")
+        return await self.request(
+            "POST",
+            f"/twirp/livekit.RoomService/{method}",
+            json=payload,
+            headers={"Authorization": f"Bearer {self._admin_token(room_name)}"}
+        )
+
+    async def create_room(self, room_name: str, *, max_participants: Optional[int] = None) -> None:
+        await self._room_service("CreateRoom", room_name, {"name": room_name, "max_participants": max_participants or 0})
+
+    async def close_room(self, room_name: str) -> None:
+        await self._room_service("DeleteRoom", room_name, {"room": room_name})
+
+    async def list_participants(self, room_name: str) -> List[str]:
+        data = await self._room_service("ListParticipants", room_name, {"room": room_name})
+        return [participant["identity"] for participant in data.get("participants", [])]
+
+    def verify_webhook(self, body: bytes, authorization: str) -> dict:
+        """Parse a webhook sent by this cluster.
+
+        LiveKit signs a JWT with the API secret whose ``sha256`` claim is the
+        base64 digest of the body; ProviderError if either doesn't check out.
+        """
+        if not self.configured:
+            raise ProviderError(f"{self.name}: LiveKit credentials are not configured")
+        try:
+            claims = jwt.decode(authorization, self.api_secret, algorithms=["HS256"], issuer=self.api_key)
+        except JWTError as exc:
+            raise ProviderError(f"{self.name}: invalid webhook signature") from exc
+        digest = base64.b64encode(hashlib.sha256(body).digest()).decode()
+        if not hmac.compare_digest(str(claims.get("sha256", "")), digest):
+            raise ProviderError(f"{self.name}: webhook body does not match its signature")
+        return json.loads(body)
@@ -0,0 +1,92 @@
+import threading
+from typing import Any, Callable, Dict, List, Optional
+from app.config import settings
+from app.providers.base import UnknownProviderError, VideoProvider
+from app.providers.fake import FakeProvider
+from app.providers.livekit import LiveKitProvider
+from app.providers.twilio import TwilioProvider
+
+ProviderFactory = Callable[[str, Dict[str, Any]], VideoProvider]
+
+PROVIDER_TYPES: Dict[str, ProviderFactory] = {
+    "livekit": lambda name, config: LiveKitProvider(name, config["url"], config.get("api_key"), config.get("api_secret")),
+    "twilio": lambda name, config: TwilioProvider(name, config["api_key_sid"], config["api_key_secret"]),
+    "fake": lambda name, config: FakeProvider(name),
+}
+
+def register_provider_type(type_name: str, factory: ProviderFactory) -> None:
+    PROVIDER_TYPES[type_name] = factory
+
+class ProviderRegistry:
+    """Named provider instances, built on first use and shared by every request.
+
+    Each name maps to a config dict with a ``type`` (a key of PROVIDER_TYPES)
+    plus that type's options, so several instances of one type (e.g. one per
+    LiveKit cluster) can coexist. Facilities pick one by name via
+    ``FacilitySettings.video_provider``.
+    """
+
+    def __init__(self, configs: Dict[str, Dict[str, Any]], default: str):
+        self.configs = configs
+        self.default = default
+        self._providers: Dict[str, VideoProvider] = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.configs or name in self._providers
+
+    def get(self, name: Optional[str] = None) -> VideoProvider:
+        name = name or self.default
+        provider = self._providers.get(name)
+        if provider is None:
+            with self._lock:
+                provider = self._providers.get(name)
+                if provider is None:
+                    config = self.configs.get(name)
+                    if config is None:
+                        raise UnknownProviderError(f"Unknown video provider: {name}")
+                    factory = PROVIDER_TYPES.get(config.get("type", name))
+                    if factory is None:
+                        raise UnknownProviderError(f"Unknown video provider type: {config.get('type', name)}")
+                    provider = self._providers[name] = factory(name, config)
+        return provider
+
+    def all(self) -> List[VideoProvider]:
+        """Every configured provider, building any not used yet."""
+        for name in list(self.configs):
+            self.get(name)
+        return list(self._providers.values())
+
+    def for_facility(self, facility_settings: Optional[dict]) -> VideoProvider:
+        """Provider a facility's calls are placed on; the default when unset."""
+        return self.get((facility_settings or {}).get("video_provider"))
+
+    def register(self, provider: VideoProvider) -> None:
+        """Install a ready-made instance, e.g. a FakeProvider in tests."""
+        with self._lock:
+            self._providers[provider.name] = provider
+
+    async def aclose(self) -> None:
+        for provider in list(self._providers.values()):
+            await provider.aclose()
+
+def default_configs() -> Dict[str, Dict[str, Any]]:
+    """The single-cluster setup from LIVEKIT_*/TWILIO_*, extended by VIDEO_PROVIDERS."""
+    configs = {
+        "livekit": {
+            "type": "livekit",
+            "url": str(settings.livekit_url),
+            "api_key": settings.livekit_api_key,
+            "api_secret": settings.livekit_api_secret
+        },
+        "twilio": {
+            "type": "twilio",
+            "api_key_sid": settings.twilio_api_key_sid,
+            "api_key_secret": settings.twilio_api_key_secret
+        },
+        "fake": {"type": "fake"},
+    }
+    configs.update(settings.video_providers)
+    return configs
+
+registry = ProviderRegistry(default_configs(), default=settings.video_provider.lower())
@@ -0,0 +1,81 @@
+import threading
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import Callable, Dict, Hashable, Iterator
+from app.core.cache import TTLCache
+from app.core.metrics import Counter, Histogram
+
+room_tokens_minted = Counter(
+    "room_tokens_minted_total",
+    "Room tokens signed by a video provider",
+    ["provider"]
+)
+room_token_mint_seconds = Histogram(
+    "room_token_mint_seconds",
+    "Time to sign a room token",
+    ["provider"],
+    buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05)
+)
+room_token_cache_hits = Counter(
+    "room_token_cache_hits_total",
+    "Room token requests served from the token cache",
+    ["provider"]
+)
+
+def grant_key(grant: dict) -> tuple:
+    """Hashable form of a grant dict, for use in cache keys."""
+    return tuple(sorted(grant.items()))
+
+class RoomTokenCache:
+    """Signed room tokens, reused until ``margin`` before they expire.
+
+    Keyed by (room, identity, grant) so a participant reconnecting to the
+    same room gets the token minted for them moments ago instead of a fresh
+    signature. Misses are minted under a lock per key, so a reconnect storm
+    for one key signs once while other keys mint in parallel.
+    """
+
+    def __init__(self, provider: str, maxsize: int, margin: timedelta, timer: Callable[[], float] = time.monotonic):
+        self.provider = provider
+        self.margin = margin
+        self._tokens = TTLCache(maxsize=maxsize, ttl=float("inf"), timer=timer)
+        # key -> [lock, waiters]; an entry lives only while someone is minting that key
+        self._mint_locks: Dict[Hashable, list] = {}
+        self._locks_guard = threading.Lock()
+
+    @contextmanager
+    def _key_lock(self, key: Hashable) -> Iterator[None]:
+        with self._locks_guard:
+            entry = self._mint_locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._locks_guard:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._mint_locks[key]
+
+    def get_or_mint(self, room: str, identity: str, grant: Hashable, ttl: timedelta, mint: Callable[[], str]) -> str:
+        key = (room, identity, grant, ttl)
+        token = self._tokens.get(key)
+        if token is None:
+            with self._key_lock(key):
+                token = self._tokens.get(key)
+                if token is None:
+                    started = time.perf_counter()
+                    token = mint()
+                    room_token_mint_seconds.observe(time.perf_counter() - started, provider=self.provider)
+                    room_tokens_minted.inc(provider=self.provider)
+                    self._tokens.set(key, token, (ttl - self.margin).total_seconds())
+                    return token
+        room_token_cache_hits.inc(provider=self.provider)
+        return token
+
+    def clear(self) -> None:
+        self._tokens.clear()
+
+    def __len__(self) -> int:
+        return len(self._tokens)
@@ -1,3 +1,32 @@
-def generate_room_token(room_name: str, user_id: str) -> str:
-    """Generate a mock token for testing."""
-    return f"mock_token_{room_name}_{user_id}"
+from datetime import timedelta
+from typing import List, Optional
+from app.providers.base import DEFAULT_TOKEN_TTL, HTTPVideoProvider
+
+TWILIO_VIDEO_URL = "https://video.twilio.com/v1"
+
+class TwilioProvider(HTTPVideoProvider):
+    """Twilio Programmable Video, authenticated with an API key pair."""
+
+    def __init__(self, name: str, api_key_sid: str, api_key_secret: str, url: str = TWILIO_VIDEO_URL):
+        super().__init__(name, url, auth=(api_key_sid, api_key_secret))
+
+    def mint_token(self, room_name: str, identity: str, *, ttl: timedelta = DEFAULT_TOKEN_TTL) -> str:
+        """Generate a mock token for testing."""
+        return f"mock_token_{room_name}_{identity}"
+
+    def premint(self, participants) -> int:
+        """Mock tokens are free to generate; nothing to warm."""
+        return 0
+
+    async def create_room(self, room_name: str, *, max_participants: Optional[int] = None) -> None:
+        data = {"UniqueName": room_name}
+        if max_participants:
+            data["MaxParticipants"] = max_participants
+        await self.request("POST", "/Rooms", data=data)
+
+    async def close_room(self, room_name: str) -> None:
+        await self.request("POST", f"/Rooms/{room_name}", data={"Status": "completed"})
+
+    async def list_participants(self, room_name: str) -> List[str]:
+        data = await self.request("GET", f"/Rooms/{room_name}/Participants", params={"Status": "connected"})
+        return [participant["identity"] for participant in data.get("participants", [])]
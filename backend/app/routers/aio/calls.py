@@ -0,0 +1,252 @@
+from datetime import datetime
+from typing import Any, FrozenSet, List, Optional
+from uuid import UUID, uuid4
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.config import settings
+from app.core.auth import AuthenticatedUser
+from app.core.contact_graph import approved_contacts_query, contact_graph, group_contacts, unapproved_participants
+from app.core.deps import get_async_db, get_current_active_user
+from app.core.etag import is_not_modified, not_modified, set_cache_headers
+from app.core.pagination import decode_cursor, keyset_page, set_next_cursor, split_page
+from app.core.scheduling import Booking, as_utc, bookings_query, call_window, is_overlap_violation, to_bookings
+from app.core.serialization import json_response
+from app.models.facilities import Facility
+from app.models.users import User
+from app.models.video_calls import CallParticipant, VideoCall
+from app.providers.base import VideoProvider
+from app.routers.calls import (
+    CALL_CURSOR_TYPES,
+    availability_response,
+    availability_users,
+    call_json,
+    call_provider,
+    call_page_etag,
+    publish_call,
+    requires_approved_contacts,
+    scheduled_calls_query,
+    scheduling_conflict,
+    unapproved_contacts
+)
+from app.schemas.video_calls import AvailabilityRead, VideoCallBase, VideoCallFilters, VideoCallRead
+
+router = APIRouter()
+
+async def _is_participant(db: AsyncSession, call_id: UUID, user_id: UUID) -> bool:
+    """Check call membership against the call_participants primary key."""
+    result = await db.execute(
+        select(CallParticipant.call_id).where(
+            CallParticipant.call_id == call_id,
+            CallParticipant.user_id == user_id
+        )
+    )
+    return result.first() is not None
+
+async def _find_conflicts(db: AsyncSession, user_ids, start: datetime, end: datetime) -> List[Booking]:
+    stmt = bookings_query(db.get_bind().dialect.name, user_ids, start, end)
+    return to_bookings(await db.execute(stmt))
+
+async def _approved_contacts(db: AsyncSession, user_id: UUID) -> FrozenSet[UUID]:
+    found, missed = contact_graph.lookup([user_id])
+    if missed:
+        rows = await db.execute(approved_contacts_query(missed))
+        loaded = group_contacts(missed, rows)
+        contact_graph.store(missed, loaded)
+        found.update(loaded)
+    return found[user_id]
+
+async def _facility_provider(db: AsyncSession, facility_id: Optional[UUID]) -> VideoProvider:
+    facility_settings = None
+    if facility_id is not None:
+        facility_settings = await db.scalar(select(Facility.settings).where(Facility.id == facility_id))
+    return call_provider((facility_settings or {}).get("video_provider"))
+
+@router.post("/create", response_model=VideoCallRead)
+async def create_call(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: AuthenticatedUser = Depends(get_current_active_user),
+    call_in: VideoCallBase
+) -> Any:
+    """Create a new video call."""
+    # Validate participant list
+    result = await db.execute(
+        select(User.id).where(User.id.in_(call_in.participant_ids))
+    )
+    if len(result.all()) != len(call_in.participant_ids):
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid participant IDs"
+        )
+
+    # Non-staff may only call people they have an approved contact with
+    if requires_approved_contacts(current_user):
+        contacts = await _approved_contacts(db, current_user.id)
+        unapproved = unapproved_participants(contacts, current_user.id, call_in.participant_ids)
+        if unapproved:
+            raise unapproved_contacts(unapproved)
+
+    # Reject double-booking any participant
+    start, end = call_window(call_in.scheduled_start, call_in.scheduled_duration)
+    conflicts = await _find_conflicts(db, call_in.participant_ids, start, end)
+    if conflicts:
+        raise scheduling_conflict(conflicts)
+
+    # Create call on the provider the creator's facility routes to
+    provider = await _facility_provider(db, current_user.facility_id)
+    call = VideoCall(
+        creator_id=current_user.id,
+        room_name=f"call-{uuid4()}",  # Generate unique room name
+        status="scheduled",
+        scheduled_start=call_in.scheduled_start,
+        scheduled_duration=call_in.scheduled_duration,
+        max_participants=call_in.max_participants,
+        participant_ids=call_in.participant_ids,
+        recording_enabled=call_in.recording_enabled and current_user.role != "attorney",  # No recording for legal calls
+        video_provider=provider.name
+    )
+    db.add(call)
+    try:
+        await db.commit()
+    except IntegrityError as exc:
+        # Lost a race with a concurrent booking (Postgres exclusion constraint)
+        await db.rollback()
+        if not is_overlap_violation(exc):
+            raise
+        raise scheduling_conflict(await _find_conflicts(db, call_in.participant_ids, start, end))
+
+    # Generate token for the room
+    token = provider.mint_token(call.room_name, str(current_user.id))
+
+    created = call_json.validate(call)
+    publish_call("call.created", created, current_user.id)
+    created.token = token
+    return json_response(call_json.dump(created))
+
+@router.post("/{call_id}/join")
+async def join_call(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: AuthenticatedUser = Depends(get_current_active_user),
+    call_id: UUID
+) -> Any:
+    """Join a video call."""
+    # Participants are loaded up front: changing the status updates them too
+    result = await db.execute(
+        select(VideoCall)
+        .options(selectinload(VideoCall.participants))
+        .where(VideoCall.id == call_id)
+    )
+    call = result.scalars().first()
+    if not call:
+        raise HTTPException(status_code=404, detail="Call not found")
+
+    # Check if user is allowed to join
+    if current_user.role != "staff" and not any(
+        participant.user_id == current_user.id for participant in call.participants
+    ):
+        raise HTTPException(
+            status_code=403,
+            detail="Not authorized to join this call"
+        )
+
+    # Check call status
+    if call.status not in ["scheduled", "active"]:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Cannot join call with status: {call.status}"
+        )
+
+    # Resolved before the call is marked active, so a missing provider changes nothing
+    provider = call_provider(call.video_provider)
+
+    # Update call status if needed
+    if call.status == "scheduled":
+        call.status = "active"
+        await db.commit()
+
+    # Generate token for the room
+    token = provider.mint_token(call.room_name, str(current_user.id))
+    publish_call("call.joined", call, call.creator_id, user_id=current_user.id)
+
+    return {
+        "room_name": call.room_name,
+        "recording_enabled": call.recording_enabled,
+        "duration": call.scheduled_duration,
+        "token": token,
+        "server_url": provider.server_url
+    }
+
+@router.get("/token")
+async def get_room_token(
+    *,
+    room: str,
+    user: str,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: AuthenticatedUser = Depends(get_current_active_user)
+):
+    """Return a LiveKit (or configured provider) token for the given room/user."""
+    # Only allow requesting token for current user
+    if str(current_user.id) != user:
+        raise HTTPException(status_code=403, detail="Cannot request token for other user")
+
+    result = await db.execute(
+        select(VideoCall.id, VideoCall.video_provider).where(VideoCall.room_name == room)
+    )
+    call = result.first()
+    if call is None:
+        raise HTTPException(status_code=404, detail="Room not found")
+
+    if current_user.role != "staff" and not await _is_participant(db, call.id, current_user.id):
+        raise HTTPException(status_code=403, detail="Not authorized for this room")
+
+    provider = call_provider(call.video_provider)
+    token = provider.mint_token(room, user)
+    return {"token": token, "server_url": provider.server_url}
+
+@router.get("/availability", response_model=AvailabilityRead)
+async def get_availability(
+    start: datetime,
+    end: datetime,
+    duration: int = Query(30, ge=1),  # minutes a free slot must fit
+    user_id: Optional[List[UUID]] = Query(None),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: AuthenticatedUser = Depends(get_current_active_user)
+) -> Any:
+    """Busy periods and common free slots of the given users (default: you) over [start, end)."""
+    start, end = as_utc(start), as_utc(end)
+    user_ids = availability_users(current_user, start, end, user_id)
+    return availability_response(await _find_conflicts(db, user_ids, start, end), start, end, duration)
+
+@router.get("/scheduled", response_model=List[VideoCallRead])
+async def list_scheduled_calls(
+    request: Request,
+    response: Response,
+    filters: VideoCallFilters = Depends(),
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.default_page_size, ge=1, le=settings.max_page_size),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: AuthenticatedUser = Depends(get_current_active_user)
+) -> Any:
+    """List scheduled calls for current user, ordered by (scheduled_start, id).
+
+    Pages are keyset-paginated: pass the X-Next-Cursor header of one response
+    as ``cursor`` to fetch the next. Returns 304 when If-None-Match still
+    matches the page.
+    """
+    after = decode_cursor(cursor, CALL_CURSOR_TYPES) if cursor else None
+    stmt, key = scheduled_calls_query(current_user, filters)
+    calls = (await db.scalars(keyset_page(stmt, key, after, limit))).all()
+    calls, next_cursor = split_page(calls, limit, lambda call: (call.scheduled_start, call.id))
+    etag = call_page_etag(current_user, request, calls, next_cursor)
+    if is_not_modified(request, etag):
+        return not_modified(etag, settings.call_list_cache_control)
+
+    set_cache_headers(response, etag, settings.call_list_cache_control)
+    set_next_cursor(request, response, next_cursor)
+    return json_response(call_json.render_many(calls), response)
@@ -0,0 +1,90 @@
+from typing import Any, List, Optional
+from uuid import UUID
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.core.auth import AuthenticatedUser
+from app.core.deps import get_async_db, get_current_active_user
+from app.core.pagination import decode_cursor, keyset_page, set_next_cursor, split_page
+from app.core.serialization import json_response
+from app.models.contacts import Contact
+from app.routers.contacts import (
+    CONTACT_CURSOR_TYPES,
+    CONTACT_PAGE_KEY,
+    contact_changed,
+    contact_json,
+    pending_contacts_query
+)
+from app.schemas.contacts import ContactCreate, ContactFilters, ContactRead, ContactUpdate
+
+router = APIRouter()
+
+@router.post("/request", response_model=ContactRead)
+async def request_contact(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: AuthenticatedUser = Depends(get_current_active_user),
+    contact_in: ContactCreate
+) -> Any:
+    """Request a new contact."""
+    contact = Contact(
+        requestor_id=current_user.id,
+        contact_id=contact_in.contact_id,
+        relationship=contact_in.relationship,
+        status="pending"
+    )
+    db.add(contact)
+    await db.commit()
+    contact_changed("contact.requested", contact)
+    return json_response(contact_json.render(contact))
+
+@router.put("/{contact_id}/approve", response_model=ContactRead)
+async def approve_contact(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: AuthenticatedUser = Depends(get_current_active_user),
+    contact_id: UUID,
+    contact_in: ContactUpdate
+) -> Any:
+    """Approve or reject a contact request."""
+    contact = await db.get(Contact, contact_id)
+    if not contact:
+        raise HTTPException(status_code=404, detail="Contact not found")
+
+    # Only the contact or staff can approve/reject
+    if current_user.id != contact.contact_id and current_user.role != "staff":
+        raise HTTPException(
+            status_code=403,
+            detail="Not enough permissions"
+        )
+
+    # Update fields
+    for field, value in contact_in.model_dump(exclude_unset=True).items():
+        setattr(contact, field, value)
+
+    await db.commit()
+    contact_changed("contact.updated", contact)
+    return json_response(contact_json.render(contact))
+
+@router.get("/pending", response_model=List[ContactRead])
+async def list_pending_contacts(
+    request: Request,
+    response: Response,
+    filters: ContactFilters = Depends(),
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.default_page_size, ge=1, le=settings.max_page_size),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: AuthenticatedUser = Depends(get_current_active_user)
+) -> Any:
+    """List pending contacts for current user, oldest first.
+
+    Keyset-paginated on (created_at, id); the next page's cursor is returned
+    in the X-Next-Cursor header.
+    """
+    after = decode_cursor(cursor, CONTACT_CURSOR_TYPES) if cursor else None
+    stmt = keyset_page(pending_contacts_query(current_user, filters), CONTACT_PAGE_KEY, after, limit)
+    contacts, next_cursor = split_page(
+        (await db.scalars(stmt)).all(), limit, lambda contact: (contact.created_at, contact.id)
+    )
+    set_next_cursor(request, response, next_cursor)
+    return json_response(contact_json.render_many(contacts), response)
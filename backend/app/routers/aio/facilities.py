@@ -0,0 +1,76 @@
+from typing import Any
+from uuid import UUID
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.core.auth import AuthenticatedUser
+from app.core.deps import get_async_db, get_current_active_user
+from app.core.etag import content_etag, is_not_modified, not_modified, set_cache_headers
+from app.core.facility_cache import facility_cache, serialize_facility
+from app.models.facilities import Facility
+from app.providers.registry import registry
+from app.schemas.facilities import FacilityRead, FacilityUpdate
+
+router = APIRouter()
+
+@router.put("/{facility_id}/settings", response_model=FacilityRead)
+async def update_facility_settings(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: AuthenticatedUser = Depends(get_current_active_user),
+    facility_id: UUID,
+    facility_in: FacilityUpdate
+) -> Any:
+    """Update facility settings."""
+    if current_user.role != "staff":
+        raise HTTPException(
+            status_code=403,
+            detail="Not enough permissions"
+        )
+
+    provider_name = facility_in.settings.video_provider if facility_in.settings else None
+    if provider_name is not None and provider_name not in registry:
+        raise HTTPException(status_code=400, detail=f"Unknown video provider: {provider_name}")
+
+    facility = await db.get(Facility, facility_id)
+    if not facility:
+        raise HTTPException(status_code=404, detail="Facility not found")
+
+    # Update fields
+    for field, value in facility_in.model_dump(exclude_unset=True).items():
+        setattr(facility, field, value)
+
+    await db.commit()
+
+    version = facility_cache.invalidate(facility_id)
+    payload = serialize_facility(facility)
+    facility_cache.store(facility_id, version, payload)
+    return Response(content=payload, media_type="application/json")
+
+@router.get("/{facility_id}/settings", response_model=FacilityRead)
+async def get_facility_settings(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: AuthenticatedUser = Depends(get_current_active_user),
+    facility_id: UUID,
+    request: Request
+) -> Any:
+    """Get facility settings.
+
+    Honours If-None-Match so polling clients get a bodyless 304 while the
+    settings are unchanged.
+    """
+    version, payload = facility_cache.lookup(facility_id)
+    if payload is None:
+        facility = await db.get(Facility, facility_id)
+        if not facility:
+            raise HTTPException(status_code=404, detail="Facility not found")
+        payload = serialize_facility(facility)
+        facility_cache.store(facility_id, version, payload)
+
+    etag = content_etag(payload)
+    if is_not_modified(request, etag):
+        return not_modified(etag, settings.facility_settings_cache_control)
+    response = Response(content=payload, media_type="application/json")
+    set_cache_headers(response, etag, settings.facility_settings_cache_control)
+    return response
@@ -1,26 +1,50 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
+from app.core.auth import create_access_token, oauth2_scheme, revoke_token
 from app.core.deps import get_db
-from app.core.security import verify_password
+from app.core.security import HashingQueueFull, verify_and_update_password
 from app.models.users import User
+from app.schemas.auth import Token
 
 router = APIRouter()
 
-@router.post("/token")
-def login(
+@router.post("/token", response_model=Token)
+async def login(
     db: Session = Depends(get_db),
     form_data: OAuth2PasswordRequestForm = Depends()
 ):
     """Generate JWT token for user authentication."""
-    user = db.query(User).filter(User.email == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    user = await run_in_threadpool(
+        lambda: db.query(User).filter(User.email == form_data.username).first()
+    )
+    valid, new_hash = False, None
+    if user and user.hashed_password:
+        try:
+            valid, new_hash = await verify_and_update_password(form_data.password, user.hashed_password)
+        except HashingQueueFull:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many concurrent logins, retry shortly",
+                headers={"Retry-After": "1"},
+            )
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    if new_hash:
+        # Stored hash uses outdated parameters; upgrade it transparently
+        user.hashed_password = new_hash
+        await run_in_threadpool(db.commit)
     return {
-        "access_token": "test_token",  # Mock token for testing
+        "access_token": create_access_token(user),
         "token_type": "bearer"
     }
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+def logout(token: str = Depends(oauth2_scheme)):
+    """Revoke the presented access token."""
+    revoke_token(token)
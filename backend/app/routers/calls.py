@@ -1,31 +1,112 @@
-from typing import Any, List
+from datetime import datetime, timedelta
+from operator import attrgetter
+from typing import Any, Iterable, List, Optional, Sequence, Tuple
 from uuid import UUID, uuid4
-from os import getenv
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, aliased
 
+from app.config import settings
+from app.core.auth import AuthenticatedUser
+from app.core.contact_graph import contact_graph, unapproved_participants
 from app.core.deps import get_db, get_current_active_user
+from app.core.etag import etag_from_parts, is_not_modified, not_modified, set_cache_headers
+from app.core.export import ExportFormat, export_response, stream_rows
+from app.core.events import event_bus
+from app.core.pagination import decode_cursor, keyset_page, parse_datetime, set_next_cursor, split_page
+from app.core.scheduling import (
+    Booking,
+    IntervalIndex,
+    as_utc,
+    bookings_query,
+    call_window,
+    find_conflicts,
+    free_slots,
+    index_by_user,
+    is_overlap_violation,
+    to_bookings
+)
+from app.core.serialization import ModelSerializer, json_response
+from app.models.facilities import Facility
 from app.models.users import User
-from app.models.video_calls import VideoCall
-from app.schemas.video_calls import VideoCallBase, VideoCallRead
-
-# Dynamically pick the video provider at runtime so that switching back and forth
-# between Twilio (or the mock implementation) and LiveKit is a zero-config
-# operation. The `VIDEO_PROVIDER` env var is evaluated once on module import.
-VIDEO_PROVIDER = getenv("VIDEO_PROVIDER", "livekit").lower()
-if VIDEO_PROVIDER == "twilio":
-    from app.providers.twilio import generate_room_token  # type: ignore
-else:
-    from app.providers.livekit import generate_room_token  # type: ignore
+from app.models.video_calls import CallParticipant, VideoCall
+from app.providers.base import UnknownProviderError, VideoProvider
+from app.providers.registry import registry
+from app.schemas.video_calls import (
+    AvailabilityRead,
+    CallBooking,
+    TimeSlot,
+    VideoCallBase,
+    VideoCallBatchCreate,
+    VideoCallBatchError,
+    VideoCallBatchResult,
+    VideoCallFilters,
+    VideoCallRead
+)
 
 router = APIRouter()
 
+call_json = ModelSerializer(VideoCallRead)
+
+CALL_EVENT_FIELDS = ("id", "room_name", "status", "scheduled_start", "scheduled_duration", "participant_ids")
+
+def publish_call(event_type: str, call: Any, creator_id: UUID, **extra: Any) -> None:
+    """Push a call change (a VideoCall row or VideoCallRead) to the event
+    streams of its creator and participants."""
+    data = {field: getattr(call, field) for field in CALL_EVENT_FIELDS}
+    data.update(extra)
+    event_bus.publish({str(creator_id), *call.participant_ids}, event_type, data)
+
+def _is_participant(db: Session, call_id: UUID, user_id: UUID) -> bool:
+    """Check call membership against the call_participants primary key."""
+    return db.query(CallParticipant.call_id).filter(
+        CallParticipant.call_id == call_id,
+        CallParticipant.user_id == user_id
+    ).first() is not None
+
+def call_provider(name: Optional[str]) -> VideoProvider:
+    """Provider by name (the default when None); 503 if it is no longer configured."""
+    try:
+        return registry.get(name)
+    except UnknownProviderError as exc:
+        raise HTTPException(status_code=503, detail=f"Video provider unavailable: {exc}")
+
+def facility_provider(db: Session, facility_id: Optional[UUID]) -> VideoProvider:
+    """Provider chosen by a facility's settings for the calls it creates."""
+    facility_settings = None
+    if facility_id is not None:
+        facility_settings = db.scalar(select(Facility.settings).where(Facility.id == facility_id))
+    return call_provider((facility_settings or {}).get("video_provider"))
+
+def requires_approved_contacts(current_user: AuthenticatedUser) -> bool:
+    return settings.require_approved_contacts and current_user.role != "staff"
+
+def unapproved_contacts(user_ids: Iterable[UUID]) -> HTTPException:
+    return HTTPException(
+        status_code=403,
+        detail={
+            "message": "Participants must be approved contacts",
+            "participant_ids": sorted(str(user_id) for user_id in user_ids)
+        }
+    )
+
+def scheduling_conflict(conflicts: Iterable[Booking]) -> HTTPException:
+    return HTTPException(
+        status_code=409,
+        detail={
+            "message": "Scheduling conflict",
+            "conflicts": [CallBooking.model_validate(b).model_dump(mode="json") for b in conflicts]
+        }
+    )
+
 @router.post("/create", response_model=VideoCallRead)
 def create_call(
     *,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    current_user: AuthenticatedUser = Depends(get_current_active_user),
     call_in: VideoCallBase
 ) -> Any:
     """Create a new video call."""
@@ -38,8 +119,22 @@ def create_call(
             status_code=400,
             detail="Invalid participant IDs"
         )
+
+    # Non-staff may only call people they have an approved contact with
+    if requires_approved_contacts(current_user):
+        contacts = contact_graph.approved_contacts(db, [current_user.id])[current_user.id]
+        unapproved = unapproved_participants(contacts, current_user.id, call_in.participant_ids)
+        if unapproved:
+            raise unapproved_contacts(unapproved)
+
+    # Reject double-booking any participant
+    start, end = call_window(call_in.scheduled_start, call_in.scheduled_duration)
+    conflicts = find_conflicts(db, call_in.participant_ids, start, end)
+    if conflicts:
+        raise scheduling_conflict(conflicts)
     
-    # Create call
+    # Create call on the provider the creator's facility routes to
+    provider = facility_provider(db, current_user.facility_id)
     call = VideoCall(
         creator_id=current_user.id,
         room_name=f"call-{uuid4()}",  # Generate unique room name
@@ -48,24 +143,151 @@ def create_call(
         scheduled_duration=call_in.scheduled_duration,
         max_participants=call_in.max_participants,
         participant_ids=call_in.participant_ids,
-        recording_enabled=call_in.recording_enabled and current_user.role != "attorney"  # No recording for legal calls
+        recording_enabled=call_in.recording_enabled and current_user.role != "attorney",  # No recording for legal calls
+        video_provider=provider.name
     )
     db.add(call)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError as exc:
+        # Lost a race with a concurrent booking (Postgres exclusion constraint)
+        db.rollback()
+        if not is_overlap_violation(exc):
+            raise
+        raise scheduling_conflict(find_conflicts(db, call_in.participant_ids, start, end))
     db.refresh(call)
     
     # Generate token for the room
-    token = generate_room_token(call.room_name, str(current_user.id))
-    
-    response = call.dict()
-    response["token"] = token
-    return response
+    token = provider.mint_token(call.room_name, str(current_user.id))
+
+    created = call_json.validate(call)
+    publish_call("call.created", created, current_user.id)
+    created.token = token
+    return json_response(call_json.dump(created))
+
+@router.post("/batch", response_model=VideoCallBatchResult)
+def create_calls_batch(
+    *,
+    db: Session = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_active_user),
+    batch_in: VideoCallBatchCreate
+) -> Any:
+    """Create many calls at once, e.g. a facility's weekly visitation schedule.
+
+    Participants across every spec are validated with one query, existing
+    bookings are loaded with another, and all calls are written in a single
+    transaction with bulk INSERT ... RETURNING. Specs that fail validation or
+    would double-book a participant are reported in ``errors`` by index; the
+    rest are still created. Room tokens are minted later, when participants join.
+    """
+    if current_user.role != "staff":
+        raise HTTPException(
+            status_code=403,
+            detail="Not enough permissions"
+        )
+
+    requested = {user_id for item in batch_in.calls for user_id in item.participant_ids}
+    known = set(db.scalars(select(User.id).where(User.id.in_(requested)))) if requested else set()
+
+    expansions = []
+    for index, item in enumerate(batch_in.calls):
+        try:
+            expansions.append(
+                item.recurrence.occurrences(item.scheduled_start, settings.max_batch_calls)
+                if item.recurrence else [item.scheduled_start]
+            )
+        except ValueError as exc:
+            raise HTTPException(status_code=422, detail=f"calls[{index}]: {exc}")
+
+    plans, errors = [], []
+    for index, (item, starts) in enumerate(zip(batch_in.calls, expansions)):
+        if not known.issuperset(item.participant_ids):
+            errors.append(VideoCallBatchError(index=index, detail="Invalid participant IDs"))
+            continue
+        windows = [call_window(start, item.scheduled_duration) for start in starts]
+        plans.append((index, item, list(dict.fromkeys(item.participant_ids)), windows))
+
+    # Existing bookings over the whole batch, indexed per participant so every
+    # occurrence (and the batch's own calls) can be checked without a query
+    booked = {}
+    if plans:
+        user_ids = {user_id for _, _, ids, _ in plans for user_id in ids}
+        window_start = min(start for *_, windows in plans for start, _ in windows)
+        window_end = max(end for *_, windows in plans for _, end in windows)
+        dialect = db.get_bind().dialect.name
+        booked = index_by_user(to_bookings(db.execute(bookings_query(dialect, user_ids, window_start, window_end))))
+
+    provider = facility_provider(db, current_user.facility_id)
+    call_rows, participant_rows = [], []
+    for index, item, user_ids, windows in plans:
+        if len(call_rows) + len(windows) > settings.max_batch_calls:
+            errors.append(VideoCallBatchError(
+                index=index,
+                detail=f"Batch exceeds {settings.max_batch_calls} calls"
+            ))
+            continue
+        clash = next((
+            booking
+            for start, end in windows
+            for user_id in user_ids if user_id in booked
+            for booking in booked[user_id].overlapping(start, end)
+        ), None)
+        if clash is not None:
+            errors.append(VideoCallBatchError(
+                index=index,
+                detail=f"Scheduling conflict with call {clash.call_id} at {clash.start.isoformat()}"
+            ))
+            continue
+
+        encoded_ids = VideoCall.encode_participant_ids(user_ids)
+        for start, end in windows:
+            call_id = uuid4()
+            call_rows.append({
+                "id": call_id,
+                "creator_id": current_user.id,
+                "room_name": f"call-{uuid4()}",
+                "status": "scheduled",
+                "scheduled_start": start,
+                "scheduled_duration": item.scheduled_duration,
+                "max_participants": item.max_participants,
+                "_participant_ids": encoded_ids,
+                "recording_enabled": item.recording_enabled,
+                "video_provider": provider.name
+            })
+            for user_id in user_ids:
+                participant_rows.append({
+                    "call_id": call_id,
+                    "user_id": user_id,
+                    "status": "scheduled",
+                    "scheduled_start": start,
+                    "scheduled_end": end
+                })
+                booked.setdefault(user_id, IntervalIndex()).add(Booking(user_id, call_id, start, end))
+
+    created = []
+    if call_rows:
+        try:
+            calls = db.scalars(insert(VideoCall).returning(VideoCall), call_rows).all()
+            if participant_rows:
+                db.execute(insert(CallParticipant), participant_rows)
+            # Serialize before commit expires the returned rows
+            created = [VideoCallRead.model_validate(call) for call in calls]
+            db.commit()
+        except IntegrityError as exc:
+            # A concurrent booking won the race; nothing from this batch was written
+            db.rollback()
+            if not is_overlap_violation(exc):
+                raise
+            raise HTTPException(status_code=409, detail="Scheduling conflict, retry the batch")
+    for call in created:
+        publish_call("call.created", call, current_user.id)
+    return VideoCallBatchResult(created=created, errors=errors)
 
 @router.post("/{call_id}/join")
 def join_call(
     *,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    current_user: AuthenticatedUser = Depends(get_current_active_user),
     call_id: UUID
 ) -> Any:
     """Join a video call."""
@@ -74,7 +296,7 @@ def join_call(
         raise HTTPException(status_code=404, detail="Call not found")
     
     # Check if user is allowed to join
-    if current_user.id not in call.participant_ids and current_user.role != "staff":
+    if current_user.role != "staff" and not _is_participant(db, call.id, current_user.id):
         raise HTTPException(
             status_code=403,
             detail="Not authorized to join this call"
@@ -87,6 +309,9 @@ def join_call(
             detail=f"Cannot join call with status: {call.status}"
         )
     
+    # Resolved before the call is marked active, so a missing provider changes nothing
+    provider = call_provider(call.video_provider)
+
     # Update call status if needed
     if call.status == "scheduled":
         call.status = "active"
@@ -94,13 +319,15 @@ def join_call(
         db.commit()
     
     # Generate token for the room
-    token = generate_room_token(call.room_name, str(current_user.id))
+    token = provider.mint_token(call.room_name, str(current_user.id))
+    publish_call("call.joined", call, call.creator_id, user_id=current_user.id)
     
     return {
         "room_name": call.room_name,
         "recording_enabled": call.recording_enabled,
         "duration": call.scheduled_duration,
-        "token": token
+        "token": token,
+        "server_url": provider.server_url
     }
 
 @router.get("/token")
@@ -109,7 +336,7 @@ def get_room_token(
     room: str,
     user: str,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: AuthenticatedUser = Depends(get_current_active_user)
 ):
     """Return a LiveKit (or configured provider) token for the given room/user.
 
@@ -131,28 +358,171 @@ def get_room_token(
     if not call:
         raise HTTPException(status_code=404, detail="Room not found")
 
-    if current_user.id not in call.participant_ids and current_user.role != "staff":
+    if current_user.role != "staff" and not _is_participant(db, call.id, current_user.id):
         raise HTTPException(status_code=403, detail="Not authorized for this room")
 
-    token = generate_room_token(room, user)
-    return {"token": token}
+    provider = call_provider(call.video_provider)
+    token = provider.mint_token(room, user)
+    return {"token": token, "server_url": provider.server_url}
 
+def availability_users(
+    current_user: AuthenticatedUser,
+    start: datetime,
+    end: datetime,
+    user_ids: Optional[List[UUID]]
+) -> List[UUID]:
+    """Validate an availability request; residents may only query themselves."""
+    if end <= start:
+        raise HTTPException(status_code=400, detail="end must be after start")
+    if end - start > timedelta(days=settings.max_availability_days):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Window exceeds {settings.max_availability_days} days"
+        )
+    user_ids = list(dict.fromkeys(user_ids or [current_user.id]))
+    if current_user.role != "staff" and user_ids != [current_user.id]:
+        raise HTTPException(status_code=403, detail="Cannot view other users' availability")
+    return user_ids
 
-@router.get("/scheduled", response_model=List[VideoCallRead])
-def list_scheduled_calls(
+def availability_response(bookings: List[Booking], start: datetime, end: datetime, duration: int) -> AvailabilityRead:
+    slots = free_slots(bookings, start, end, timedelta(minutes=duration))
+    return AvailabilityRead(
+        start=start,
+        end=end,
+        busy=[CallBooking.model_validate(booking) for booking in bookings],
+        free=[TimeSlot(start=slot_start, end=slot_end) for slot_start, slot_end in slots]
+    )
+
+@router.get("/availability", response_model=AvailabilityRead)
+def get_availability(
+    start: datetime,
+    end: datetime,
+    duration: int = Query(30, ge=1),  # minutes a free slot must fit
+    user_id: Optional[List[UUID]] = Query(None),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: AuthenticatedUser = Depends(get_current_active_user)
 ) -> Any:
-    """List scheduled calls for current user."""
-    # Staff can see all calls
+    """Busy periods and common free slots of the given users (default: you) over [start, end)."""
+    start, end = as_utc(start), as_utc(end)
+    user_ids = availability_users(current_user, start, end, user_id)
+    return availability_response(find_conflicts(db, user_ids, start, end), start, end, duration)
+
+def scheduled_calls_query(current_user: AuthenticatedUser, filters: VideoCallFilters) -> Tuple[Select, tuple]:
+    """Calls visible to the current user plus the keyset columns to page them by."""
     if current_user.role == "staff":
-        calls = db.query(VideoCall).filter(
-            VideoCall.status == "scheduled"
-        ).all()
+        # Staff can see all calls, served by the (status, scheduled_start) index
+        start, key = VideoCall.scheduled_start, (VideoCall.scheduled_start, VideoCall.id)
+        stmt = select(VideoCall).where(VideoCall.status == filters.status)
     else:
-        # Users see calls they're participating in
-        calls = db.query(VideoCall).filter(
-            VideoCall.status == "scheduled",
-            VideoCall.participant_ids.contains([current_user.id])
-        ).all()
-    return calls
+        # Users see calls they're participating in, served by the
+        # (user_id, status, scheduled_start) index on call_participants
+        start, key = CallParticipant.scheduled_start, (CallParticipant.scheduled_start, CallParticipant.call_id)
+        stmt = select(VideoCall).join(VideoCall.participants).where(
+            CallParticipant.user_id == current_user.id,
+            CallParticipant.status == filters.status
+        )
+    if filters.start_from is not None:
+        stmt = stmt.where(start >= filters.start_from)
+    if filters.start_to is not None:
+        stmt = stmt.where(start < filters.start_to)
+    if filters.facility_id is not None:
+        member = aliased(CallParticipant)
+        stmt = stmt.where(
+            select(member.call_id)
+            .join(User, User.id == member.user_id)
+            .where(member.call_id == VideoCall.id, User.facility_id == filters.facility_id)
+            .exists()
+        )
+    return stmt, key
+
+def call_page_etag(current_user: AuthenticatedUser, request: Request, calls: Sequence, next_cursor: Optional[str]) -> str:
+    """ETag of one page, from the rows it holds and the cursor to the next.
+
+    Any change visible on the page moves a row's id or updated_at or the
+    cursor, so the page validates itself without scanning the whole listing.
+    """
+    return etag_from_parts(
+        current_user.id, current_user.role, request.url.query, next_cursor,
+        *(f"{call.id}@{call.updated_at}" for call in calls)
+    )
+
+CALL_CURSOR_TYPES = (parse_datetime, UUID)
+
+@router.get("/scheduled", response_model=List[VideoCallRead])
+def list_scheduled_calls(
+    request: Request,
+    response: Response,
+    filters: VideoCallFilters = Depends(),
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.default_page_size, ge=1, le=settings.max_page_size),
+    db: Session = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_active_user)
+) -> Any:
+    """List scheduled calls for current user, ordered by (scheduled_start, id).
+
+    Pages are keyset-paginated: pass the X-Next-Cursor header of one response
+    as ``cursor`` to fetch the next. Returns 304 when If-None-Match still
+    matches the page.
+    """
+    after = decode_cursor(cursor, CALL_CURSOR_TYPES) if cursor else None
+    stmt, key = scheduled_calls_query(current_user, filters)
+    calls = db.scalars(keyset_page(stmt, key, after, limit)).all()
+    calls, next_cursor = split_page(calls, limit, lambda call: (call.scheduled_start, call.id))
+    etag = call_page_etag(current_user, request, calls, next_cursor)
+    if is_not_modified(request, etag):
+        return not_modified(etag, settings.call_list_cache_control)
+
+    set_cache_headers(response, etag, settings.call_list_cache_control)
+    set_next_cursor(request, response, next_cursor)
+    return json_response(call_json.render_many(calls), response)
+
+# Columns of a call export; participant_ids is decoded from the legacy JSON column
+CALL_EXPORT_COLUMNS = (
+    VideoCall.id,
+    VideoCall.creator_id,
+    VideoCall.room_name,
+    VideoCall.status,
+    VideoCall.scheduled_start,
+    VideoCall.scheduled_duration,
+    VideoCall.max_participants,
+    VideoCall._participant_ids.label("participant_ids"),
+    VideoCall.recording_enabled,
+    VideoCall.recording_status,
+    VideoCall.connected_participants,
+    VideoCall.video_provider,
+    VideoCall.created_at,
+    VideoCall.updated_at
+)
+CALL_EXPORT_FIELDS = [
+    (column.key, attrgetter(column.key)) if column.key != "participant_ids"
+    else (column.key, lambda row: VideoCall.decode_participant_ids(row.participant_ids))
+    for column in CALL_EXPORT_COLUMNS
+]
+
+@router.get("/export", response_class=StreamingResponse)
+def export_calls(
+    filters: VideoCallFilters = Depends(),
+    export_format: ExportFormat = Query("ndjson", alias="format"),
+    gzip: bool = False,
+    db: Session = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_active_user)
+) -> StreamingResponse:
+    """Stream every call matching the filters as NDJSON or CSV, ordered by
+    (scheduled_start, id). Staff only.
+
+    Rows are read from a server-side cursor ``export_batch_size`` at a time
+    and written out as they arrive, so memory use doesn't grow with the
+    export; ``gzip=true`` compresses the stream (Content-Encoding: gzip).
+    """
+    if current_user.role != "staff":
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    stmt, key = scheduled_calls_query(current_user, filters)
+    stmt = stmt.with_only_columns(*CALL_EXPORT_COLUMNS).order_by(*key)
+    return export_response(
+        stream_rows(db.get_bind(), stmt, settings.export_batch_size),
+        CALL_EXPORT_FIELDS,
+        export_format,
+        "calls",
+        gzip=gzip,
+        gzip_level=settings.export_gzip_level
+    )
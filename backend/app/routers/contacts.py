@@ -1,19 +1,44 @@
-from typing import Any, List
+from operator import attrgetter
+from typing import Any, List, Literal, Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select, select
 from sqlalchemy.orm import Session
+from app.config import settings
+from app.core.auth import AuthenticatedUser
+from app.core.contact_graph import contact_graph
 from app.core.deps import get_db, get_current_active_user
-from app.models.users import User
+from app.core.events import event_bus
+from app.core.export import ExportFormat, export_response, stream_rows
+from app.core.pagination import decode_cursor, keyset_page, parse_datetime, set_next_cursor, split_page
+from app.core.serialization import ModelSerializer, json_response
 from app.models.contacts import Contact
-from app.schemas.contacts import ContactCreate, ContactRead, ContactUpdate
+from app.schemas.contacts import ContactCreate, ContactFilters, ContactRead, ContactUpdate
 
 router = APIRouter()
 
+contact_json = ModelSerializer(ContactRead)
+
+def contact_event(contact: Contact) -> dict:
+    return {
+        "id": contact.id,
+        "requestor_id": contact.requestor_id,
+        "contact_id": contact.contact_id,
+        "relationship": contact.relationship,
+        "status": contact.status
+    }
+
+def contact_changed(event_type: str, contact: Contact) -> None:
+    """Drop both users' cached contact sets and notify their event streams."""
+    contact_graph.invalidate(contact.requestor_id, contact.contact_id)
+    event_bus.publish((contact.requestor_id, contact.contact_id), event_type, contact_event(contact))
+
 @router.post("/request", response_model=ContactRead)
 def request_contact(
     *,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    current_user: AuthenticatedUser = Depends(get_current_active_user),
     contact_in: ContactCreate
 ) -> Any:
     """Request a new contact."""
@@ -26,13 +51,14 @@ def request_contact(
     db.add(contact)
     db.commit()
     db.refresh(contact)
-    return contact
+    contact_changed("contact.requested", contact)
+    return json_response(contact_json.render(contact))
 
 @router.put("/{contact_id}/approve", response_model=ContactRead)
 def approve_contact(
     *,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    current_user: AuthenticatedUser = Depends(get_current_active_user),
     contact_id: UUID,
     contact_in: ContactUpdate
 ) -> Any:
@@ -55,16 +81,85 @@ def approve_contact(
     db.add(contact)
     db.commit()
     db.refresh(contact)
-    return contact
+    contact_changed("contact.updated", contact)
+    return json_response(contact_json.render(contact))
+
+def filter_contacts(stmt: Select, filters: ContactFilters) -> Select:
+    if filters.created_from is not None:
+        stmt = stmt.where(Contact.created_at >= filters.created_from)
+    if filters.created_to is not None:
+        stmt = stmt.where(Contact.created_at < filters.created_to)
+    return stmt
+
+def pending_contacts_query(current_user: AuthenticatedUser, filters: ContactFilters) -> Select:
+    """Pending requests addressed to the current user."""
+    stmt = select(Contact).where(
+        Contact.status == "pending",
+        Contact.contact_id == current_user.id
+    )
+    return filter_contacts(stmt, filters)
+
+CONTACT_CURSOR_TYPES = (parse_datetime, UUID)
+CONTACT_PAGE_KEY = (Contact.created_at, Contact.id)
 
 @router.get("/pending", response_model=List[ContactRead])
 def list_pending_contacts(
+    request: Request,
+    response: Response,
+    filters: ContactFilters = Depends(),
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.default_page_size, ge=1, le=settings.max_page_size),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: AuthenticatedUser = Depends(get_current_active_user)
 ) -> Any:
-    """List pending contacts for current user."""
-    contacts = db.query(Contact).filter(
-        Contact.status == "pending",
-        Contact.contact_id == current_user.id
-    ).all()
-    return contacts
+    """List pending contacts for current user, oldest first.
+
+    Keyset-paginated on (created_at, id); the next page's cursor is returned
+    in the X-Next-Cursor header.
+    """
+    after = decode_cursor(cursor, CONTACT_CURSOR_TYPES) if cursor else None
+    stmt = keyset_page(pending_contacts_query(current_user, filters), CONTACT_PAGE_KEY, after, limit)
+    contacts, next_cursor = split_page(
+        db.scalars(stmt).all(), limit, lambda contact: (contact.created_at, contact.id)
+    )
+    set_next_cursor(request, response, next_cursor)
+    return json_response(contact_json.render_many(contacts), response)
+
+CONTACT_EXPORT_COLUMNS = (
+    Contact.id,
+    Contact.requestor_id,
+    Contact.contact_id,
+    Contact.relationship,
+    Contact.status,
+    Contact.created_at,
+    Contact.updated_at
+)
+CONTACT_EXPORT_FIELDS = [(column.key, attrgetter(column.key)) for column in CONTACT_EXPORT_COLUMNS]
+
+@router.get("/export", response_class=StreamingResponse)
+def export_contacts(
+    filters: ContactFilters = Depends(),
+    status: Optional[Literal["pending", "approved", "rejected"]] = None,
+    export_format: ExportFormat = Query("ndjson", alias="format"),
+    gzip: bool = False,
+    db: Session = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_active_user)
+) -> StreamingResponse:
+    """Stream every contact (optionally of one status) created in the filter
+    window as NDJSON or CSV, ordered by (created_at, id). Staff only.
+
+    Streamed from a server-side cursor like the call export.
+    """
+    if current_user.role != "staff":
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    stmt = filter_contacts(select(*CONTACT_EXPORT_COLUMNS), filters)
+    if status is not None:
+        stmt = stmt.where(Contact.status == status)
+    return export_response(
+        stream_rows(db.get_bind(), stmt.order_by(*CONTACT_PAGE_KEY), settings.export_batch_size),
+        CONTACT_EXPORT_FIELDS,
+        export_format,
+        "contacts",
+        gzip=gzip,
+        gzip_level=settings.export_gzip_level
+    )
@@ -0,0 +1,62 @@
+import asyncio
+from typing import AsyncIterator, Awaitable, Callable, Optional
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+from fastapi.security import OAuth2PasswordBearer
+from app.config import settings
+from app.core.auth import AuthenticatedUser, get_current_user
+from app.core.deps import get_current_active_user
+from app.core.events import RESYNC, EventBus, Subscription, event_bus
+
+router = APIRouter()
+
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/token", auto_error=False)
+
+def get_stream_user(
+    token: Optional[str] = Depends(optional_oauth2_scheme),
+    access_token: Optional[str] = Query(None)
+) -> AuthenticatedUser:
+    # EventSource cannot send headers, so browsers pass the token in the query string
+    return get_current_active_user(get_current_user(token or access_token or ""))
+
+async def event_stream(
+    bus: EventBus,
+    subscription: Subscription,
+    is_disconnected: Callable[[], Awaitable[bool]],
+    heartbeat: float = settings.events_heartbeat_seconds
+) -> AsyncIterator[str]:
+    """Server-sent events for one subscription until the client goes away.
+
+    Idle periods are filled with comment lines every ``heartbeat`` seconds,
+    which keeps proxies from timing the connection out and lets us notice
+    disconnected clients. A client that fell behind gets ``resync`` and the
+    stream ends; it should refetch over REST and reconnect.
+    """
+    try:
+        yield f"retry: {int(heartbeat * 1000)}\nevent: ready\ndata: {{}}\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                if await is_disconnected():
+                    return
+                yield ": heartbeat\n\n"
+                continue
+            yield event.sse()
+            if event is RESYNC:
+                return
+    finally:
+        bus.unsubscribe(subscription)
+
+@router.get("/stream")
+async def stream_events(
+    request: Request,
+    current_user: AuthenticatedUser = Depends(get_stream_user)
+) -> StreamingResponse:
+    """Push call and contact events for the current user (text/event-stream)."""
+    subscription = event_bus.subscribe(current_user.id)
+    return StreamingResponse(
+        event_stream(event_bus, subscription, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
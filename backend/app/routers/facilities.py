@@ -1,10 +1,14 @@
 from typing import Any
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
+from app.config import settings
+from app.core.auth import AuthenticatedUser
 from app.core.deps import get_db, get_current_active_user
-from app.models.users import User
+from app.core.etag import content_etag, is_not_modified, not_modified, set_cache_headers
+from app.core.facility_cache import facility_cache, serialize_facility
 from app.models.facilities import Facility
+from app.providers.registry import registry
 from app.schemas.facilities import FacilityCreate, FacilityRead, FacilityUpdate
 
 router = APIRouter()
@@ -13,7 +17,7 @@ router = APIRouter()
 def update_facility_settings(
     *,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    current_user: AuthenticatedUser = Depends(get_current_active_user),
     facility_id: UUID,
     facility_in: FacilityUpdate
 ) -> Any:
@@ -24,6 +28,10 @@ def update_facility_settings(
             detail="Not enough permissions"
         )
     
+    provider_name = facility_in.settings.video_provider if facility_in.settings else None
+    if provider_name is not None and provider_name not in registry:
+        raise HTTPException(status_code=400, detail=f"Unknown video provider: {provider_name}")
+
     facility = db.query(Facility).filter(Facility.id == facility_id).first()
     if not facility:
         raise HTTPException(status_code=404, detail="Facility not found")
@@ -35,17 +43,36 @@ def update_facility_settings(
     db.add(facility)
     db.commit()
     db.refresh(facility)
-    return facility
+
+    version = facility_cache.invalidate(facility_id)
+    payload = serialize_facility(facility)
+    facility_cache.store(facility_id, version, payload)
+    return Response(content=payload, media_type="application/json")
 
 @router.get("/{facility_id}/settings", response_model=FacilityRead)
 def get_facility_settings(
     *,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
-    facility_id: UUID
+    current_user: AuthenticatedUser = Depends(get_current_active_user),
+    facility_id: UUID,
+    request: Request
 ) -> Any:
-    """Get facility settings."""
-    facility = db.query(Facility).filter(Facility.id == facility_id).first()
-    if not facility:
-        raise HTTPException(status_code=404, detail="Facility not found")
-    return facility
+    """Get facility settings.
+
+    Honours If-None-Match so polling clients get a bodyless 304 while the
+    settings are unchanged.
+    """
+    version, payload = facility_cache.lookup(facility_id)
+    if payload is None:
+        facility = db.query(Facility).filter(Facility.id == facility_id).first()
+        if not facility:
+            raise HTTPException(status_code=404, detail="Facility not found")
+        payload = serialize_facility(facility)
+        facility_cache.store(facility_id, version, payload)
+
+    etag = content_etag(payload)
+    if is_not_modified(request, etag):
+        return not_modified(etag, settings.facility_settings_cache_control)
+    response = Response(content=payload, media_type="application/json")
+    set_cache_headers(response, etag, settings.facility_settings_cache_control)
+    return response
@@ -0,0 +1,32 @@
+import hmac
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import PlainTextResponse
+from app.config import settings
+from app.core.auth import get_current_user, oauth2_scheme
+from app.core.metrics import MultiProcessCollector, generate_latest
+
+router = APIRouter()
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_collector: Optional[MultiProcessCollector] = None
+
+def get_collector() -> Optional[MultiProcessCollector]:
+    """The multi-worker collector when ``metrics_multiproc_dir`` is set."""
+    global _collector
+    if _collector is None and settings.metrics_multiproc_dir:
+        _collector = MultiProcessCollector(settings.metrics_multiproc_dir)
+    return _collector
+
+def require_scraper(token: str = Depends(oauth2_scheme)) -> None:
+    """The scraper's ``metrics_token`` as a bearer token, or a staff access token."""
+    if settings.metrics_token and hmac.compare_digest(token.encode(), settings.metrics_token.encode()):
+        return
+    if get_current_user(token).role != "staff":
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+
+@router.get("/metrics", include_in_schema=False, dependencies=[Depends(require_scraper)])
+def metrics() -> PlainTextResponse:
+    """Prometheus scrape endpoint."""
+    return PlainTextResponse(generate_latest(collector=get_collector()), media_type=CONTENT_TYPE)
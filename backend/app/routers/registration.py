@@ -1,73 +1,199 @@
-from typing import Any
-from fastapi import APIRouter, Depends, HTTPException, status
+from dataclasses import asdict
+from typing import Any, Callable, Dict, Tuple
+from anyio import to_thread
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+from app.config import settings
+from app.core.blobs import get_blob_store
 from app.core.deps import get_db
-from app.core.email import generate_verification_token, verify_token
+from app.core.email import queue_verification_email, verify_token
+from app.core.events import event_bus
+from app.core.identity_uploads import claim_upload, discard_uploads, record_upload
+from app.core.registration_sessions import RegistrationCompleted, registration_sessions
+from app.core.uploads import receive_upload
+from app.models.contacts import Contact
 from app.models.users import User
+from app.routers.contacts import contact_event
 from app.schemas.registration import (
+    IdentityDetails,
+    IdentityDocument,
+    PersonalInfo,
+    RegistrationDraft,
     RegistrationStart,
     RegistrationVerifyEmail,
     RegistrationPersonalInfo,
-    RegistrationVerifyIdentity,
     RegistrationRelationships
 )
 
 router = APIRouter()
 
+IDENTITY_DOCUMENT_TYPES = ("image/jpeg", "image/png", "application/pdf")
+
+# The body is parsed by hand as it streams in, so describe it for the docs
+VERIFY_IDENTITY_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["id_type", "id_number", "id_expiry", "id_image"],
+                    "properties": {
+                        "id_type": {"type": "string"},
+                        "id_number": {"type": "string"},
+                        "id_expiry": {"type": "string"},
+                        "id_image": {"type": "string", "format": "binary"},
+                    },
+                }
+            }
+        },
+    }
+}
+
+def get_draft(registration_id: str) -> RegistrationDraft:
+    draft = registration_sessions.get(registration_id)
+    if draft is None:
+        raise HTTPException(status_code=404, detail="Registration not found or expired")
+    return draft
+
+def get_open_draft(registration_id: str) -> RegistrationDraft:
+    draft = get_draft(registration_id)
+    if draft.user_id is not None:
+        raise HTTPException(status_code=409, detail="Registration already completed")
+    return draft
+
+def modify_draft(
+    registration_id: str,
+    change: Callable[[RegistrationDraft], Dict[str, Any]]
+) -> Tuple[RegistrationDraft, RegistrationDraft]:
+    """``registration_sessions.modify`` with the same errors as ``get_open_draft``."""
+    try:
+        result = registration_sessions.modify(registration_id, change)
+    except RegistrationCompleted:
+        raise HTTPException(status_code=409, detail="Registration already completed")
+    if result is None:
+        raise HTTPException(status_code=404, detail="Registration not found or expired")
+    return result
+
+def update_draft(registration_id: str, **changes: Any) -> RegistrationDraft:
+    return modify_draft(registration_id, lambda draft: changes)[1]
+
 @router.post("/start")
 def registration_start(
     *,
     db: Session = Depends(get_db),
     registration_in: RegistrationStart
 ) -> Any:
-    """Start registration process."""
+    """Start registration process.
+
+    Only opens a draft in the registration session store; the user row is
+    written by the final step. The verification link is queued in the email
+    outbox rather than sent here, so a slow mail relay never delays this.
+    """
     # Check if email exists
     if db.query(User).filter(User.email == registration_in.email).first():
         raise HTTPException(
             status_code=400,
             detail="Email already registered"
         )
-    
-    # Generate verification token
-    token = generate_verification_token(registration_in.email)
-    
+
+    registration_id, draft = registration_sessions.create(registration_in.email, registration_in.user_type)
+
+    queue_verification_email(db, registration_in.email, registration_id)
+    db.commit()
+
     return {
-        "registrationId": "test_id",  # Mock ID for testing
-        "verificationToken": token,
-        "expiresAt": "2025-02-24T00:00:00Z"  # Mock expiry for testing
+        "registrationId": registration_id,
+        "expiresAt": draft.expires_at
     }
 
 @router.post("/verify-email")
 def verify_email(
     *,
-    db: Session = Depends(get_db),
     verification_in: RegistrationVerifyEmail
 ) -> Any:
     """Verify email address."""
-    if not verify_token(verification_in.email, verification_in.token):
+    draft = get_open_draft(verification_in.registration_id)
+    if (
+        verification_in.email.lower() != draft.email.lower()
+        or not verify_token(draft.email, verification_in.token)
+    ):
         raise HTTPException(
             status_code=400,
             detail="Invalid verification token"
         )
+    update_draft(verification_in.registration_id, email_verified=True)
     return {"verified": True}
 
 @router.post("/personal-info")
 def personal_info(
     *,
-    db: Session = Depends(get_db),
     personal_info_in: RegistrationPersonalInfo
 ) -> Any:
     """Submit personal information."""
+    info = PersonalInfo(**personal_info_in.model_dump(exclude={"registration_id"}))
+    update_draft(personal_info_in.registration_id, personal_info=info)
     return {"status": "success"}
 
-@router.post("/verify-identity")
-def verify_identity(
-    *,
-    db: Session = Depends(get_db),
-    identity_in: RegistrationVerifyIdentity
-) -> Any:
-    """Submit identity verification."""
-    return {"status": "success"}
+@router.post("/verify-identity", openapi_extra=VERIFY_IDENTITY_BODY)
+async def verify_identity(request: Request, registration_id: str, db: Session = Depends(get_db)) -> Any:
+    """Submit identity verification as multipart/form-data.
+
+    The registration is checked before any of the body is read, so only live
+    drafts can store files, each under ``identity/<registration_id>/``.
+    ``id_image`` (JPEG, PNG or PDF, up to ``identity_upload_max_bytes``) is
+    streamed to the blob store and hashed as it arrives, so a worker holds
+    one chunk of it at a time; only a reference to it is kept on the draft.
+    Each stored file is recorded in identity_uploads before the draft points
+    at it, so one the registration never claims is swept when the draft
+    expires. Re-sending the same file keeps the copy already stored. The
+    draft is only read again when the upload is done, so steps submitted
+    meanwhile are kept.
+    """
+    await to_thread.run_sync(get_open_draft, registration_id)
+    store = get_blob_store()
+    fields, blob = await receive_upload(
+        request,
+        "id_image",
+        store,
+        settings.identity_upload_max_bytes,
+        IDENTITY_DOCUMENT_TYPES,
+        key_prefix=f"identity/{registration_id}/"
+    )
+    try:
+        identity = IdentityDetails(**{**fields, "document": IdentityDocument(**asdict(blob))})
+        # Again, as the draft may have expired or completed during the upload
+        draft = await to_thread.run_sync(get_open_draft, registration_id)
+    except (ValidationError, HTTPException) as exc:
+        await to_thread.run_sync(store.delete, blob.key)
+        if isinstance(exc, ValidationError):
+            raise RequestValidationError(exc.errors(include_url=False))
+        raise
+    await to_thread.run_sync(record_upload, db, registration_id, identity, draft.expires_at)
+
+    def replace_identity(current: RegistrationDraft) -> Dict[str, Any]:
+        previous = current.identity.document if current.identity else None
+        if previous is not None and previous.sha256 == blob.sha256:
+            # The same file again, e.g. a retry: keep the stored copy
+            return {"identity": identity.model_copy(update={"document": previous})}
+        return {"identity": identity}
+
+    try:
+        before, after = await to_thread.run_sync(modify_draft, registration_id, replace_identity)
+    except HTTPException:
+        await to_thread.run_sync(discard_uploads, db, registration_id, [blob.key], store)
+        raise
+    # Whichever of this upload and the one it replaced the draft no longer uses
+    kept = after.identity.document
+    replaced = before.identity.document.key if before.identity else None
+    unused = [key for key in (blob.key, replaced) if key is not None and key != kept.key]
+    if unused:
+        await to_thread.run_sync(discard_uploads, db, registration_id, unused, store)
+    return {"status": "success", "document": kept.model_dump(exclude={"key"})}
 
 @router.post("/relationships")
 def relationships(
@@ -75,5 +201,68 @@ def relationships(
     db: Session = Depends(get_db),
     relationships_in: RegistrationRelationships
 ) -> Any:
-    """Submit relationship information."""
-    return {"status": "success"}
+    """Submit relationship information and complete the registration.
+
+    The final step, and the only one that writes the applicant to the
+    database: the user (pending staff approval) with their contact details,
+    the claim on their identity document and a pending contact request per
+    listed contact are created in one transaction. Retrying once it has
+    succeeded returns the same user without writing again.
+    """
+    draft = get_draft(relationships_in.registration_id)
+    if draft.user_id is not None:
+        return {"status": "success", "userId": draft.user_id}
+
+    missing = [
+        step for step, done in (
+            ("verify-email", draft.email_verified),
+            ("personal-info", draft.personal_info is not None),
+            ("verify-identity", draft.identity is not None)
+        ) if not done
+    ]
+    if missing:
+        raise HTTPException(
+            status_code=409,
+            detail={"message": "Registration incomplete", "missing_steps": missing}
+        )
+
+    contact_ids = set(relationships_in.contacts)
+    if contact_ids and len(set(db.scalars(select(User.id).where(User.id.in_(contact_ids))))) != len(contact_ids):
+        raise HTTPException(status_code=400, detail="Invalid contact IDs")
+
+    info = draft.personal_info
+    user = User(
+        email=draft.email,
+        role=draft.user_type,
+        name=info.name,
+        phone=info.phone,
+        address=info.address,
+        status="pending"
+    )
+    db.add(user)
+    db.flush()
+    claim_upload(db, relationships_in.registration_id, draft.identity, draft.expires_at, user.id)
+    contacts = [
+        Contact(requestor_id=user.id, contact_id=contact_id, relationship=relationship, status="pending")
+        for contact_id, relationship in zip(relationships_in.contacts, relationships_in.relationships)
+    ]
+    db.add_all(contacts)
+    db.flush()
+    # Captured before commit expires the rows
+    user_id, events = user.id, [contact_event(contact) for contact in contacts]
+    try:
+        db.commit()
+    except IntegrityError:
+        # Registered by someone else since this draft was started
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Email already registered")
+
+    try:
+        registration_sessions.update(relationships_in.registration_id, user_id=user_id)
+    except RegistrationCompleted:
+        pass  # Already recorded by a concurrent request
+    # Anything else uploaded for this draft, e.g. by a request racing a replacement
+    discard_uploads(db, relationships_in.registration_id)
+    for data in events:
+        event_bus.publish((data["requestor_id"], data["contact_id"]), "contact.requested", data)
+    return {"status": "success", "userId": user_id}
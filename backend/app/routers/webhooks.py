@@ -0,0 +1,44 @@
+from typing import Optional
+from fastapi import APIRouter, Header, HTTPException, Request, Response
+from jose import JWTError, jwt
+from app.core.room_events import room_event_worker
+from app.providers.base import ProviderError
+from app.providers.livekit import LiveKitProvider
+from app.providers.registry import registry
+
+router = APIRouter()
+
+def _livekit_provider(api_key: str) -> Optional[LiveKitProvider]:
+    for provider in registry.all():
+        if isinstance(provider, LiveKitProvider) and provider.api_key == api_key:
+            return provider
+    return None
+
+@router.post("/livekit", status_code=202)
+async def livekit_webhook(request: Request, authorization: Optional[str] = Header(None)):
+    """Receive LiveKit room, participant and egress events.
+
+    The signature is checked against the cluster that issued it (the JWT's
+    ``iss`` is its API key); accepted events are applied asynchronously in
+    batches. A full queue answers 503 so LiveKit retries later.
+    """
+    if not authorization:
+        raise HTTPException(status_code=401, detail="Missing webhook signature")
+    token = authorization.removeprefix("Bearer ").strip()
+    try:
+        api_key = jwt.get_unverified_claims(token).get("iss")
+    except JWTError:
+        raise HTTPException(status_code=401, detail="Invalid webhook signature")
+    provider = _livekit_provider(api_key) if api_key else None
+    if provider is None:
+        raise HTTPException(status_code=401, detail="Unknown webhook issuer")
+
+    body = await request.body()
+    try:
+        event = provider.verify_webhook(body, token)
+    except (ProviderError, ValueError):
+        raise HTTPException(status_code=401, detail="Invalid webhook signature")
+
+    if not room_event_worker.enqueue(event):
+        raise HTTPException(status_code=503, detail="Event queue full", headers={"Retry-After": "1"})
+    return Response(status_code=202)
@@ -24,3 +24,7 @@ class ContactUpdate(BaseModel):
     relationship: Optional[str] = None
 
     model_config = ConfigDict(from_attributes=True)
+
+class ContactFilters(BaseModel):
+    created_from: Optional[datetime] = None  # inclusive
+    created_to: Optional[datetime] = None  # exclusive
@@ -57,6 +57,7 @@ class FacilitySettings(BaseModel):
         maintenance_window={}
     )
     custom_settings: Optional[Dict[str, Any]] = None
+    video_provider: Optional[str] = None  # provider registry name; None uses the default
 
 class FacilityBase(BaseModel):
     name: constr(min_length=1, max_length=255)
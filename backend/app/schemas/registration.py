@@ -1,26 +1,55 @@
-from typing import Optional, List
+from datetime import datetime
+from typing import Literal, Optional, List
 from uuid import UUID
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, model_validator
 
 class RegistrationStart(BaseModel):
     email: EmailStr
-    user_type: str
+    user_type: Literal['resident', 'visitor', 'attorney']  # staff accounts are not self-registered
 
 class RegistrationVerifyEmail(BaseModel):
+    registration_id: str
     email: EmailStr
     token: str
 
-class RegistrationPersonalInfo(BaseModel):
+class PersonalInfo(BaseModel):
     name: str
     phone: Optional[str] = None
     address: Optional[str] = None
 
-class RegistrationVerifyIdentity(BaseModel):
+class RegistrationPersonalInfo(PersonalInfo):
+    registration_id: str
+
+class IdentityDocument(BaseModel):
+    """Reference to an uploaded ID image in the blob store."""
+    key: str
+    sha256: str
+    size: int
+    content_type: str
+
+class IdentityDetails(BaseModel):
     id_type: str
     id_number: str
     id_expiry: str
-    id_image: str
+    document: IdentityDocument
 
 class RegistrationRelationships(BaseModel):
+    registration_id: str
     contacts: List[UUID]
     relationships: List[str]
+
+    @model_validator(mode="after")
+    def check_pairs(self):
+        if len(self.contacts) != len(self.relationships):
+            raise ValueError("contacts and relationships must be the same length")
+        return self
+
+class RegistrationDraft(BaseModel):
+    """Everything submitted so far for one registration; stored serialized until it expires."""
+    email: str
+    user_type: str
+    expires_at: datetime
+    email_verified: bool = False
+    personal_info: Optional[PersonalInfo] = None
+    identity: Optional[IdentityDetails] = None
+    user_id: Optional[UUID] = None  # set once the final step has created the user
@@ -1,13 +1,18 @@
-from datetime import datetime
-from typing import Optional, List
+from datetime import datetime, timedelta, timezone
+from typing import Annotated, Literal, Optional, List
 from uuid import UUID
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
+
+# Minutes. Bookings are tstzrange(start, start + duration): a negative one is
+# a database error and an empty one would never conflict with anything.
+MAX_CALL_DURATION_MINUTES = 24 * 60
+CallDuration = Annotated[int, Field(gt=0, le=MAX_CALL_DURATION_MINUTES)]
 
 class VideoCallBase(BaseModel):
     creator_id: UUID
     room_name: str
     scheduled_start: datetime
-    scheduled_duration: int
+    scheduled_duration: CallDuration
     max_participants: int
     participant_ids: List[UUID]
     recording_enabled: bool
@@ -19,9 +24,11 @@ class VideoCallRead(VideoCallBase):
     id: UUID
     status: str
     recording_status: Optional[str]
+    connected_participants: int = 0
     created_at: datetime
     updated_at: datetime
     participant_ids: List[str]  # Override to ensure string UUIDs in response
+    scheduled_duration: int  # Stored calls are returned as they are
     token: Optional[str] = None  # Include token in response
 
     model_config = ConfigDict(from_attributes=True)
@@ -30,8 +37,91 @@ class VideoCallUpdate(BaseModel):
     status: Optional[str] = None
     recording_status: Optional[str] = None
     scheduled_start: Optional[datetime] = None
-    scheduled_duration: Optional[int] = None
+    scheduled_duration: Optional[CallDuration] = None
     max_participants: Optional[int] = None
     participant_ids: Optional[List[UUID]] = None
 
     model_config = ConfigDict(from_attributes=True)
+
+class VideoCallFilters(BaseModel):
+    status: Literal['scheduled', 'active', 'completed', 'cancelled'] = 'scheduled'
+    start_from: Optional[datetime] = None  # inclusive
+    start_to: Optional[datetime] = None  # exclusive
+    facility_id: Optional[UUID] = None  # calls with a participant at this facility
+
+class RecurrenceRule(BaseModel):
+    frequency: Literal['daily', 'weekly']
+    interval: int = Field(1, ge=1)
+    count: Optional[int] = Field(None, ge=1)  # total occurrences, including the first
+    until: Optional[datetime] = None  # inclusive upper bound on scheduled_start
+
+    @field_validator("until")
+    @classmethod
+    def until_as_utc(cls, value: Optional[datetime]) -> Optional[datetime]:
+        # Naive values are taken as UTC, as elsewhere, so they compare with aware starts
+        if value is not None and value.tzinfo is None:
+            return value.replace(tzinfo=timezone.utc)
+        return value
+
+    @model_validator(mode="after")
+    def check_bounded(self):
+        if self.count is None and self.until is None:
+            raise ValueError("recurrence needs count or until")
+        return self
+
+    def occurrences(self, start: datetime, limit: int) -> List[datetime]:
+        """Start times generated by the rule.
+
+        Raises ``ValueError`` when the rule yields more than ``limit``, rather
+        than silently dropping the rest.
+        """
+        step = timedelta(days=self.interval * (7 if self.frequency == 'weekly' else 1))
+        if start.tzinfo is None:
+            start = start.replace(tzinfo=timezone.utc)
+        total = min(self.count or limit + 1, limit + 1)
+        starts = []
+        current = start
+        while len(starts) < total and (self.until is None or current <= self.until):
+            starts.append(current)
+            current += step
+        if len(starts) > limit:
+            raise ValueError(f"recurrence yields more than {limit} calls")
+        return starts
+
+class VideoCallBatchItem(BaseModel):
+    scheduled_start: datetime
+    scheduled_duration: CallDuration
+    max_participants: int
+    participant_ids: List[UUID]
+    recording_enabled: bool = False
+    recurrence: Optional[RecurrenceRule] = None
+
+class VideoCallBatchCreate(BaseModel):
+    calls: List[VideoCallBatchItem] = Field(..., min_length=1)
+
+class VideoCallBatchError(BaseModel):
+    index: int  # position of the spec in the request
+    detail: str
+
+class VideoCallBatchResult(BaseModel):
+    created: List[VideoCallRead]
+    errors: List[VideoCallBatchError]
+
+class CallBooking(BaseModel):
+    """A participant's time taken by a scheduled or active call."""
+    user_id: UUID
+    call_id: UUID
+    start: datetime
+    end: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+class TimeSlot(BaseModel):
+    start: datetime
+    end: datetime
+
+class AvailabilityRead(BaseModel):
+    start: datetime
+    end: datetime
+    busy: List[CallBooking]
+    free: List[TimeSlot]  # gaps of at least the requested duration, common to every user
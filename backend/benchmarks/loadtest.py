@@ -0,0 +1,178 @@
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional, Tuple
+
+Request = Tuple[str, str, dict]  # method, url, httpx keyword arguments
+
+SCENARIOS = ("create", "join", "token", "scheduled", "pending")
+
+class Workload:
+    """Builds requests for each scenario against a seeded Dataset."""
+
+    def __init__(self, data, rng: random.Random):
+        from app.core.auth import create_access_token
+        from benchmarks.seed import SLOT
+
+        self.data = data
+        self.rng = rng
+        self.callers = [resident for resident in data.residents if resident in data.approved]
+        self._slot = SLOT
+        self._slots = itertools.count()
+        self._headers: Dict = {}
+        self._create_token = create_access_token
+
+    def auth(self, user_id) -> dict:
+        headers = self._headers.get(user_id)
+        if headers is None:
+            role, facility_id = self.data.users[user_id]
+            user = SimpleNamespace(id=user_id, role=role, status="approved", facility_id=facility_id)
+            headers = self._headers[user_id] = {"Authorization": f"Bearer {self._create_token(user)}"}
+        return headers
+
+    def create(self) -> Request:
+        resident = self.rng.choice(self.callers)
+        visitor = self.rng.choice(self.data.approved[resident])
+        # Every booking gets a fresh slot, so none conflicts
+        start = self.data.next_slot + self._slot * next(self._slots)
+        return "POST", "/api/calls/create", {"headers": self.auth(resident), "json": {
+            "creator_id": str(resident),
+            "room_name": "benchmark",
+            "participant_ids": [str(resident), str(visitor)],
+            "scheduled_start": start.isoformat(),
+            "scheduled_duration": 30,
+            "max_participants": 2,
+            "recording_enabled": False,
+        }}
+
+    def join(self) -> Request:
+        call_id, _, resident = self.rng.choice(self.data.upcoming)
+        return "POST", f"/api/calls/{call_id}/join", {"headers": self.auth(resident)}
+
+    def token(self) -> Request:
+        _, room, resident = self.rng.choice(self.data.upcoming)
+        return "GET", "/api/calls/token", {"headers": self.auth(resident), "params": {"room": room, "user": str(resident)}}
+
+    def scheduled(self) -> Request:
+        resident = self.rng.choice(self.callers)
+        return "GET", "/api/calls/scheduled", {"headers": self.auth(resident)}
+
+    def pending(self) -> Request:
+        resident = self.rng.choice(self.data.residents)
+        return "GET", "/api/contacts/pending", {"headers": self.auth(resident)}
+
+async def run_load(
+    app,
+    data,
+    scenarios: Tuple[str, ...] = SCENARIOS,
+    requests: Optional[int] = None,
+    duration: Optional[float] = None,
+    concurrency: int = 16,
+    seed: int = 1
+) -> Dict[str, Dict[str, float]]:
+    """Drive ``app`` in-process over ASGI with ``concurrency`` clients.
+
+    Runs ``requests`` requests per scenario, or every scenario round-robin
+    for ``duration`` seconds, and returns latency/throughput per scenario.
+    """
+    import httpx
+    from benchmarks.report import latency_summary
+
+    workload = Workload(data, random.Random(seed))
+    builders: Dict[str, Callable[[], Request]] = {name: getattr(workload, name) for name in scenarios}
+    latencies: Dict[str, List[float]] = {name: [] for name in scenarios}
+    errors: Dict[str, int] = {name: 0 for name in scenarios}
+
+    if requests is not None:
+        order = [name for name in scenarios for _ in range(requests)]
+        random.Random(seed).shuffle(order)
+        plan = iter(order)
+    else:
+        plan = itertools.cycle(scenarios)
+    deadline = time.perf_counter() + duration if duration else None
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        async def worker():
+            for name in plan:
+                if deadline is not None and time.perf_counter() >= deadline:
+                    return
+                method, url, kwargs = builders[name]()
+                started = time.perf_counter()
+                response = await client.request(method, url, **kwargs)
+                latencies[name].append(time.perf_counter() - started)
+                if response.status_code >= 400:
+                    errors[name] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {name: latency_summary(latencies[name], errors[name], elapsed) for name in scenarios}
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Seed a database and load-test the API in-process.")
+    parser.add_argument("--database-url", default="sqlite:///./benchmark.db", help="database to seed; it is dropped and recreated")
+    parser.add_argument("--scale", default="small", choices=("tiny", "small", "default"))
+    parser.add_argument("--async-db", action="store_true", help="serve through the async routers")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, help="requests per scenario (default: run for --duration)")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds to run when --requests is not given")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--save-baseline", help="write results as a new baseline here")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed regression, as a fraction")
+    args = parser.parse_args(argv)
+
+    # Settings are read at import, so configure the app before loading it
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ["DATABASE_ASYNC"] = "true" if args.async_db else "false"
+    os.environ["VIDEO_PROVIDER"] = "fake"
+    os.environ["RATE_LIMIT_ENABLED"] = "false"
+    os.environ["QUERY_PROFILER_ENABLED"] = "false"
+    for name in ("LIVEKIT_URL", "LIVEKIT_API_KEY", "LIVEKIT_API_SECRET"):
+        os.environ.setdefault(name, "http://localhost:7880" if name == "LIVEKIT_URL" else "")
+
+    from app.database import Base, engine
+    from app.main import app
+    from benchmarks.report import compare, load_baseline, print_table, save_baseline
+    from benchmarks.seed import SCALES, seed
+
+    print(f"Seeding {args.scale} dataset into {engine.url.render_as_string(hide_password=True)}...", file=sys.stderr)
+    started = time.perf_counter()
+    Base.metadata.drop_all(engine)
+    data = seed(engine, SCALES[args.scale])
+    print(f"Seeded in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+    results = asyncio.run(run_load(
+        app,
+        data,
+        scenarios=tuple(args.scenarios.split(",")),
+        requests=args.requests,
+        duration=None if args.requests else args.duration,
+        concurrency=args.concurrency
+    ))
+    print_table(results)
+
+    # Stored with the baseline; numbers are only comparable between like runs
+    run = {"scale": args.scale, "concurrency": args.concurrency, "backend": engine.dialect.name, "async": args.async_db}
+    if args.save_baseline:
+        save_baseline(args.save_baseline, dict(results, _run=run))
+    if args.baseline:
+        baseline = load_baseline(args.baseline)
+        if baseline.pop("_run", run) != run:
+            print("WARNING baseline was recorded with different settings", file=sys.stderr)
+        regressions = compare(results, baseline, args.tolerance, ["p50_ms", "p95_ms", "p99_ms", "rps"])
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+    return 1 if any(row["errors"] for row in results.values()) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
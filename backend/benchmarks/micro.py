@@ -0,0 +1,141 @@
+import argparse
+import os
+import sys
+import timeit
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional
+
+Results = Dict[str, Dict[str, float]]
+
+def _token_minting() -> Dict[str, Callable[[], object]]:
+    from app.core.auth import create_access_token, decode_access_token
+    from app.providers.livekit import LiveKitProvider
+
+    provider = LiveKitProvider("benchmark", "http://localhost:7880", "benchmark-key", "benchmark-secret")
+    rooms = (f"room-{index}" for index in range(10 ** 9))
+    user = SimpleNamespace(id=uuid.uuid4(), role="resident", status="approved", facility_id=uuid.uuid4())
+    access_token = create_access_token(user)
+    return {
+        "room_token_uncached": lambda: provider.mint_token(next(rooms), "user"),
+        "room_token_cached": lambda: provider.mint_token("room-0", "user"),
+        "access_token_create": lambda: create_access_token(user),
+        "access_token_decode_cached": lambda: decode_access_token(access_token),
+    }
+
+def _statement_shape() -> Dict[str, Callable[[], object]]:
+    from app.core.profiler import statement_shape
+
+    statement = (
+        "SELECT video_calls.id, video_calls.status FROM video_calls JOIN call_participants "
+        "ON call_participants.call_id = video_calls.id WHERE call_participants.user_id IN (?, ?, ?, ?) "
+        "AND video_calls.status = 'scheduled' LIMIT 50"
+    )
+    return {"statement_shape": lambda: statement_shape(statement)}
+
+def _rate_limit() -> Dict[str, Callable[[], object]]:
+    from app.core.cache import InMemoryBackend
+
+    backend = InMemoryBackend()
+    return {"take_tokens": lambda: backend.take_tokens("ratelimit:/api/calls/token:user:1", 1e6, 1e6)}
+
+def _serialization() -> Dict[str, Callable[[], object]]:
+    from typing import List
+    from fastapi.responses import JSONResponse
+    from pydantic import TypeAdapter
+    from app.models.contacts import Contact
+    from app.models.video_calls import VideoCall
+    from app.routers.calls import call_json
+    from app.routers.contacts import contact_json
+    from app.schemas.contacts import ContactRead
+    from app.schemas.video_calls import VideoCallRead
+
+    now = datetime.now(timezone.utc)
+
+    def call_row() -> VideoCall:
+        return VideoCall(
+            id=uuid.uuid4(),
+            creator_id=uuid.uuid4(),
+            room_name=f"call-{uuid.uuid4()}",
+            status="scheduled",
+            scheduled_start=now,
+            scheduled_duration=30,
+            max_participants=2,
+            participant_ids=[uuid.uuid4(), uuid.uuid4()],
+            recording_enabled=False,
+            connected_participants=0,
+            created_at=now,
+            updated_at=now,
+        )
+
+    call = call_row()
+    page = [call_row() for _ in range(50)]
+    contact = Contact(
+        id=uuid.uuid4(), requestor_id=uuid.uuid4(), contact_id=uuid.uuid4(),
+        relationship="family", status="pending", created_at=now, updated_at=now,
+    )
+    calls = TypeAdapter(List[VideoCallRead])
+
+    # "before" is the path responses took through FastAPI: a dict from
+    # VideoCall.dict() (or the rows) validated against response_model,
+    # dumped to JSON-compatible values, then encoded with the stdlib
+    return {
+        "call_before": lambda: JSONResponse(VideoCallRead.model_validate(call.dict()).model_dump(mode="json")).body,
+        "call_after": lambda: call_json.render(call),
+        "call_page_50_before": lambda: JSONResponse(calls.dump_python(calls.validate_python(page, from_attributes=True), mode="json")).body,
+        "call_page_50_after": lambda: call_json.render_many(page),
+        "contact_before": lambda: JSONResponse(ContactRead.model_validate(contact).model_dump(mode="json")).body,
+        "contact_after": lambda: contact_json.render(contact),
+    }
+
+# Groups are set up lazily so --only skips unrelated imports
+GROUPS: Dict[str, Callable[[], Dict[str, Callable[[], object]]]] = {
+    "tokens": _token_minting,
+    "profiler": _statement_shape,
+    "ratelimit": _rate_limit,
+    "serialization": _serialization,
+}
+
+def measure(func: Callable[[], object], number: Optional[int] = None, repeat: int = 5) -> Dict[str, float]:
+    """Best of ``repeat`` timings; ``number`` is calibrated to ~0.2s per run if not given."""
+    timer = timeit.Timer(func)
+    if number is None:
+        number, _ = timer.autorange()
+    best = min(timer.repeat(repeat=repeat, number=number)) / number
+    return {"us_per_op": round(best * 1e6, 3), "ops_per_second": round(1 / best, 1)}
+
+def run_micro(groups: Optional[List[str]] = None, number: Optional[int] = None, repeat: int = 5) -> Results:
+    results: Results = {}
+    for group in groups or GROUPS:
+        for name, func in GROUPS[group]().items():
+            results[name] = measure(func, number, repeat)
+    return results
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Time hot paths in isolation.")
+    parser.add_argument("--only", help=f"comma-separated groups: {', '.join(GROUPS)}")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--save-baseline", help="write results as a new baseline here")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed regression, as a fraction")
+    args = parser.parse_args(argv)
+
+    for name in ("LIVEKIT_URL", "LIVEKIT_API_KEY", "LIVEKIT_API_SECRET"):
+        os.environ.setdefault(name, "http://localhost:7880" if name == "LIVEKIT_URL" else "")
+    from benchmarks.report import compare, load_baseline, print_table, save_baseline
+
+    results = run_micro(args.only.split(",") if args.only else None, repeat=args.repeat)
+    print_table(results)
+    if args.save_baseline:
+        save_baseline(args.save_baseline, results)
+    if args.baseline:
+        regressions = compare(results, load_baseline(args.baseline), args.tolerance, ["us_per_op"])
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
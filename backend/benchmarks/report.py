@@ -0,0 +1,64 @@
+import json
+import math
+from typing import Dict, List, Optional
+
+Results = Dict[str, Dict[str, float]]
+
+# Metrics where a larger value is an improvement, and suffixes of costs;
+# anything else (request and error counts) is not compared
+HIGHER_IS_BETTER = {"rps", "ops_per_second"}
+COST_SUFFIXES = ("_ms", "_per_op")
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(fraction * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+def latency_summary(latencies: List[float], errors: int, elapsed: float) -> Dict[str, float]:
+    values = sorted(latencies)
+    return {
+        "requests": len(values),
+        "errors": errors,
+        "rps": round(len(values) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(values, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(values, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(values, 0.99) * 1000, 2),
+    }
+
+def compare(results: Results, baseline: Results, tolerance: float, metrics: Optional[List[str]] = None) -> List[str]:
+    """Regressions of ``results`` against ``baseline`` beyond ``tolerance`` (0.2 = 20%)."""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        for metric in metrics or previous.keys():
+            if metric not in current or metric not in previous or not previous[metric]:
+                continue
+            if metric in HIGHER_IS_BETTER:
+                worse = current[metric] < previous[metric] * (1 - tolerance)
+            elif metric.endswith(COST_SUFFIXES):
+                worse = current[metric] > previous[metric] * (1 + tolerance)
+            else:
+                continue
+            if worse:
+                regressions.append(f"{name} {metric}: {current[metric]} vs baseline {previous[metric]}")
+    return regressions
+
+def print_table(results: Results) -> None:
+    columns = sorted({metric for row in results.values() for metric in row}, key=lambda m: (m.endswith("_ms"), m))
+    width = max(len(name) for name in results) if results else 10
+    print(f"{'':{width}}  " + "  ".join(f"{column:>10}" for column in columns))
+    for name, row in results.items():
+        print(f"{name:{width}}  " + "  ".join(f"{row.get(column, ''):>10}" for column in columns))
+
+def load_baseline(path: str) -> Results:
+    with open(path) as file:
+        return json.load(file)
+
+def save_baseline(path: str, results: Results) -> None:
+    with open(path, "w") as file:
+        json.dump(results, file, indent=2, sort_keys=True)
+        file.write("\n")
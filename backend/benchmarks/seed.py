@@ -0,0 +1,150 @@
+import random
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+from sqlalchemy import insert
+from sqlalchemy.engine import Engine
+from app.core.security import get_password_hash
+from app.database import Base
+from app.models.contacts import Contact
+from app.models.facilities import Facility
+from app.models.users import User
+from app.models.video_calls import CallParticipant, VideoCall, scheduled_end_for
+from app.schemas.facilities import FacilitySettings
+
+@dataclass(frozen=True)
+class Scale:
+    facilities: int
+    residents: int
+    visitors: int
+    staff: int
+    contacts_per_resident: int
+    calls: int
+
+SCALES = {
+    "tiny": Scale(facilities=2, residents=20, visitors=40, staff=2, contacts_per_resident=3, calls=200),
+    "small": Scale(facilities=5, residents=1000, visitors=2000, staff=20, contacts_per_resident=3, calls=10000),
+    "default": Scale(facilities=20, residents=10000, visitors=20000, staff=200, contacts_per_resident=4, calls=200000),
+}
+
+# Seeded calls take consecutive slots this far apart, so no participant is
+# ever double-booked, and new bookings made by the load test start after them
+SLOT = timedelta(minutes=31)
+CALL_MINUTES = 30
+CHUNK = 5000
+
+@dataclass
+class Dataset:
+    """Ids the load test needs to build requests against the seeded data."""
+    residents: List[UUID] = field(default_factory=list)
+    staff: List[UUID] = field(default_factory=list)
+    # resident -> approved visitor contacts
+    approved: Dict[UUID, List[UUID]] = field(default_factory=dict)
+    # (call id, room, resident) for calls still scheduled
+    upcoming: List[Tuple[UUID, str, UUID]] = field(default_factory=list)
+    users: Dict[UUID, Tuple[str, Optional[UUID]]] = field(default_factory=dict)  # id -> (role, facility)
+    next_slot: Optional[datetime] = None
+
+def _uuid(rng: random.Random) -> UUID:
+    return UUID(int=rng.getrandbits(128), version=4)
+
+def _insert(conn, table, rows: List[dict]) -> None:
+    for start in range(0, len(rows), CHUNK):
+        conn.execute(insert(table), rows[start:start + CHUNK])
+
+def seed(engine: Engine, scale: Scale, now: Optional[datetime] = None, seed: int = 1) -> Dataset:
+    """Create the schema and bulk-load a reproducible dataset of ``scale``.
+
+    Calls are spread one slot apart around ``now``: those already over are
+    completed, the rest scheduled. Every resident has a few visitor contacts,
+    most approved; the rest are pending requests.
+    """
+    rng = random.Random(seed)
+    now = (now or datetime.now(timezone.utc)).replace(second=0, microsecond=0)
+    Base.metadata.create_all(engine)
+    data = Dataset()
+    password = get_password_hash("benchmark")
+    settings = FacilitySettings(video_provider="fake").model_dump()
+
+    facilities = [
+        {"id": _uuid(rng), "name": f"Benchmark Facility {index}", "settings": settings}
+        for index in range(scale.facilities)
+    ]
+    users = []
+    for role, count in (("resident", scale.residents), ("visitor", scale.visitors), ("staff", scale.staff)):
+        for index in range(count):
+            user_id = _uuid(rng)
+            facility_id = facilities[index % len(facilities)]["id"]
+            users.append({
+                "id": user_id,
+                "email": f"{role}{index}.{user_id.hex[:8]}@bench.example",
+                "hashed_password": password,
+                "role": role,
+                "name": f"{role.title()} {index}",
+                "status": "approved",
+                "facility_id": facility_id if role != "visitor" else None,
+            })
+            data.users[user_id] = (role, facility_id if role != "visitor" else None)
+            if role == "resident":
+                data.residents.append(user_id)
+            elif role == "staff":
+                data.staff.append(user_id)
+    visitors = [row["id"] for row in users if row["role"] == "visitor"]
+
+    contacts = []
+    for resident in data.residents:
+        for visitor in rng.sample(visitors, scale.contacts_per_resident):
+            status = "approved" if rng.random() < 0.8 else "pending"
+            contacts.append({
+                "id": _uuid(rng),
+                "requestor_id": visitor,
+                "contact_id": resident,
+                "relationship": "family",
+                "status": status,
+            })
+            if status == "approved":
+                data.approved.setdefault(resident, []).append(visitor)
+    callers = [resident for resident in data.residents if resident in data.approved]
+
+    first_slot = now - SLOT * (scale.calls * 9 // 10)
+    calls, participants = [], []
+    for index in range(scale.calls):
+        resident = callers[index % len(callers)]
+        visitor = rng.choice(data.approved[resident])
+        start = first_slot + SLOT * index
+        end = scheduled_end_for(start, CALL_MINUTES)
+        status = "completed" if end <= now else "scheduled"
+        call_id, room = _uuid(rng), f"call-{_uuid(rng)}"
+        calls.append({
+            "id": call_id,
+            "creator_id": resident,
+            "room_name": room,
+            "status": status,
+            "scheduled_start": start,
+            "scheduled_duration": CALL_MINUTES,
+            "max_participants": 2,
+            "participant_ids": VideoCall.encode_participant_ids([resident, visitor]),
+            "recording_enabled": False,
+            "video_provider": "fake",
+            "connected_participants": 0,
+        })
+        for user_id in (resident, visitor):
+            participants.append({
+                "call_id": call_id,
+                "user_id": user_id,
+                "status": status,
+                "scheduled_start": start,
+                "scheduled_end": end,
+            })
+        if status == "scheduled":
+            data.upcoming.append((call_id, room, resident))
+    data.next_slot = first_slot + SLOT * scale.calls
+
+    with engine.begin() as conn:
+        _insert(conn, Facility.__table__, facilities)
+        _insert(conn, User.__table__, users)
+        _insert(conn, Contact.__table__, contacts)
+        _insert(conn, VideoCall.__table__, calls)
+        _insert(conn, CallParticipant.__table__, participants)
+    return data
@@ -1,17 +1,34 @@
+import os
+from uuid import UUID
+
+# Settings requires LiveKit configuration; the provider falls back to mock tokens
+os.environ.setdefault("LIVEKIT_URL", "http://localhost:7880")
+os.environ.setdefault("LIVEKIT_API_KEY", "")
+os.environ.setdefault("LIVEKIT_API_SECRET", "")
+# Per-request SQL profiling so tests can assert query budgets
+os.environ.setdefault("QUERY_PROFILER_ENABLED", "true")
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from app.database import Base
 from app.main import app
+from app.core.auth import create_access_token
+from app.core.instrumentation import instrument_engine
 from app.core.deps import get_db
 from app.models.facilities import Facility
 from app.models.users import User
 from app.schemas.facilities import FacilitySettings
 
+STAFF_USER_ID = UUID("123e4567-e89b-12d3-a456-426614174000")
+RESIDENT_USER_ID = UUID("123e4567-e89b-12d3-a456-426614174001")
+FACILITY_ID = UUID("123e4567-e89b-12d3-a456-426614174000")
+
 # Use in-memory SQLite for testing
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
 engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+instrument_engine(engine, "test")
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 @pytest.fixture(scope="session")
@@ -25,6 +42,15 @@ def db():
         settings=FacilitySettings().model_dump()
     )
     db.add(facility)
+    db.add(Facility(
+        id=FACILITY_ID,
+        name="Test Facility",
+        settings=FacilitySettings().model_dump()
+    ))
+    db.add_all([
+        User(id=STAFF_USER_ID, email="staff@example.com", name="Staff", role="staff", status="approved", facility_id=FACILITY_ID),
+        User(id=RESIDENT_USER_ID, email="resident@example.com", name="Resident", role="resident", status="approved", facility_id=FACILITY_ID),
+    ])
     db.commit()
     
     yield db
@@ -44,7 +70,15 @@ def client(db):
     del app.dependency_overrides[get_db]
 
 @pytest.fixture
-def authed_client(client):
-    """Client with test token."""
-    client.headers["Authorization"] = "Bearer test_token"
+def staff_user(db):
+    return db.get(User, STAFF_USER_ID)
+
+@pytest.fixture
+def resident_user(db):
+    return db.get(User, RESIDENT_USER_ID)
+
+@pytest.fixture
+def authed_client(client, staff_user):
+    """Client with a staff access token."""
+    client.headers["Authorization"] = f"Bearer {create_access_token(staff_user)}"
     return client
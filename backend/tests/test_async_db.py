@@ -0,0 +1,62 @@
+import pytest
+
+pytest.importorskip("greenlet")
+pytest.importorskip("aiosqlite")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from app.core.deps import get_async_db
+from app.routers.aio import calls, contacts, facilities
+from conftest import FACILITY_ID, RESIDENT_USER_ID, SQLALCHEMY_DATABASE_URL
+
+@pytest.fixture
+def async_client(db, authed_client):
+    engine = create_async_engine(SQLALCHEMY_DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://"))
+    session_factory = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with session_factory() as session:
+            yield session
+
+    app = FastAPI()
+    app.include_router(contacts.router, prefix="/api/contacts")
+    app.include_router(facilities.router, prefix="/api/facilities")
+    app.include_router(calls.router, prefix="/api/calls")
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    client = TestClient(app)
+    client.headers.update(authed_client.headers)
+    yield client
+
+def test_async_create_and_join_call(async_client):
+    response = async_client.post("/api/calls/create", json={
+        "creator_id": "123e4567-e89b-12d3-a456-426614174000",
+        "room_name": "test-room",
+        "participant_ids": [str(RESIDENT_USER_ID)],
+        "scheduled_start": "2025-02-23T14:00:00Z",
+        "scheduled_duration": 30,
+        "max_participants": 2,
+        "recording_enabled": True
+    })
+    assert response.status_code == 200
+    call_id = response.json()["id"]
+
+    response = async_client.post(f"/api/calls/{call_id}/join")
+    assert response.status_code == 200
+    assert "token" in response.json()
+
+def test_async_contact_approval(async_client):
+    response = async_client.post("/api/contacts/request", json={
+        "requestor_id": "123e4567-e89b-12d3-a456-426614174000",
+        "contact_id": str(RESIDENT_USER_ID),
+        "relationship": "parent"
+    })
+    assert response.status_code == 200
+    response = async_client.put(f"/api/contacts/{response.json()['id']}/approve", json={"status": "approved"})
+    assert response.status_code == 200
+    assert response.json()["status"] == "approved"
+
+def test_async_get_facility_settings(async_client):
+    response = async_client.get(f"/api/facilities/{FACILITY_ID}/settings")
+    assert response.status_code == 200
+    assert "network" in response.json()["settings"]
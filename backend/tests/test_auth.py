@@ -0,0 +1,122 @@
+from uuid import uuid4
+import pytest
+from jose import JWTError
+from app.config import settings
+from app.core import auth
+from app.core.security import get_password_hash
+from app.models.users import User
+
+def _create_user(db, password="secret"):
+    user = User(
+        id=uuid4(),
+        email=f"user_{uuid4().hex[:8]}@example.com",
+        name="Login User",
+        role="visitor",
+        status="approved",
+        hashed_password=get_password_hash(password)
+    )
+    db.add(user)
+    db.commit()
+    return user
+
+def test_login_issues_usable_token(client, db):
+    user = _create_user(db)
+    response = client.post("/api/auth/token", data={"username": user.email, "password": "secret"})
+    assert response.status_code == 200
+    token = response.json()["access_token"]
+    assert auth.decode_access_token(token).id == user.id
+
+def test_login_rejects_bad_password(client, db):
+    user = _create_user(db)
+    response = client.post("/api/auth/token", data={"username": user.email, "password": "wrong"})
+    assert response.status_code == 401
+
+def test_invalid_token_rejected(client):
+    response = client.get("/api/contacts/pending", headers={"Authorization": "Bearer not-a-jwt"})
+    assert response.status_code == 401
+
+def test_cached_claims_skip_signature_check(staff_user, monkeypatch):
+    token = auth.create_access_token(staff_user)
+    assert auth.decode_access_token(token).id == staff_user.id
+
+    def fail_decode(*args, **kwargs):
+        raise AssertionError("token should have been served from cache")
+    monkeypatch.setattr(auth.jwt, "decode", fail_decode)
+    assert auth.decode_access_token(token).role == "staff"
+
+def test_logout_revokes_token(client, staff_user):
+    headers = {"Authorization": f"Bearer {auth.create_access_token(staff_user)}"}
+    assert client.get("/api/contacts/pending", headers=headers).status_code == 200
+    assert client.post("/api/auth/logout", headers=headers).status_code == 204
+    assert client.get("/api/contacts/pending", headers=headers).status_code == 401
+
+def test_user_revocation_spares_tokens_issued_after_it(staff_user):
+    from datetime import timedelta
+    user_id = uuid4()
+    auth.revoke_user_tokens(user_id)
+    now = auth._revoked_users.get(user_id)
+
+    def issued(at):
+        return auth.AuthenticatedUser(user_id, "visitor", "approved", None, uuid4().hex, at, at + 60)
+
+    assert auth._is_revoked(issued(now - 1))
+    # iat is whole seconds: a login in the same second must not be locked out
+    assert not auth._is_revoked(issued(now))
+    with pytest.raises(ValueError):
+        auth.create_access_token(staff_user, timedelta(minutes=settings.access_token_max_expire_minutes + 1))
+
+def test_revocations_are_not_evicted_by_volume(staff_user):
+    token = auth.create_access_token(staff_user)
+    auth.revoke_token(token)
+    # Far more revocations than any cache in front of them holds
+    for _ in range(settings.token_cache_size + 10):
+        auth.revoke_token(auth.create_access_token(staff_user))
+    with pytest.raises(JWTError):
+        auth.decode_access_token(token)
+
+def test_login_sheds_load_when_hash_queue_full(client, db, monkeypatch):
+    import threading
+    from app.core import security
+    user = _create_user(db)
+    monkeypatch.setattr(security, "_hash_slots", threading.BoundedSemaphore(1))
+    security._hash_slots.acquire()
+    response = client.post("/api/auth/token", data={"username": user.email, "password": "secret"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+def test_cancelled_verify_keeps_its_slot_until_bcrypt_finishes(monkeypatch):
+    import asyncio
+    import threading
+    from app.core import security
+    slots, started, finish = threading.BoundedSemaphore(1), threading.Event(), threading.Event()
+    monkeypatch.setattr(security, "_hash_slots", slots)
+
+    def slow_verify(plain, hashed):
+        started.set()
+        finish.wait(5)
+        return True, None
+
+    monkeypatch.setattr(security.pwd_context, "verify_and_update", slow_verify)
+
+    async def disconnect():
+        task = asyncio.create_task(security.verify_and_update_password("secret", "hash"))
+        await asyncio.to_thread(started.wait, 5)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        # The client is gone but bcrypt is still running
+        with pytest.raises(security.HashingQueueFull):
+            await security.verify_and_update_password("secret", "hash")
+
+    asyncio.run(disconnect())
+    finish.set()
+    assert slots.acquire(timeout=5)
+
+def test_login_rehashes_outdated_hash(client, db):
+    from passlib.context import CryptContext
+    user = _create_user(db)
+    user.hashed_password = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("secret")
+    db.commit()
+    response = client.post("/api/auth/token", data={"username": user.email, "password": "secret"})
+    assert response.status_code == 200
+    db.refresh(user)
+    assert user.hashed_password.startswith("$2b$12$")
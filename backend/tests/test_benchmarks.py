@@ -0,0 +1,52 @@
+import asyncio
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+from app.core.deps import get_db
+from app.main import app
+from app.models.video_calls import VideoCall
+from benchmarks.loadtest import SCENARIOS, run_load
+from benchmarks.report import compare
+from benchmarks.seed import SCALES, seed
+
+def test_seed_is_reproducible(tmp_path):
+    first = seed(create_engine(f"sqlite:///{tmp_path}/first.db"), SCALES["tiny"])
+    engine = create_engine(f"sqlite:///{tmp_path}/second.db")
+    second = seed(engine, SCALES["tiny"])
+
+    assert first.residents == second.residents
+    assert first.approved == second.approved
+    with engine.connect() as conn:
+        assert conn.execute(select(func.count()).select_from(VideoCall)).scalar() == SCALES["tiny"].calls
+    assert second.upcoming and second.next_slot is not None
+
+def test_load_run_against_seeded_data(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/bench.db", connect_args={"check_same_thread": False})
+    data = seed(engine, SCALES["tiny"])
+    Session = sessionmaker(bind=engine)
+
+    def override_get_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    try:
+        results = asyncio.run(run_load(app, data, requests=3, concurrency=2))
+    finally:
+        del app.dependency_overrides[get_db]
+
+    assert set(results) == set(SCENARIOS)
+    for name, row in results.items():
+        assert row["requests"] == 3, name
+        assert row["errors"] == 0, name
+        assert row["p50_ms"] <= row["p99_ms"]
+
+def test_compare_flags_regressions_beyond_tolerance():
+    baseline = {"join": {"p95_ms": 10.0, "rps": 100.0}, "token": {"us_per_op": 5.0}}
+    results = {"join": {"p95_ms": 11.0, "rps": 70.0}, "token": {"us_per_op": 7.0}, "new": {"p95_ms": 1.0}}
+
+    regressions = compare(results, baseline, tolerance=0.2)
+
+    assert regressions == ["join rps: 70.0 vs baseline 100.0", "token us_per_op: 7.0 vs baseline 5.0"]
@@ -20,7 +20,7 @@ def test_join_call(authed_client):
         "creator_id": "123e4567-e89b-12d3-a456-426614174000",
         "room_name": "test-room",
         "participant_ids": ["123e4567-e89b-12d3-a456-426614174001"],
-        "scheduled_start": "2025-02-23T12:00:00Z",
+        "scheduled_start": "2025-02-23T13:00:00Z",
         "scheduled_duration": 30,
         "max_participants": 2,
         "recording_enabled": True
@@ -33,6 +33,31 @@ def test_join_call(authed_client):
     data = response.json()
     assert "token" in data
 
+def test_join_call_on_removed_provider(authed_client, db):
+    from datetime import datetime, timezone
+    from uuid import uuid4
+    from app.models.video_calls import VideoCall
+    from conftest import STAFF_USER_ID
+    call = VideoCall(
+        creator_id=STAFF_USER_ID,
+        room_name=f"call-{uuid4()}",
+        status="scheduled",
+        scheduled_start=datetime(2036, 1, 1, 9, 0, tzinfo=timezone.utc),
+        scheduled_duration=30,
+        max_participants=2,
+        participant_ids=[STAFF_USER_ID],
+        video_provider="decommissioned"
+    )
+    db.add(call)
+    db.commit()
+
+    response = authed_client.post(f"/api/calls/{call.id}/join")
+
+    assert response.status_code == 503
+    assert "decommissioned" in response.json()["detail"]
+    db.refresh(call)
+    assert call.status == "scheduled"
+
 def test_get_scheduled_calls(authed_client):
     response = authed_client.get("/api/calls/scheduled")
     assert response.status_code == 200
@@ -42,3 +67,238 @@ def test_get_scheduled_calls(authed_client):
         assert "id" in call
         assert "scheduled_start" in call
         assert "participant_ids" in call
+
+def test_participant_rows_follow_call(db):
+    from datetime import datetime, timezone
+    from uuid import UUID, uuid4
+    from app.models.video_calls import CallParticipant, VideoCall
+    participant_id = UUID("123e4567-e89b-12d3-a456-426614174001")
+    call = VideoCall(
+        creator_id=UUID("123e4567-e89b-12d3-a456-426614174000"),
+        room_name=f"call-{uuid4()}",
+        status="scheduled",
+        scheduled_start=datetime(2025, 2, 23, 12, 0, tzinfo=timezone.utc),
+        scheduled_duration=30,
+        max_participants=2,
+        participant_ids=[participant_id, participant_id]
+    )
+    db.add(call)
+    db.commit()
+    assert call.participant_ids == [str(participant_id)]
+
+    call.status = "active"
+    db.commit()
+    row = db.query(CallParticipant).filter(CallParticipant.call_id == call.id).one()
+    assert row.user_id == participant_id
+    assert row.status == "active"
+
+def test_scheduled_calls_conditional_get(authed_client):
+    first = authed_client.get("/api/calls/scheduled")
+    etag = first.headers["ETag"]
+    assert first.headers["Cache-Control"] == "private, no-cache"
+
+    response = authed_client.get("/api/calls/scheduled", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+    authed_client.post("/api/calls/create", json={
+        "creator_id": "123e4567-e89b-12d3-a456-426614174000",
+        "room_name": "test-room",
+        "participant_ids": ["123e4567-e89b-12d3-a456-426614174001"],
+        "scheduled_start": "2025-02-24T12:00:00Z",
+        "scheduled_duration": 30,
+        "max_participants": 2,
+        "recording_enabled": False
+    })
+    response = authed_client.get("/api/calls/scheduled", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+def test_scheduled_calls_keyset_pagination(authed_client):
+    for day in (1, 2, 3):
+        authed_client.post("/api/calls/create", json={
+            "creator_id": "123e4567-e89b-12d3-a456-426614174000",
+            "room_name": "test-room",
+            "participant_ids": ["123e4567-e89b-12d3-a456-426614174001"],
+            "scheduled_start": f"2030-01-0{day}T09:00:00Z",
+            "scheduled_duration": 30,
+            "max_participants": 2,
+            "recording_enabled": False
+        })
+    params = {"start_from": "2030-01-01T00:00:00Z", "start_to": "2030-02-01T00:00:00Z", "limit": 2}
+    first = authed_client.get("/api/calls/scheduled", params=params)
+    assert [call["scheduled_start"][:10] for call in first.json()] == ["2030-01-01", "2030-01-02"]
+    cursor = first.headers["X-Next-Cursor"]
+    assert 'rel="next"' in first.headers["Link"]
+
+    second = authed_client.get("/api/calls/scheduled", params={**params, "cursor": cursor})
+    assert [call["scheduled_start"][:10] for call in second.json()] == ["2030-01-03"]
+    assert "X-Next-Cursor" not in second.headers
+
+    # Each page's ETag covers that page only
+    authed_client.post("/api/calls/create", json={
+        "creator_id": "123e4567-e89b-12d3-a456-426614174000",
+        "room_name": "test-room",
+        "participant_ids": ["123e4567-e89b-12d3-a456-426614174001"],
+        "scheduled_start": "2030-01-04T09:00:00Z",
+        "scheduled_duration": 30,
+        "max_participants": 2,
+        "recording_enabled": False
+    })
+    assert authed_client.get("/api/calls/scheduled", params=params, headers={"If-None-Match": first.headers["ETag"]}).status_code == 304
+    assert authed_client.get("/api/calls/scheduled", params={**params, "cursor": cursor}, headers={"If-None-Match": second.headers["ETag"]}).status_code == 200
+
+def test_scheduled_calls_rejects_bad_cursor(authed_client):
+    response = authed_client.get("/api/calls/scheduled", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+def test_scheduled_calls_page_size_capped(authed_client):
+    response = authed_client.get("/api/calls/scheduled", params={"limit": 10000})
+    assert response.status_code == 422
+
+def test_batch_create_with_recurrence(authed_client, db):
+    from uuid import UUID
+    from app.models.video_calls import CallParticipant
+    response = authed_client.post("/api/calls/batch", json={"calls": [
+        {
+            "scheduled_start": "2031-03-03T10:00:00Z",
+            "scheduled_duration": 20,
+            "max_participants": 2,
+            "participant_ids": ["123e4567-e89b-12d3-a456-426614174001"],
+            "recurrence": {"frequency": "weekly", "count": 4}
+        },
+        {
+            "scheduled_start": "2031-03-04T10:00:00Z",
+            "scheduled_duration": 20,
+            "max_participants": 2,
+            "participant_ids": ["00000000-0000-0000-0000-000000000000"]
+        }
+    ]})
+    assert response.status_code == 200
+    data = response.json()
+    assert [call["scheduled_start"][:10] for call in data["created"]] == [
+        "2031-03-03", "2031-03-10", "2031-03-17", "2031-03-24"
+    ]
+    assert all(call["token"] is None for call in data["created"])
+    assert data["errors"] == [{"index": 1, "detail": "Invalid participant IDs"}]
+
+    created_ids = {UUID(call["id"]) for call in data["created"]}
+    rows = db.query(CallParticipant).filter(CallParticipant.call_id.in_(created_ids)).all()
+    assert {row.call_id for row in rows} == created_ids
+
+def test_create_call_rejects_overlap(authed_client):
+    call = {
+        "creator_id": "123e4567-e89b-12d3-a456-426614174000",
+        "room_name": "test-room",
+        "participant_ids": ["123e4567-e89b-12d3-a456-426614174001"],
+        "scheduled_start": "2032-05-10T09:00:00Z",
+        "scheduled_duration": 60,
+        "max_participants": 2,
+        "recording_enabled": False
+    }
+    first = authed_client.post("/api/calls/create", json=call)
+    assert first.status_code == 200
+
+    response = authed_client.post("/api/calls/create", json={**call, "scheduled_start": "2032-05-10T09:30:00Z"})
+    assert response.status_code == 409
+    conflicts = response.json()["detail"]["conflicts"]
+    assert [c["call_id"] for c in conflicts] == [first.json()["id"]]
+
+    # Back-to-back calls share an endpoint but do not overlap
+    response = authed_client.post("/api/calls/create", json={**call, "scheduled_start": "2032-05-10T10:00:00Z"})
+    assert response.status_code == 200
+
+def test_availability_free_slots(authed_client):
+    authed_client.post("/api/calls/create", json={
+        "creator_id": "123e4567-e89b-12d3-a456-426614174000",
+        "room_name": "test-room",
+        "participant_ids": ["123e4567-e89b-12d3-a456-426614174001"],
+        "scheduled_start": "2032-06-01T10:00:00Z",
+        "scheduled_duration": 30,
+        "max_participants": 2,
+        "recording_enabled": False
+    })
+    response = authed_client.get("/api/calls/availability", params={
+        "user_id": "123e4567-e89b-12d3-a456-426614174001",
+        "start": "2032-06-01T09:00:00Z",
+        "end": "2032-06-01T12:00:00Z",
+        "duration": 45
+    })
+    assert response.status_code == 200
+    data = response.json()
+    assert [b["start"][11:16] for b in data["busy"]] == ["10:00"]
+    assert [(s["start"][11:16], s["end"][11:16]) for s in data["free"]] == [("09:00", "10:00"), ("10:30", "12:00")]
+
+def test_availability_window_validated(authed_client):
+    response = authed_client.get("/api/calls/availability", params={
+        "start": "2032-06-02T00:00:00Z",
+        "end": "2032-06-01T00:00:00Z"
+    })
+    assert response.status_code == 400
+
+def test_batch_skips_conflicting_series(authed_client):
+    item = {
+        "scheduled_start": "2033-01-03T10:00:00Z",
+        "scheduled_duration": 30,
+        "max_participants": 2,
+        "participant_ids": ["123e4567-e89b-12d3-a456-426614174001"],
+        "recurrence": {"frequency": "daily", "count": 3}
+    }
+    response = authed_client.post("/api/calls/batch", json={"calls": [
+        item,
+        {**item, "scheduled_start": "2033-01-05T10:15:00Z", "recurrence": None}
+    ]})
+    data = response.json()
+    assert len(data["created"]) == 3
+    assert data["errors"][0]["index"] == 1
+    assert data["errors"][0]["detail"].startswith("Scheduling conflict")
+
+def test_batch_rejects_oversized_recurrence_and_accepts_naive_until(authed_client):
+    item = {
+        "scheduled_start": "2034-01-02T10:00:00Z",
+        "scheduled_duration": 30,
+        "max_participants": 2,
+        "participant_ids": ["123e4567-e89b-12d3-a456-426614174001"]
+    }
+    too_many = authed_client.post("/api/calls/batch", json={"calls": [
+        {**item, "recurrence": {"frequency": "daily", "count": 5000}}
+    ]})
+    assert too_many.status_code == 422
+
+    naive_until = authed_client.post("/api/calls/batch", json={"calls": [
+        {**item, "recurrence": {"frequency": "weekly", "until": "2034-01-16T10:00:00"}}
+    ]})
+    assert naive_until.status_code == 200
+    assert len(naive_until.json()["created"]) == 3
+
+def test_interval_index_overlaps():
+    from datetime import datetime, timedelta, timezone
+    from uuid import uuid4
+    from app.core.scheduling import Booking, IntervalIndex
+    base = datetime(2032, 1, 1, tzinfo=timezone.utc)
+    user_id = uuid4()
+
+    def booking(start_hour, end_hour):
+        return Booking(user_id, uuid4(), base + timedelta(hours=start_hour), base + timedelta(hours=end_hour))
+
+    long_call, short_call = booking(0, 10), booking(2, 3)
+    index = IntervalIndex([short_call, long_call])
+    index.add(booking(11, 12))
+    assert index.overlapping(base + timedelta(hours=5), base + timedelta(hours=6)) == [long_call]
+    assert index.overlapping(base + timedelta(hours=10), base + timedelta(hours=11)) == []
+    assert len(index.overlapping(base + timedelta(hours=2), base + timedelta(hours=12))) == 3
+
+def test_call_duration_must_be_positive_and_bounded(authed_client):
+    call = {
+        "creator_id": "123e4567-e89b-12d3-a456-426614174000",
+        "room_name": "bad-duration",
+        "participant_ids": ["123e4567-e89b-12d3-a456-426614174001"],
+        "scheduled_start": "2035-03-01T12:00:00Z",
+        "max_participants": 2,
+        "recording_enabled": False
+    }
+    item = {key: call[key] for key in ("scheduled_start", "max_participants", "participant_ids")}
+    for duration in (-30, 0, 24 * 60 + 1):
+        created = authed_client.post("/api/calls/create", json={**call, "scheduled_duration": duration})
+        batch = authed_client.post("/api/calls/batch", json={"calls": [{**item, "scheduled_duration": duration}]})
+        assert (created.status_code, batch.status_code) == (422, 422), duration
@@ -37,3 +37,69 @@ def test_get_pending_contacts(authed_client):
         assert "id" in contact
         assert "status" in contact
         assert contact["status"] == "pending"
+
+def test_pending_contacts_keyset_pagination(authed_client):
+    staff_id = "123e4567-e89b-12d3-a456-426614174000"
+    created = [
+        authed_client.post("/api/contacts/request", json={
+            "requestor_id": staff_id,
+            "contact_id": staff_id,
+            "relationship": "colleague"
+        }).json()["id"]
+        for _ in range(3)
+    ]
+    first = authed_client.get("/api/contacts/pending", params={"limit": 2})
+    second = authed_client.get("/api/contacts/pending", params={"limit": 2, "cursor": first.headers["X-Next-Cursor"]})
+    assert [contact["id"] for contact in first.json() + second.json()] == created
+    assert "X-Next-Cursor" not in second.headers
+
+def _visitor(db):
+    from uuid import uuid4
+    from app.models.users import User
+    user = User(id=uuid4(), email=f"{uuid4().hex}@example.com", name="Visitor", role="visitor", status="approved")
+    db.add(user)
+    db.commit()
+    return user
+
+def test_contact_graph_caches_until_invalidated(db):
+    from app.core.contact_graph import contact_graph
+    from app.models.contacts import Contact
+    first, second = _visitor(db), _visitor(db)
+    assert contact_graph.approved_contacts(db, [first.id, second.id]) == {first.id: frozenset(), second.id: frozenset()}
+
+    db.add(Contact(requestor_id=first.id, contact_id=second.id, relationship="friend", status="approved"))
+    db.commit()
+    assert contact_graph.approved_contacts(db, [first.id])[first.id] == frozenset()
+
+    contact_graph.invalidate(first.id, second.id)
+    contacts = contact_graph.approved_contacts(db, [first.id, second.id])
+    assert contacts == {first.id: frozenset({second.id}), second.id: frozenset({first.id})}
+
+def test_calls_require_an_approved_contact(client, db, resident_user):
+    from app.core.auth import create_access_token
+    visitor = _visitor(db)
+    visitor_auth = {"Authorization": f"Bearer {create_access_token(visitor)}"}
+    call = {
+        "creator_id": str(visitor.id),
+        "room_name": "visit",
+        "participant_ids": [str(resident_user.id)],
+        "scheduled_start": "2037-05-01T10:00:00Z",
+        "scheduled_duration": 30,
+        "max_participants": 2,
+        "recording_enabled": False
+    }
+    response = client.post("/api/calls/create", json=call, headers=visitor_auth)
+    assert response.status_code == 403
+    assert response.json()["detail"]["participant_ids"] == [str(resident_user.id)]
+
+    contact_id = client.post("/api/contacts/request", headers=visitor_auth, json={
+        "requestor_id": str(visitor.id),
+        "contact_id": str(resident_user.id),
+        "relationship": "sibling"
+    }).json()["id"]
+    client.put(
+        f"/api/contacts/{contact_id}/approve",
+        json={"status": "approved"},
+        headers={"Authorization": f"Bearer {create_access_token(resident_user)}"}
+    )
+    assert client.post("/api/calls/create", json=call, headers=visitor_auth).status_code == 200
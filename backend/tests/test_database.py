@@ -0,0 +1,39 @@
+import pytest
+from sqlalchemy import create_engine, exc
+from sqlalchemy.engine import make_url
+from app.database import db_settings, engine_options
+from app.database.pool import InstrumentedQueuePool, pool_checkout_wait, pool_exhausted
+
+def test_engine_options_for_postgres(monkeypatch):
+    monkeypatch.setattr(db_settings, "pool_size", 20)
+    monkeypatch.setattr(db_settings, "statement_timeout_ms", 5000)
+    options = engine_options(make_url("postgresql://user:pw@db/openconnect"))
+    assert options["pool_size"] == 20
+    assert options["pool_pre_ping"] is True
+    assert options["connect_args"] == {"options": "-c statement_timeout=5000"}
+
+def test_engine_options_pgbouncer_disables_prepared_statements(monkeypatch):
+    monkeypatch.setattr(db_settings, "pgbouncer", True)
+    monkeypatch.setattr(db_settings, "statement_timeout_ms", 5000)
+    options = engine_options(make_url("postgresql+asyncpg://user:pw@db/openconnect"), is_async=True)
+    assert options["connect_args"] == {"statement_cache_size": 0, "prepared_statement_cache_size": 0}
+
+def test_sqlite_keeps_default_pool():
+    assert engine_options(make_url("sqlite:///./test.db")) == {}
+
+def test_pool_exhaustion_is_counted(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path}/pool.db",
+        poolclass=InstrumentedQueuePool,
+        pool_logging_name="test",
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.01
+    )
+    waits_before = pool_checkout_wait.count(pool="test")
+    with engine.connect():
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+    assert pool_exhausted.value(pool="test") == 1
+    assert pool_checkout_wait.count(pool="test") == waits_before + 2
+    engine.dispose()
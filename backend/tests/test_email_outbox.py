@@ -0,0 +1,204 @@
+import asyncio
+import smtplib
+import socketserver
+import threading
+from datetime import datetime, timedelta, timezone
+import pytest
+from app.config import settings
+from app.core.cache import InMemoryBackend
+from app.core.leader import BackendLock
+from app.core.outbox import EmailOutboxSender, deliver_batch, queue_email, retry_delay
+from app.models.email_outbox import EmailOutbox
+from conftest import TestingSessionLocal
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib: one session per connection, messages kept in memory."""
+
+    def reply(self, line: str) -> None:
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        relay = self.server
+        relay.connections += 1
+        self.reply("220 stand-in ESMTP")
+        recipients = []
+        for raw in self.rfile:
+            command = raw.decode().strip()
+            verb = command[:4].upper()
+            if verb in ("EHLO", "HELO", "MAIL", "NOOP"):
+                self.reply("250 OK")
+            elif verb == "RSET":
+                recipients = []
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                address = command.split(":", 1)[1].strip(" <>")
+                code = relay.reject.get(address)
+                if code:
+                    self.reply(f"{code} Rejected")
+                else:
+                    recipients.append(address)
+                    self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                lines = []
+                for line in self.rfile:
+                    if line == b".\r\n":
+                        break
+                    lines.append(line)
+                relay.messages.append((recipients, b"".join(lines).decode()))
+                recipients = []
+                self.reply("250 Queued")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Not implemented")
+
+@pytest.fixture
+def relay():
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _SMTPHandler)
+    server.daemon_threads = True
+    server.connections, server.messages, server.reject = 0, [], {}
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def outbox(db):
+    # Other tests (registration) queue mail in the shared database
+    db.query(EmailOutbox).delete()
+    db.commit()
+    return db
+
+def _connect(relay):
+    host, port = relay.server_address
+    return lambda: smtplib.SMTP(host, port, timeout=5)
+
+def test_queue_email_replaces_pending_messages(outbox):
+    queue_email(outbox, "dup@example.com", "email_verification", "Verify", "first")
+    queue_email(outbox, "dup@example.com", "email_verification", "Verify again", "second")
+    queue_email(outbox, "dup@example.com", "password_reset", "Reset", "other kind")
+    outbox.commit()
+
+    [row] = outbox.query(EmailOutbox).filter_by(email="dup@example.com", kind="email_verification").all()
+    # One message, carrying the latest link
+    assert (row.subject, row.body, row.status) == ("Verify again", "second", "pending")
+    row.status = "sent"
+    outbox.commit()
+    # Once sent, the address can be mailed again
+    queue_email(outbox, "dup@example.com", "email_verification", "Verify", "third")
+    outbox.commit()
+    assert outbox.query(EmailOutbox).filter_by(email="dup@example.com", kind="email_verification").count() == 2
+
+def test_replacing_a_message_makes_it_due(outbox, relay):
+    relay.reject["backoff@example.com"] = 451
+    queue_email(outbox, "backoff@example.com", "email_verification", "Verify", "old link")
+    outbox.commit()
+    assert deliver_batch(outbox, connect=_connect(relay))["retry"] == 1
+    del relay.reject["backoff@example.com"]
+
+    queue_email(outbox, "backoff@example.com", "email_verification", "Verify", "new link")
+    outbox.commit()
+
+    # Sent now, not after the old message's retry delay
+    assert deliver_batch(outbox, connect=_connect(relay))["sent"] == 1
+    assert "new link" in relay.messages[-1][1]
+
+def test_message_replaced_while_sending_stays_pending(outbox, relay):
+    queue_email(outbox, "moved@example.com", "email_verification", "Verify", "old link")
+    outbox.commit()
+
+    def connect():
+        # A second /start lands after the batch has read the message
+        queue_email(outbox, "moved@example.com", "email_verification", "Verify", "new link")
+        outbox.commit()
+        return _connect(relay)()
+
+    deliver_batch(outbox, connect=connect)
+    outbox.expire_all()
+    [row] = outbox.query(EmailOutbox).filter_by(email="moved@example.com").all()
+    assert (row.status, row.body) == ("pending", "new link")
+
+    assert deliver_batch(outbox, connect=_connect(relay))["sent"] == 1
+    assert "new link" in relay.messages[-1][1]
+
+def test_deliver_batch_sends_over_one_connection(outbox, relay):
+    for index in range(3):
+        queue_email(outbox, f"user{index}@example.com", "email_verification", "Verify", f"link {index}")
+    outbox.commit()
+
+    result = deliver_batch(outbox, connect=_connect(relay))
+
+    assert result == {"sent": 3, "retry": 0, "failed": 0}
+    assert relay.connections == 1
+    assert sorted(recipients[0] for recipients, _ in relay.messages) == [f"user{index}@example.com" for index in range(3)]
+    assert "link 0" in relay.messages[0][1]
+    outbox.expire_all()
+    assert {row.status for row in outbox.query(EmailOutbox)} == {"sent"}
+    assert deliver_batch(outbox, connect=_connect(relay))["sent"] == 0
+
+def test_rejected_and_undeliverable_messages_back_off(outbox, relay):
+    relay.reject.update({"bounce@example.com": 550, "later@example.com": 451})
+    for address in ("bounce@example.com", "later@example.com", "ok@example.com"):
+        queue_email(outbox, address, "email_verification", "Verify", "link")
+    outbox.commit()
+    now = datetime.now(timezone.utc)
+
+    assert deliver_batch(outbox, now=now, connect=_connect(relay)) == {"sent": 1, "retry": 1, "failed": 1}
+    assert relay.connections == 1
+
+    def refused():
+        raise ConnectionRefusedError("relay down")
+
+    # Not due yet, then due again once the backoff has passed
+    assert deliver_batch(outbox, now=now, connect=refused) == {"sent": 0, "retry": 0, "failed": 0}
+    later = now + timedelta(seconds=settings.email_retry_base_seconds)
+    assert deliver_batch(outbox, now=later, connect=refused) == {"sent": 0, "retry": 1, "failed": 0}
+
+    outbox.expire_all()
+    statuses = {row.email: (row.status, row.attempts) for row in outbox.query(EmailOutbox)}
+    # The refused connection did not count against later@
+    assert statuses == {
+        "bounce@example.com": ("failed", 1),
+        "later@example.com": ("pending", 1),
+        "ok@example.com": ("sent", 1),
+    }
+
+def test_relay_outage_never_fails_messages(outbox, monkeypatch):
+    monkeypatch.setattr(settings, "email_max_attempts", 2)
+    queue_email(outbox, "patient@example.com", "email_verification", "Verify", "link")
+    outbox.commit()
+
+    def refused():
+        raise ConnectionRefusedError("relay down")
+
+    now = datetime.now(timezone.utc)
+    for hour in range(5):
+        assert deliver_batch(outbox, now=now + timedelta(hours=hour), connect=refused)["failed"] == 0
+
+    outbox.expire_all()
+    row = outbox.query(EmailOutbox).filter_by(email="patient@example.com").one()
+    assert (row.status, row.attempts) == ("pending", 0)
+    assert row.last_error == "ConnectionRefusedError: relay down"
+
+def test_only_the_leader_sends(outbox, relay, monkeypatch):
+    host, port = relay.server_address
+    monkeypatch.setattr(settings, "smtp_host", host)
+    monkeypatch.setattr(settings, "smtp_port", port)
+    queue_email(outbox, "leader@example.com", "email_verification", "Verify", "link")
+    outbox.commit()
+    backend = InMemoryBackend()
+    leader, follower = (
+        EmailOutboxSender(TestingSessionLocal, BackendLock(backend, "leader:email-outbox", ttl=30))
+        for _ in range(2)
+    )
+
+    assert asyncio.run(leader.tick()) == {"sent": 1, "retry": 0, "failed": 0}
+    assert asyncio.run(follower.tick()) is None
+    assert len(relay.messages) == 1
+
+def test_retry_delay_is_capped():
+    assert settings.email_retry_base_seconds / 2 <= retry_delay(1) <= settings.email_retry_base_seconds
+    assert retry_delay(100) <= settings.email_retry_max_seconds
@@ -0,0 +1,113 @@
+import asyncio
+import json
+from datetime import datetime, timezone
+from uuid import uuid4
+from app.core.events import RESYNC, Event, EventBus, event_bus
+from app.routers.events import event_stream
+from conftest import RESIDENT_USER_ID, STAFF_USER_ID
+
+async def _next(subscription):
+    return await asyncio.wait_for(subscription.queue.get(), 1)
+
+def test_bus_fans_out_to_each_subscriber():
+    async def scenario():
+        bus = EventBus(queue_size=10)
+        first, second = bus.subscribe(RESIDENT_USER_ID), bus.subscribe(RESIDENT_USER_ID)
+        other = bus.subscribe(STAFF_USER_ID)
+        # Publishing from a worker thread, as sync routes do
+        await asyncio.to_thread(bus.publish, [str(RESIDENT_USER_ID)], "call.created", {"id": "c1"})
+        assert (await _next(first)).data == {"id": "c1"}
+        assert (await _next(second)).type == "call.created"
+        assert other.queue.empty()
+
+        bus.unsubscribe(first)
+        bus.publish([RESIDENT_USER_ID], "call.joined", {})
+        await asyncio.sleep(0)
+        assert first.queue.empty() and (await _next(second)).type == "call.joined"
+
+    asyncio.run(scenario())
+
+def test_slow_subscriber_is_told_to_resync():
+    async def scenario():
+        bus = EventBus(queue_size=2)
+        subscription = bus.subscribe(RESIDENT_USER_ID)
+        for index in range(5):
+            bus.publish([RESIDENT_USER_ID], "call.created", {"index": index})
+        await asyncio.sleep(0)
+        assert subscription.queue.qsize() == 1
+        assert await _next(subscription) is RESYNC
+
+    asyncio.run(scenario())
+
+def test_backplane_messages_from_other_workers_are_delivered():
+    async def scenario():
+        local, remote = EventBus(queue_size=10), EventBus(queue_size=10)
+        subscription = local.subscribe(RESIDENT_USER_ID)
+        event = Event("contact.updated", {"status": "approved"})
+        local.receive(remote.encode([RESIDENT_USER_ID], event))
+        # Our own messages echoed back by the backplane are ignored
+        local.receive(local.encode([RESIDENT_USER_ID], event))
+        local.receive(b"not json")
+        await asyncio.sleep(0)
+        assert subscription.queue.qsize() == 1
+        assert (await _next(subscription)).data == {"status": "approved"}
+
+    asyncio.run(scenario())
+
+def test_event_timestamps_are_iso_8601():
+    start = datetime(2037, 1, 1, 9, 0, tzinfo=timezone.utc)
+    event = Event("call.created", {"scheduled_start": start, "id": uuid4()})
+    assert '"scheduled_start": "2037-01-01T09:00:00+00:00"' in event.sse()
+    payload = json.loads(EventBus(queue_size=1).encode([RESIDENT_USER_ID], event))
+    assert payload["data"]["scheduled_start"] == start.isoformat()
+
+def test_event_stream_heartbeats_and_ends_on_resync():
+    async def scenario():
+        bus = EventBus(queue_size=10)
+        subscription = bus.subscribe(RESIDENT_USER_ID)
+
+        async def connected():
+            return False
+
+        stream = event_stream(bus, subscription, connected, heartbeat=0.01)
+        assert "event: ready" in await stream.__anext__()
+        assert await stream.__anext__() == ": heartbeat\n\n"
+        bus.publish([RESIDENT_USER_ID], "call.created", {"id": "c1"})
+        assert (await stream.__anext__()).endswith('event: call.created\ndata: {"id": "c1"}\n\n')
+        subscription.queue.put_nowait(RESYNC)
+        assert "event: resync" in await stream.__anext__()
+        assert [chunk async for chunk in stream] == []
+        assert RESIDENT_USER_ID not in bus._subscriptions
+
+    asyncio.run(scenario())
+
+def test_routes_publish_call_events(authed_client):
+    async def scenario():
+        subscription = event_bus.subscribe(RESIDENT_USER_ID)
+        try:
+            response = authed_client.post("/api/calls/create", json={
+                "creator_id": str(STAFF_USER_ID),
+                "room_name": "events-room",
+                "participant_ids": [str(RESIDENT_USER_ID)],
+                "scheduled_start": "2036-03-01T09:00:00Z",
+                "scheduled_duration": 30,
+                "max_participants": 2,
+                "recording_enabled": False
+            })
+            assert response.status_code == 200
+            call_id = response.json()["id"]
+            created = await _next(subscription)
+            assert (created.type, str(created.data["id"])) == ("call.created", call_id)
+            assert "token" not in created.data
+
+            authed_client.post(f"/api/calls/{call_id}/join")
+            joined = await _next(subscription)
+            assert (joined.type, str(joined.data["user_id"])) == ("call.joined", str(STAFF_USER_ID))
+        finally:
+            event_bus.unsubscribe(subscription)
+
+    asyncio.run(scenario())
+
+def test_stream_requires_a_token(client):
+    assert client.get("/api/events/stream").status_code == 401
+    assert client.get("/api/events/stream", params={"access_token": str(uuid4())}).status_code == 401
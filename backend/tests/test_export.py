@@ -0,0 +1,71 @@
+import csv
+import gzip
+import io
+import json
+import zlib
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+from app.config import settings
+from app.core.auth import create_access_token
+from app.core.export import gzip_chunks
+from app.models.contacts import Contact
+from app.models.video_calls import VideoCall
+from conftest import RESIDENT_USER_ID, STAFF_USER_ID
+
+def _calls(db, count):
+    start = datetime(2037, 1, 1, 9, 0, tzinfo=timezone.utc)
+    calls = [
+        VideoCall(
+            creator_id=STAFF_USER_ID,
+            room_name=f"export-{uuid4()}",
+            status="completed",
+            scheduled_start=start + timedelta(hours=index),
+            scheduled_duration=30,
+            max_participants=2,
+            participant_ids=[STAFF_USER_ID, RESIDENT_USER_ID],
+            recording_enabled=False
+        )
+        for index in range(count)
+    ]
+    db.add_all(calls)
+    db.commit()
+    return [str(call.id) for call in calls]
+
+def test_export_calls_streams_ndjson_in_batches(authed_client, db, monkeypatch):
+    monkeypatch.setattr(settings, "export_batch_size", 2)
+    created = _calls(db, 5)
+
+    response = authed_client.get("/api/calls/export", params={"status": "completed", "start_from": "2037-01-01T00:00:00Z"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["id"] for row in rows] == created
+    assert rows[0]["participant_ids"] == [str(STAFF_USER_ID), str(RESIDENT_USER_ID)]
+    assert rows[0]["scheduled_start"].startswith("2037-01-01T09:00:00")
+
+def test_export_contacts_as_gzipped_csv(authed_client, db):
+    contact = Contact(requestor_id=STAFF_USER_ID, contact_id=RESIDENT_USER_ID, relationship="export", status="rejected")
+    db.add(contact)
+    db.commit()
+
+    response = authed_client.get("/api/contacts/export", params={"format": "csv", "status": "rejected", "gzip": "true"})
+
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert 'filename="contacts.csv"' in response.headers["content-disposition"]
+    # httpx has already decoded the gzip body
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [(row["id"], row["relationship"]) for row in rows] == [(str(contact.id), "export")]
+
+def test_export_is_staff_only(client, resident_user):
+    headers = {"Authorization": f"Bearer {create_access_token(resident_user)}"}
+    assert client.get("/api/calls/export", headers=headers).status_code == 403
+    assert client.get("/api/contacts/export", headers=headers).status_code == 403
+
+def test_gzip_chunks_flush_every_chunk():
+    chunks = list(gzip_chunks([b"first\n", b"second\n"], level=6))
+
+    # The first chunk decodes on its own, before the stream ends
+    assert zlib.decompressobj(16 + zlib.MAX_WBITS).decompress(chunks[0]) == b"first\n"
+    assert gzip.decompress(b"".join(chunks)) == b"first\nsecond\n"
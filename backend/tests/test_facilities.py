@@ -47,3 +47,48 @@ def test_get_facility_settings(authed_client):
     assert "devices" in data["settings"]
     assert "security" in data["settings"]
     assert "deployment" in data["settings"]
+
+def test_facility_settings_served_from_cache(authed_client, db):
+    from app.models.facilities import Facility
+    facility_id = "123e4567-e89b-12d3-a456-426614174000"
+    first = authed_client.get(f"/api/facilities/{facility_id}/settings")
+    assert first.status_code == 200
+
+    # A write that bypasses the API is not visible until the entry is invalidated
+    facility = db.query(Facility).filter(Facility.name == first.json()["name"]).one()
+    facility.name = "Renamed Facility"
+    db.commit()
+    assert authed_client.get(f"/api/facilities/{facility_id}/settings").json() == first.json()
+
+    response = authed_client.put(f"/api/facilities/{facility_id}/settings", json={"name": "Updated Facility"})
+    assert response.status_code == 200
+    assert authed_client.get(f"/api/facilities/{facility_id}/settings").json()["name"] == "Updated Facility"
+
+def test_shared_backend_keeps_workers_coherent():
+    from uuid import uuid4
+    from app.core.cache import InMemoryBackend, set_shared_backend
+    from app.core.facility_cache import FacilitySettingsCache
+    worker_a, worker_b = FacilitySettingsCache(ttl=60), FacilitySettingsCache(ttl=60)
+    facility_id = uuid4()
+    set_shared_backend(InMemoryBackend())
+    try:
+        version, _ = worker_a.lookup(facility_id)
+        worker_a.store(facility_id, version, b'{"v": 1}')
+        assert worker_b.lookup(facility_id) == (version, b'{"v": 1}')
+
+        # A reader that loaded before the update must not repopulate stale data
+        new_version = worker_a.invalidate(facility_id)
+        worker_b.store(facility_id, version, b'{"v": "stale"}')
+        assert worker_b.lookup(facility_id) == (new_version, None)
+    finally:
+        set_shared_backend(None)
+
+def test_facility_settings_conditional_get(authed_client):
+    facility_id = "123e4567-e89b-12d3-a456-426614174000"
+    etag = authed_client.get(f"/api/facilities/{facility_id}/settings").headers["ETag"]
+    response = authed_client.get(
+        f"/api/facilities/{facility_id}/settings",
+        headers={"If-None-Match": f'W/"other", {etag}'}
+    )
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
@@ -0,0 +1,82 @@
+import json
+import os
+import subprocess
+import sys
+from sqlalchemy import create_engine, text
+from app.config import settings
+from app.core.auth import create_access_token
+from app.core.instrumentation import QueryStats, current_query_stats, db_queries, instrument_engine
+from app.core.metrics import Counter, Gauge, MultiProcessCollector, generate_latest
+
+test_requests = Counter("test_worker_requests_total", "Requests seen by a test worker", ["path"])
+test_connections = Gauge("test_worker_connections", "Connections held by a test worker")
+
+def test_metrics_endpoint_reports_route_latency(authed_client):
+    authed_client.get("/api/contacts/pending")
+    response = authed_client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert "# TYPE http_request_duration_seconds histogram" in body
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/contacts/pending",status="200"}' in body
+    assert 'le="+Inf"' in body
+
+def test_queries_are_counted_per_request():
+    engine = create_engine("sqlite://")
+    instrument_engine(engine, "metrics-test")
+    stats = QueryStats()
+    token = current_query_stats.set(stats)
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 2"))
+    finally:
+        current_query_stats.reset(token)
+    assert stats.count == 2 and stats.seconds > 0
+    assert db_queries.value(engine="metrics-test") == 2
+
+def _exited_pid() -> int:
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+def test_multiprocess_collector_sums_workers(tmp_path):
+    test_requests.inc(3, path="/a")
+    test_connections.set(2)
+    exited = _exited_pid()
+    stopped = MultiProcessCollector(str(tmp_path), pid=exited)
+    stopped.flush(live=False)
+    snapshot = json.loads((tmp_path / f"metrics-{exited}.json").read_text())
+    assert "test_worker_connections" not in snapshot
+    running = MultiProcessCollector(str(tmp_path), pid=os.getpid())
+    running.flush()
+
+    body = generate_latest(collector=MultiProcessCollector(str(tmp_path), pid=os.getppid()))
+    # Two flushed workers plus the serving one
+    assert 'test_worker_requests_total{path="/a"} 9' in body
+    # Gauges only from live workers: the flushed running one and the serving one
+    assert "test_worker_connections 4" in body
+
+def test_exited_workers_are_archived(tmp_path):
+    test_requests.inc(1, path="/b")
+    exited = _exited_pid()
+    MultiProcessCollector(str(tmp_path), pid=exited).flush()
+    # A new worker folds the exited one into the archive, gauges dropped
+    MultiProcessCollector(str(tmp_path), pid=os.getppid())
+    assert sorted(path.name for path in tmp_path.glob("metrics-*")) == ["metrics-archive.json"]
+    archive = json.loads((tmp_path / "metrics-archive.json").read_text())
+    assert "test_worker_connections" not in archive
+
+    # A worker reusing a pid archives the snapshot left under it instead of overwriting it
+    MultiProcessCollector(str(tmp_path), pid=os.getpid()).flush()
+    reused = MultiProcessCollector(str(tmp_path), pid=os.getpid())
+    reused.flush()
+    expected = 3 * test_requests.value(path="/b")
+    assert f'test_worker_requests_total{{path="/b"}} {expected:g}' in generate_latest(collector=reused)
+
+def test_metrics_require_staff_or_scraper_token(client, resident_user, monkeypatch):
+    assert client.get("/metrics").status_code == 401
+    resident = {"Authorization": f"Bearer {create_access_token(resident_user)}"}
+    assert client.get("/metrics", headers=resident).status_code == 403
+    monkeypatch.setattr(settings, "metrics_token", "scrape-secret")
+    assert client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"}).status_code == 200
@@ -0,0 +1,54 @@
+from uuid import uuid4
+import pytest
+from sqlalchemy import select
+from app.core.profiler import QueryBudgetExceeded, query_budget, statement_shape
+from app.models.contacts import Contact
+from app.models.users import User
+from app.routers.calls import _is_participant
+from conftest import RESIDENT_USER_ID, TestingSessionLocal
+
+def test_statement_shape_collapses_literals_and_in_lists():
+    assert statement_shape("SELECT * FROM users WHERE id IN (?, ?, ?) AND age > 21") == \
+        statement_shape("SELECT *  FROM users\nWHERE id IN (?) AND age > 30") == \
+        "SELECT * FROM users WHERE id IN (...) AND age > ?"
+
+def test_request_within_budget_reports_query_count(authed_client):
+    with query_budget(3) as profiles:
+        response = authed_client.get("/api/contacts/pending")
+    assert response.status_code == 200
+    assert int(response.headers["X-Query-Count"]) == profiles[0].count
+    assert profiles[0].name == "GET /api/contacts/pending"
+
+    with pytest.raises(QueryBudgetExceeded, match="budget of 0 exceeded"):
+        with query_budget(0):
+            authed_client.get("/api/contacts/pending")
+
+def test_lazy_loads_in_a_loop_are_flagged(db):
+    requestors = [User(id=uuid4(), email=f"{uuid4().hex}@example.com", name="Family", role="visitor", status="approved") for _ in range(5)]
+    db.add_all(requestors)
+    db.add_all(Contact(requestor_id=user.id, contact_id=RESIDENT_USER_ID, relationship="family", status="approved") for user in requestors)
+    db.commit()
+    ids = [user.id for user in requestors]
+
+    # A fresh session, so every requestor has to be lazy-loaded
+    with TestingSessionLocal() as session:
+        with pytest.raises(QueryBudgetExceeded, match="possible N\\+1") as excinfo:
+            with query_budget(10):
+                contacts = session.scalars(select(Contact).where(Contact.requestor_id.in_(ids))).all()
+                names = [contact.requestor.name for contact in contacts]
+    assert names == ["Family"] * 5
+    assert "repeated 5x: SELECT users." in str(excinfo.value)
+
+def test_collapsed_trace_is_flamegraph_input(db):
+    with query_budget(5) as profiles:
+        _is_participant(db, uuid4(), RESIDENT_USER_ID)
+        # Issued from outside the app package
+        db.execute(select(User.id).where(User.id == RESIDENT_USER_ID)).all()
+    stacks = [line.rsplit(" ", 1) for line in profiles[0].collapsed().strip().splitlines()]
+    frames = [stack.split(";") for stack, _ in stacks]
+    assert [stack[0] for stack in frames] == ["query_budget", "query_budget"]
+    assert frames[0][1].startswith("app.routers.calls:_is_participant:")
+    assert frames[1][1] == "framework"
+    assert frames[0][2].startswith("SELECT call_participants.call_id")
+    assert frames[1][2].startswith("SELECT users.id FROM users")
+    assert all(int(weight) >= 1 for _, weight in stacks)
@@ -0,0 +1,139 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from uuid import UUID, uuid4
+import httpx
+from jose import jwt
+from app.providers.fake import FakeProvider
+from app.providers.livekit import LiveKitProvider
+from app.providers.registry import registry
+from app.providers.tokens import RoomTokenCache
+from app.models.video_calls import VideoCall
+from conftest import FACILITY_ID, RESIDENT_USER_ID, STAFF_USER_ID
+
+def test_reconnect_reuses_cached_token(monkeypatch):
+    minted = []
+    provider = LiveKitProvider("livekit-test", "http://livekit.test", "key", "secret")
+    monkeypatch.setattr(provider, "_mint", lambda room, user, ttl: minted.append(room) or f"jwt-{len(minted)}")
+
+    first = provider.mint_token("room-a", "user-1")
+    assert provider.mint_token("room-a", "user-1") == first
+    assert provider.mint_token("room-a", "user-2") != first
+    assert provider.mint_token("room-a", "user-1", ttl=timedelta(hours=1)) != first
+    assert len(minted) == 3
+
+def test_cached_token_reissued_before_expiry():
+    now = [0.0]
+    cache = RoomTokenCache("test", maxsize=10, margin=timedelta(minutes=5), timer=lambda: now[0])
+    tokens = iter(["first", "second"])
+    mint = lambda: next(tokens)
+
+    assert cache.get_or_mint("room", "user", (), timedelta(hours=1), mint) == "first"
+    now[0] = 54 * 60
+    assert cache.get_or_mint("room", "user", (), timedelta(hours=1), mint) == "first"
+    now[0] = 55 * 60
+    assert cache.get_or_mint("room", "user", (), timedelta(hours=1), mint) == "second"
+
+def test_token_mints_only_serialize_per_key():
+    import threading
+    cache = RoomTokenCache("test", maxsize=10, margin=timedelta(minutes=5))
+    release, minted = threading.Event(), []
+
+    def slow_mint():
+        release.wait(5)
+        minted.append("a")
+        return "token-a"
+
+    waiters = [
+        threading.Thread(target=cache.get_or_mint, args=("room-a", "user", (), timedelta(hours=1), slow_mint))
+        for _ in range(3)
+    ]
+    for waiter in waiters:
+        waiter.start()
+    # A different key mints while room-a is still being signed
+    assert cache.get_or_mint("room-b", "user", (), timedelta(hours=1), lambda: "token-b") == "token-b"
+    release.set()
+    for waiter in waiters:
+        waiter.join(5)
+    assert minted == ["a"]
+    assert cache._mint_locks == {}
+
+def test_premint_upcoming_call_tokens(db):
+    from app.core.scheduler import premint_upcoming_tokens
+    fake = FakeProvider("fake-premint")
+    registry.register(fake)
+    now = datetime(2034, 1, 1, 9, 0, tzinfo=timezone.utc)
+    calls = [
+        VideoCall(
+            creator_id=STAFF_USER_ID,
+            room_name=f"call-{uuid4()}",
+            status="scheduled",
+            scheduled_start=start,
+            scheduled_duration=30,
+            max_participants=2,
+            participant_ids=[RESIDENT_USER_ID],
+            video_provider=fake.name
+        )
+        for start in (now + timedelta(minutes=5), now + timedelta(hours=5))
+    ]
+    db.add_all(calls)
+    db.commit()
+
+    assert premint_upcoming_tokens(db, now=now) == 1
+    assert fake.minted == 1
+
+def test_facility_routes_calls_to_its_provider(authed_client, db):
+    settings_url = f"/api/facilities/{FACILITY_ID}/settings"
+    original = authed_client.get(settings_url).json()["settings"]
+    response = authed_client.put(settings_url, json={"settings": {**original, "video_provider": "no-such-provider"}})
+    assert response.status_code == 400
+
+    authed_client.put(settings_url, json={"settings": {**original, "video_provider": "fake"}})
+    try:
+        response = authed_client.post("/api/calls/create", json={
+            "creator_id": str(STAFF_USER_ID),
+            "room_name": "test-room",
+            "participant_ids": [str(RESIDENT_USER_ID)],
+            "scheduled_start": "2034-02-01T09:00:00Z",
+            "scheduled_duration": 30,
+            "max_participants": 2,
+            "recording_enabled": False
+        })
+        assert response.json()["token"].startswith("fake_token_")
+        assert db.get(VideoCall, UUID(response.json()["id"])).video_provider == "fake"
+    finally:
+        authed_client.put(settings_url, json={"settings": original})
+
+def test_fake_provider_rooms():
+    async def scenario():
+        fake = FakeProvider()
+        await fake.create_room("room")
+        fake.connect("room", "alice")
+        participants = await fake.list_participants("room")
+        await fake.close_room("room")
+        return participants, fake.rooms
+
+    participants, rooms = asyncio.run(scenario())
+    assert participants == ["alice"]
+    assert rooms == {}
+
+def test_livekit_room_service_over_pooled_client():
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json={"participants": [{"identity": "alice"}]})
+
+    async def scenario():
+        provider = LiveKitProvider("livekit-test", "http://livekit.test", "key", "secret")
+        provider._http = httpx.AsyncClient(base_url=provider.base_url, transport=httpx.MockTransport(handler))
+        participants = await provider.list_participants("room")
+        await provider.aclose()
+        return participants
+
+    assert asyncio.run(scenario()) == ["alice"]
+    request = requests[0]
+    assert request.url.path == "/twirp/livekit.RoomService/ListParticipants"
+    token = request.headers["Authorization"].removeprefix("Bearer ")
+    claims = jwt.decode(token, "secret", algorithms=["HS256"])
+    assert claims["iss"] == "key"
+    assert claims["video"]["room"] == "room"
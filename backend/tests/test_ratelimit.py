@@ -0,0 +1,85 @@
+from uuid import uuid4
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.core.auth import AuthenticatedUser, create_access_token
+from app.core.cache import InMemoryBackend
+from app.core.ratelimit import RateLimitMiddleware, parse_limits
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def _client(limits, backend):
+    app = FastAPI()
+
+    @app.get("/limited")
+    def limited():
+        return {"ok": True}
+
+    @app.get("/open")
+    def open_route():
+        return {"ok": True}
+
+    app.add_middleware(RateLimitMiddleware, limits=limits, backend=backend)
+    return TestClient(app)
+
+def _token(facility_id=None):
+    user = AuthenticatedUser(uuid4(), "resident", "approved", facility_id, "", 0, 0)
+    return {"Authorization": f"Bearer {create_access_token(user)}"}
+
+def test_token_bucket_refills_over_time():
+    clock = Clock()
+    backend = InMemoryBackend(timer=clock)
+    assert [backend.take_tokens("k", rate=1.0, capacity=2)[0] for _ in range(3)] == [True, True, False]
+    clock.now = 1.5
+    assert backend.take_tokens("k", rate=1.0, capacity=2) == (True, 0.5)
+    assert backend.take_tokens("k", rate=1.0, capacity=2)[0] is False
+
+def test_parse_limits_rejects_unknown_scopes():
+    assert [limit.policy for limit in parse_limits("ip=10/60, user=5/1")] == ["10;w=60", "5;w=1"]
+    for spec in ("tenant=1/1", "ip=10", "ip"):
+        try:
+            parse_limits(spec)
+        except ValueError:
+            continue
+        raise AssertionError(spec)
+
+def test_ip_limit_sends_headers_and_retry_after():
+    client = _client({"/limited": "ip=2/60"}, InMemoryBackend(timer=Clock()))
+    first = client.get("/limited")
+    assert first.status_code == 200
+    assert (first.headers["RateLimit-Limit"], first.headers["RateLimit-Remaining"]) == ("2", "1")
+    assert first.headers["RateLimit-Policy"] == "2;w=60"
+    assert client.get("/limited").status_code == 200
+
+    rejected = client.get("/limited")
+    assert rejected.status_code == 429
+    assert rejected.headers["Retry-After"] == "30"
+    assert rejected.json() == {"detail": "Too many requests"}
+    assert "RateLimit-Limit" not in client.get("/open").headers
+
+def test_user_and_facility_buckets():
+    facility_id = uuid4()
+    client = _client({"/limited": "user=1/60,facility=2/60"}, InMemoryBackend(timer=Clock()))
+    first, second, third = _token(facility_id), _token(facility_id), _token(facility_id)
+    assert client.get("/limited", headers=first).status_code == 200
+    # Per-user bucket is spent, the facility's is not
+    assert client.get("/limited", headers=first).status_code == 429
+    assert client.get("/limited", headers=second).status_code == 200
+    # The facility's bucket is now spent for every user in it
+    assert client.get("/limited", headers=third).status_code == 429
+    assert client.get("/limited", headers=_token(uuid4())).status_code == 200
+
+def test_rejected_requests_spend_no_quota():
+    clock, facility_id = Clock(), uuid4()
+    client = _client({"/limited": "user=2/600,facility=1/60"}, InMemoryBackend(timer=clock))
+    user = _token(facility_id)
+    assert client.get("/limited", headers=_token(facility_id)).status_code == 200
+    # Refused by the facility's bucket: the user's bucket is put back each time
+    for _ in range(3):
+        assert client.get("/limited", headers=user).status_code == 429
+    clock.now = 60
+    assert client.get("/limited", headers=user).status_code == 200
@@ -1,29 +1,79 @@
+import hashlib
+from datetime import datetime, timedelta
+from uuid import uuid4
+import pytest
+from app.config import settings
+from app.core.blobs import LocalBlobStore, set_blob_store
+from app.core.cache import InMemoryBackend, set_shared_backend
 from app.core.email import generate_verification_token
+from app.core.identity_uploads import sweep_identity_uploads
+from app.core.registration_sessions import RegistrationCompleted, registration_sessions
+from app.routers import registration
+from app.schemas.registration import PersonalInfo
+from app.models.contacts import Contact
+from app.models.email_outbox import EmailOutbox
+from app.models.identity_uploads import IdentityUpload
+from app.models.users import User
+from conftest import RESIDENT_USER_ID
 
-def test_registration_start(authed_client):
+@pytest.fixture(autouse=True)
+def fresh_backend():
+    # Registration drafts and the /start rate limit buckets, cleared per test
+    set_shared_backend(InMemoryBackend())
+    yield
+    set_shared_backend(None)
+
+def _email():
+    # The database is shared across tests, so each registration needs its own address
+    return f"applicant_{uuid4().hex}@example.com"
+
+def _start(client, email):
+    response = client.post("/api/registration/start", json={"email": email, "user_type": "visitor"})
+    assert response.status_code == 200
+    return response.json()
+
+def test_registration_start(authed_client, db):
+    email = _email()
     response = authed_client.post("/api/registration/start", json={
-        "email": f"test_{int(1740281650.247)}@example.com",
+        "email": email,
         "user_type": "resident"
     })
     print("Response:", response.status_code, "-", response.json())
     assert response.status_code == 200
     data = response.json()
     assert "registrationId" in data
-    assert "verificationToken" in data
     assert "expiresAt" in data
+    # The link goes out by email from the outbox, never in the response
+    assert "verificationToken" not in data
+    [queued] = db.query(EmailOutbox).filter(EmailOutbox.email == email).all()
+    assert (queued.kind, queued.status) == ("email_verification", "pending")
+    assert data["registrationId"] in queued.body
 
 def test_verify_email(authed_client):
-    email = "test@example.com"
+    email = _email()
+    registration = _start(authed_client, email)
     token = generate_verification_token(email)
     response = authed_client.post("/api/registration/verify-email", json={
+        "registration_id": registration["registrationId"],
         "email": email,
         "token": token
     })
     assert response.status_code == 200
     assert response.json()["verified"] is True
 
+def test_verify_email_rejects_token_for_another_email(authed_client):
+    registration = _start(authed_client, _email())
+    response = authed_client.post("/api/registration/verify-email", json={
+        "registration_id": registration["registrationId"],
+        "email": "someone.else@example.com",
+        "token": generate_verification_token("someone.else@example.com")
+    })
+    assert response.status_code == 400
+
 def test_personal_info(authed_client):
+    registration = _start(authed_client, _email())
     response = authed_client.post("/api/registration/personal-info", json={
+        "registration_id": registration["registrationId"],
         "name": "John Doe",
         "phone": "+1234567890",
         "address": "123 Main St"
@@ -31,21 +81,226 @@ def test_personal_info(authed_client):
     assert response.status_code == 200
     assert response.json()["status"] == "success"
 
-def test_verify_identity(authed_client):
-    response = authed_client.post("/api/registration/verify-identity", json={
-        "id_type": "drivers_license",
-        "id_number": "DL123456",
-        "id_expiry": "2025-12-31",
-        "id_image": "base64_encoded_image"
-    })
+def test_steps_require_a_live_registration(authed_client):
+    response = authed_client.post("/api/registration/personal-info", json={"registration_id": "unknown", "name": "John Doe"})
+    assert response.status_code == 404
+
+IDENTITY_FIELDS = {"id_type": "drivers_license", "id_number": "DL123456", "id_expiry": "2025-12-31"}
+JPEG = b"\xff\xd8\xff\xe0" + b"\x00" * 200_000
+
+@pytest.fixture
+def blob_store(tmp_path):
+    store = LocalBlobStore(str(tmp_path))
+    set_blob_store(store)
+    yield store
+    set_blob_store(None)
+
+def _stored_files(store):
+    return [path for path in store.root.rglob("*") if path.is_file()]
+
+def test_verify_identity(authed_client, blob_store):
+    registration_id = _start(authed_client, _email())["registrationId"]
+    response = authed_client.post(
+        "/api/registration/verify-identity",
+        params={"registration_id": registration_id},
+        data=IDENTITY_FIELDS,
+        files={"id_image": ("licence.jpg", JPEG, "image/jpeg")}
+    )
     assert response.status_code == 200
-    assert response.json()["status"] == "success"
+    data = response.json()
+    assert data["status"] == "success"
+    assert data["document"] == {"sha256": hashlib.sha256(JPEG).hexdigest(), "size": len(JPEG), "content_type": "image/jpeg"}
+    [stored] = _stored_files(blob_store)
+    assert stored.read_bytes() == JPEG
+    # Filed under its registration
+    assert stored.parent == blob_store.root / "identity" / registration_id
+
+def test_verify_identity_rejects_oversized_and_unknown_files(authed_client, blob_store, monkeypatch):
+    # Under the Content-Length precheck, so the limit is hit mid-stream
+    monkeypatch.setattr(settings, "identity_upload_max_bytes", 150_000)
+    url = "/api/registration/verify-identity"
+    params = {"registration_id": _start(authed_client, _email())["registrationId"]}
+    png = {"id_image": ("id.png", b"\x89PNG\r\n\x1a\n0", "image/png")}
+
+    too_large = authed_client.post(url, params=params, data=IDENTITY_FIELDS, files={"id_image": ("licence.jpg", JPEG, "image/jpeg")})
+    # Declared as JPEG, but the bytes are not one
+    not_an_image = authed_client.post(url, params=params, data=IDENTITY_FIELDS, files={"id_image": ("licence.jpg", b"<html>", "image/jpeg")})
+    missing_field = authed_client.post(url, params=params, data={"id_type": "passport"}, files=png)
+    unknown_registration = authed_client.post(url, params={"registration_id": "unknown"}, data=IDENTITY_FIELDS, files=png)
+
+    assert too_large.status_code == 413
+    assert not_an_image.status_code == 415
+    assert missing_field.status_code == 422
+    assert unknown_registration.status_code == 404
+    assert _stored_files(blob_store) == []
 
-def test_relationships(authed_client):
-    from uuid import UUID
+def test_verify_identity_requires_multipart(authed_client, blob_store):
+    registration_id = _start(authed_client, _email())["registrationId"]
+    response = authed_client.post(
+        "/api/registration/verify-identity",
+        params={"registration_id": registration_id},
+        json={**IDENTITY_FIELDS, "id_image": "aGVsbG8="}
+    )
+    assert response.status_code == 415
+
+def test_verify_identity_is_rate_limited(client, blob_store):
+    limit = int(settings.rate_limits["/api/registration/verify-identity"].split("=")[1].split("/")[0])
+    responses = [
+        client.post("/api/registration/verify-identity", params={"registration_id": "unknown"}, data=IDENTITY_FIELDS)
+        for _ in range(limit + 1)
+    ]
+    assert [response.status_code for response in responses] == [404] * limit + [429]
+
+def _complete_steps(client, registration_id, email):
+    steps = [
+        client.post("/api/registration/verify-email", json={
+            "registration_id": registration_id, "email": email, "token": generate_verification_token(email)
+        }),
+        client.post("/api/registration/personal-info", json={
+            "registration_id": registration_id, "name": "Jane Applicant", "phone": "+15550100", "address": "1 Main St"
+        }),
+        client.post(
+            "/api/registration/verify-identity",
+            params={"registration_id": registration_id},
+            data=IDENTITY_FIELDS,
+            files={"id_image": ("licence.jpg", JPEG, "image/jpeg")}
+        )
+    ]
+    assert [step.status_code for step in steps] == [200, 200, 200]
+
+def test_relationships(authed_client, blob_store):
+    email = _email()
+    registration_id = _start(authed_client, email)["registrationId"]
+    _complete_steps(authed_client, registration_id, email)
     response = authed_client.post("/api/registration/relationships", json={
-        "contacts": [str(UUID("123e4567-e89b-12d3-a456-426614174000"))],
+        "registration_id": registration_id,
+        "contacts": [str(RESIDENT_USER_ID)],
         "relationships": ["parent"]
     })
     assert response.status_code == 200
     assert response.json()["status"] == "success"
+
+def test_user_is_only_written_by_the_final_step(authed_client, db, blob_store):
+    email = _email()
+    registration_id = _start(authed_client, email)["registrationId"]
+    _complete_steps(authed_client, registration_id, email)
+    assert db.query(User).filter(User.email == email).count() == 0
+
+    final = {"registration_id": registration_id, "contacts": [str(RESIDENT_USER_ID)], "relationships": ["friend"]}
+    first = authed_client.post("/api/registration/relationships", json=final)
+    retry = authed_client.post("/api/registration/relationships", json=final)
+
+    assert first.status_code == retry.status_code == 200
+    assert first.json() == retry.json()
+    user = db.query(User).filter(User.email == email).one()
+    assert (user.role, user.name, user.status) == ("visitor", "Jane Applicant", "pending")
+    assert (user.phone, user.address) == ("+15550100", "1 Main St")
+    assert db.query(Contact).filter(Contact.requestor_id == user.id).count() == 1
+    [upload] = db.query(IdentityUpload).filter(IdentityUpload.registration_id == registration_id).all()
+    assert upload.user_id == user.id
+    assert (upload.id_type, upload.id_number, upload.sha256) == ("drivers_license", "DL123456", hashlib.sha256(JPEG).hexdigest())
+    [stored] = _stored_files(blob_store)
+    assert stored.relative_to(blob_store.root).as_posix() == upload.blob_key
+    # Completed drafts no longer accept changes
+    late = authed_client.post("/api/registration/personal-info", json={"registration_id": registration_id, "name": "Other"})
+    assert late.status_code == 409
+
+def test_relationships_requires_earlier_steps(authed_client):
+    registration_id = _start(authed_client, _email())["registrationId"]
+    response = authed_client.post("/api/registration/relationships", json={
+        "registration_id": registration_id, "contacts": [], "relationships": []
+    })
+    assert response.status_code == 409
+    assert response.json()["detail"]["missing_steps"] == ["verify-email", "personal-info", "verify-identity"]
+
+def test_retried_steps_do_not_rewrite_the_draft(authed_client, blob_store, monkeypatch):
+    email = _email()
+    registration_id = _start(authed_client, email)["registrationId"]
+    _complete_steps(authed_client, registration_id, email)
+    writes = []
+    original = registration_sessions._write
+    monkeypatch.setattr(registration_sessions, "_write", lambda *args: writes.append(args) or original(*args))
+
+    _complete_steps(authed_client, registration_id, email)
+
+    assert writes == []
+    # The duplicate upload was discarded in favour of the stored copy
+    assert len(_stored_files(blob_store)) == 1
+
+def test_expired_registration_is_gone(authed_client, monkeypatch):
+    monkeypatch.setattr(registration_sessions, "ttl", 0)
+    registration_id = _start(authed_client, _email())["registrationId"]
+    response = authed_client.post("/api/registration/personal-info", json={"registration_id": registration_id, "name": "John Doe"})
+    assert response.status_code == 404
+
+def _upload(client, registration_id, name, content, content_type):
+    return client.post(
+        "/api/registration/verify-identity",
+        params={"registration_id": registration_id},
+        data=IDENTITY_FIELDS,
+        files={"id_image": (name, content, content_type)}
+    )
+
+def test_replaced_uploads_are_deleted(authed_client, db, blob_store):
+    registration_id = _start(authed_client, _email())["registrationId"]
+    png = b"\x89PNG\r\n\x1a\n" + b"\x00" * 100
+    assert _upload(authed_client, registration_id, "licence.jpg", JPEG, "image/jpeg").status_code == 200
+    assert _upload(authed_client, registration_id, "licence.png", png, "image/png").status_code == 200
+
+    [stored] = _stored_files(blob_store)
+    assert stored.read_bytes() == png
+    [upload] = db.query(IdentityUpload).filter(IdentityUpload.registration_id == registration_id).all()
+    assert upload.content_type == "image/png" and upload.user_id is None
+
+def test_abandoned_uploads_are_swept(authed_client, db, blob_store):
+    abandoned = _start(authed_client, _email())
+    email = _email()
+    completed_id = _start(authed_client, email)["registrationId"]
+    assert _upload(authed_client, abandoned["registrationId"], "licence.jpg", JPEG, "image/jpeg").status_code == 200
+    _complete_steps(authed_client, completed_id, email)
+    final = {"registration_id": completed_id, "contacts": [], "relationships": []}
+    assert authed_client.post("/api/registration/relationships", json=final).status_code == 200
+    assert len(_stored_files(blob_store)) == 2
+
+    expired = datetime.fromisoformat(abandoned["expiresAt"]) + timedelta(seconds=1)
+    assert sweep_identity_uploads(db, now=expired, store=blob_store) >= 1
+
+    # The claimed document stays with its user
+    [stored] = _stored_files(blob_store)
+    assert stored.parent.name == completed_id
+    assert db.query(IdentityUpload).filter(IdentityUpload.registration_id == abandoned["registrationId"]).count() == 0
+
+def test_concurrent_steps_keep_each_others_fields(authed_client):
+    registration_id = _start(authed_client, _email())["registrationId"]
+    raced = []
+
+    def change(draft):
+        if not raced:
+            # Another step lands between this one's read and its write
+            raced.append(registration_sessions.update(registration_id, email_verified=True))
+        return {"personal_info": PersonalInfo(name="Jane Applicant")}
+
+    registration_sessions.modify(registration_id, change)
+
+    draft = registration_sessions.get(registration_id)
+    assert draft.email_verified and draft.personal_info.name == "Jane Applicant"
+    registration_sessions.update(registration_id, user_id=uuid4())
+    with pytest.raises(RegistrationCompleted):
+        registration_sessions.update(registration_id, personal_info=PersonalInfo(name="Other"))
+
+def test_upload_finishing_after_completion_keeps_it(authed_client, blob_store, monkeypatch):
+    registration_id = _start(authed_client, _email())["registrationId"]
+    user_id = uuid4()
+    receive_upload = registration.receive_upload
+
+    async def completed_during_upload(*args, **kwargs):
+        result = await receive_upload(*args, **kwargs)
+        registration_sessions.update(registration_id, user_id=user_id)
+        return result
+
+    monkeypatch.setattr(registration, "receive_upload", completed_during_upload)
+    response = _upload(authed_client, registration_id, "licence.jpg", JPEG, "image/jpeg")
+
+    assert response.status_code == 409
+    assert registration_sessions.get(registration_id).user_id == user_id
+    assert _stored_files(blob_store) == []
@@ -0,0 +1,113 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+from app.core.cache import InMemoryBackend
+from app.core.leader import BackendLock
+from app.core.scheduler import CallScheduler, measure_backlog, run_sweep, scheduler_lag
+from app.models.video_calls import CallParticipant, VideoCall
+from conftest import RESIDENT_USER_ID, STAFF_USER_ID, TestingSessionLocal
+
+NOW = datetime(2040, 6, 1, 12, 0, tzinfo=timezone.utc)
+
+def _call(db, status, start, duration=30, connected=0):
+    call = VideoCall(
+        creator_id=STAFF_USER_ID,
+        room_name=f"call-{uuid4()}",
+        status=status,
+        scheduled_start=start,
+        scheduled_duration=duration,
+        max_participants=2,
+        participant_ids=[RESIDENT_USER_ID],
+        connected_participants=connected
+    )
+    db.add(call)
+    db.commit()
+    return call
+
+def test_sweep_expires_finished_calls(db):
+    no_show = _call(db, "scheduled", NOW - timedelta(days=1))
+    stale = _call(db, "active", NOW - timedelta(hours=3))
+    overrunning = _call(db, "active", NOW - timedelta(hours=2), connected=2)
+    running_late = _call(db, "scheduled", NOW - timedelta(minutes=10), duration=60)
+    upcoming = _call(db, "scheduled", NOW + timedelta(days=1))
+
+    result = run_sweep(db, now=NOW, batch_size=2)
+    assert result["cancelled"] >= 1 and result["completed"] >= 1
+    assert scheduler_lag.value() >= timedelta(hours=23).total_seconds()
+
+    db.expire_all()
+    assert no_show.status == "cancelled"
+    assert stale.status == "completed"
+    assert overrunning.status == "active"
+    assert running_late.status == "scheduled"
+    assert upcoming.status == "scheduled"
+    row = db.query(CallParticipant).filter(CallParticipant.call_id == no_show.id).one()
+    assert row.status == "cancelled"
+
+    assert run_sweep(db, now=NOW)["backlog"] == 0
+
+def test_backlog_counts_calls_by_their_end(db):
+    later = NOW + timedelta(days=2)
+    run_sweep(db, now=later)
+    # Started well before the cutoff but still running: not backlog
+    _call(db, "active", later - timedelta(hours=2), duration=180)
+    overdue = _call(db, "active", later - timedelta(hours=3), duration=60)
+
+    backlog = measure_backlog(db, later)
+
+    assert backlog["backlog"] == 1
+    assert backlog["lag_seconds"] == timedelta(hours=2).total_seconds()
+    db.delete(overdue)
+    db.commit()
+
+def test_leader_lock_lease():
+    now = [0.0]
+    backend = InMemoryBackend(timer=lambda: now[0])
+    first, second = BackendLock(backend, "leader:test", ttl=30), BackendLock(backend, "leader:test", ttl=30)
+
+    assert first.acquire()
+    assert not second.acquire()
+    now[0] = 20
+    assert first.acquire()  # renews the lease
+    now[0] = 45
+    assert not second.acquire()
+    now[0] = 90  # leader stopped renewing
+    assert second.acquire()
+    assert not first.acquire()
+    # The lapsed holder can neither extend nor drop its successor's lease
+    first.release()
+    assert backend.get("leader:test") == second.token
+    second.release()
+    assert first.acquire()
+
+def test_leader_lease_is_renewed_and_released_atomically():
+    now, takeovers = [0.0], []
+
+    class LapsingBackend(InMemoryBackend):
+        """The lease lapses and a successor takes it right after any read."""
+
+        def get(self, key):
+            value = super().get(key)
+            now[0] += 60
+            if self.add(key, b"successor", 30):
+                takeovers.append(now[0])
+            return value
+
+    backend = LapsingBackend(timer=lambda: now[0])
+    lock = BackendLock(backend, "leader:test", ttl=30)
+    assert lock.acquire()
+    now[0] = 20
+    assert lock.acquire()
+    assert takeovers or InMemoryBackend.get(backend, "leader:test") == lock.token
+    lock.release()
+    # A read-then-write renewal or release would have clobbered the successor
+    assert not takeovers or InMemoryBackend.get(backend, "leader:test") == b"successor"
+
+def test_scheduler_only_sweeps_as_leader():
+    backend = InMemoryBackend()
+    BackendLock(backend, "leader:call-scheduler", ttl=60).acquire()
+    scheduler = CallScheduler(
+        session_factory=TestingSessionLocal,
+        lock=BackendLock(backend, "leader:call-scheduler", ttl=60)
+    )
+    assert asyncio.run(scheduler.tick()) is None
@@ -0,0 +1,57 @@
+import json
+from datetime import datetime, timezone
+from typing import List
+from uuid import uuid4
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from app.core.serialization import FastJSONResponse, json_response
+from app.models.video_calls import VideoCall
+from app.routers.calls import call_json
+from app.schemas.video_calls import VideoCallRead
+
+def _call(**overrides):
+    now = datetime(2036, 1, 1, 9, 0, tzinfo=timezone.utc)
+    fields = dict(
+        id=uuid4(),
+        creator_id=uuid4(),
+        room_name=f"call-{uuid4()}",
+        status="scheduled",
+        scheduled_start=now,
+        scheduled_duration=30,
+        max_participants=2,
+        participant_ids=[uuid4(), uuid4()],
+        recording_enabled=False,
+        connected_participants=0,
+        created_at=now,
+        updated_at=now
+    )
+    fields.update(overrides)
+    return VideoCall(**fields)
+
+def test_serializer_matches_response_model_output():
+    calls = [_call(), _call(recording_status="active")]
+    adapter = TypeAdapter(List[VideoCallRead])
+    # What FastAPI renders for response_model=List[VideoCallRead]
+    expected = JSONResponse(adapter.dump_python(adapter.validate_python(calls, from_attributes=True), mode="json")).body
+
+    assert json.loads(call_json.render_many(calls)) == json.loads(expected)
+    assert json.loads(call_json.render(calls[0], token="abc"))["token"] == "abc"
+
+def test_fast_json_response_renders_like_json_response():
+    content = {"id": str(uuid4()), "names": ["a", "ü"], "count": 2, "ratio": 0.5, "missing": None}
+
+    assert json.loads(FastJSONResponse(content).body) == json.loads(JSONResponse(content).body)
+
+def test_json_response_keeps_headers_set_on_injected_response():
+    injected = Response()
+    del injected.headers["content-length"]
+    injected.headers["X-Next-Cursor"] = "abc"
+    injected.status_code = 201
+
+    response = json_response(b"[]", injected)
+
+    assert response.status_code == 201
+    assert response.headers["X-Next-Cursor"] == "abc"
+    assert response.headers["content-type"] == "application/json"
+    assert response.headers["content-length"] == "2"
@@ -0,0 +1,103 @@
+import asyncio
+import base64
+import hashlib
+import json
+import time
+from datetime import datetime, timezone
+from uuid import uuid4
+from fastapi.testclient import TestClient
+from jose import jwt
+from app.core.room_events import RoomEventWorker, apply_room_events, room_event_worker
+from app.main import app
+from app.models.video_calls import CallParticipant, VideoCall
+from app.providers.livekit import LiveKitProvider
+from app.providers.registry import registry
+from conftest import RESIDENT_USER_ID, STAFF_USER_ID, TestingSessionLocal
+
+def _scheduled_call(db, start):
+    call = VideoCall(
+        creator_id=STAFF_USER_ID,
+        room_name=f"call-{uuid4()}",
+        status="scheduled",
+        scheduled_start=start,
+        scheduled_duration=30,
+        max_participants=2,
+        participant_ids=[RESIDENT_USER_ID]
+    )
+    db.add(call)
+    db.commit()
+    return call
+
+def _sign(body: bytes, key: str = "hook-key", secret: str = "hook-secret") -> str:
+    digest = base64.b64encode(hashlib.sha256(body).digest()).decode()
+    return jwt.encode({"iss": key, "sha256": digest, "exp": int(time.time()) + 60}, secret, algorithm="HS256")
+
+def test_room_events_drive_call_lifecycle(db):
+    call = _scheduled_call(db, datetime(2035, 1, 1, 9, 0, tzinfo=timezone.utc))
+    room = {"name": call.room_name}
+
+    apply_room_events(db, [
+        {"event": "room_started", "room": room},
+        {"event": "participant_joined", "room": {**room, "numParticipants": 1}},
+        {"event": "participant_joined", "room": {**room, "numParticipants": 2}},
+        {"event": "egress_started", "egressInfo": {"roomName": call.room_name, "status": "EGRESS_STARTING"}},
+    ])
+    db.expire_all()
+    assert (call.status, call.connected_participants, call.recording_status) == ("active", 2, "active")
+
+    apply_room_events(db, [
+        {"event": "egress_ended", "egressInfo": {"roomName": call.room_name, "status": "EGRESS_COMPLETE"}},
+        {"event": "room_finished", "room": room},
+    ])
+    db.expire_all()
+    assert (call.status, call.connected_participants, call.recording_status) == ("completed", 0, "completed")
+    row = db.query(CallParticipant).filter(CallParticipant.call_id == call.id).one()
+    assert row.status == "completed"
+
+def test_failed_batches_are_retried_not_dropped():
+    applied, failures = [], {"EV_bad": float("inf"), "EV_flaky": 1}
+
+    def apply(batch):
+        for event in batch:
+            if failures.get(event["id"], 0) > 0:
+                failures[event["id"]] -= 1
+                raise RuntimeError("database unavailable")
+        applied.extend(event["id"] for event in batch)
+
+    async def scenario():
+        worker = RoomEventWorker(batch_interval=0.01, apply_attempts=2, retry_base=0.01)
+        worker._apply = apply
+        worker.start()
+        assert worker.enqueue({"id": "EV_flaky", "event": "room_finished"})
+        await worker.queue.join()
+        # The failed attempt did not mark it seen; a redelivery while queued is still deduplicated
+        assert worker.enqueue({"id": "EV_bad", "event": "room_finished"})
+        assert worker.enqueue({"id": "EV_good", "event": "room_finished"})
+        assert worker.enqueue({"id": "EV_bad", "event": "room_finished"})
+        await worker.queue.join()
+        seen = {event_id: event_id in worker._seen for event_id in ("EV_flaky", "EV_good", "EV_bad")}
+        await worker.stop()
+        return seen
+
+    seen = asyncio.run(scenario())
+    assert applied == ["EV_flaky", "EV_good"]
+    assert seen == {"EV_flaky": True, "EV_good": True, "EV_bad": False}
+
+def test_livekit_webhook_verified_and_applied(db, monkeypatch):
+    registry.register(LiveKitProvider("livekit-hooks", "http://livekit.test", "hook-key", "hook-secret"))
+    monkeypatch.setattr(room_event_worker, "session_factory", TestingSessionLocal)
+    call = _scheduled_call(db, datetime(2035, 1, 2, 9, 0, tzinfo=timezone.utc))
+    body = json.dumps({"id": "EV_1", "event": "room_finished", "room": {"name": call.room_name}}).encode()
+
+    with TestClient(app) as client:
+        response = client.post("/api/webhooks/livekit", content=body, headers={"Authorization": _sign(body)})
+        assert response.status_code == 202
+        client.portal.call(room_event_worker.queue.join)
+
+        forged = client.post("/api/webhooks/livekit", content=body, headers={"Authorization": _sign(body, secret="wrong")})
+        assert forged.status_code == 401
+        tampered = client.post("/api/webhooks/livekit", content=body + b" ", headers={"Authorization": _sign(body)})
+        assert tampered.status_code == 401
+
+    db.expire_all()
+    assert call.status == "completed"